@@ -0,0 +1 @@
+"""Benchmark harnesses for the backend (run from backend/)."""
@@ -0,0 +1,98 @@
+"""statsapi decode cost: parsing to a dict tree and walking it versus typed decoding.
+
+Usage (from backend/):
+    python -m benchmarks.decode
+    python -m benchmarks.decode --days 366 --output bench-decode.json
+
+Payloads are season-sized /schedule bodies (one team, and the whole league)
+and a /teams/stats body from `benchmarks.stubs`, encoded to bytes once. "dict"
+is what the services did before: `json.loads` (as `resp.json()` does) then a
+walk over the nested dicts. "typed" is `statsapi_decode`, which decodes the
+bytes against msgspec schemas when msgspec is installed (`pip install msgspec`)
+and falls back to the dict walk otherwise. Both must yield the same rows. Peak
+memory is the tracemalloc high-water mark of one decode.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+import statsapi_decode  # noqa: E402
+from benchmarks.micro import measure  # noqa: E402
+from benchmarks.stubs import schedule_payload, team_stats_payload  # noqa: E402
+
+# payload name -> (raw body, dict path, typed path)
+Scenario = Tuple[bytes, Callable[[bytes], Any], Callable[[bytes], Any]]
+
+
+def scenarios(days: int) -> Dict[str, Scenario]:
+    start = date(2025, 3, 27)
+    end = start + timedelta(days=days - 1)
+
+    def encode(payload: Dict[str, Any]) -> bytes:
+        return json.dumps(payload).encode("utf-8")
+
+    def schedule_dict(raw: bytes) -> Any:
+        return statsapi_decode.schedule_rows(json.loads(raw) or {})
+
+    def stats_dict(raw: bytes) -> Any:
+        return statsapi_decode.stat_groups(json.loads(raw) or {})
+
+    return {
+        "schedule_team_season": (encode(schedule_payload(147, start, end)), schedule_dict, statsapi_decode.decode_schedule),
+        "schedule_league_season": (encode(schedule_payload(None, start, end)), schedule_dict, statsapi_decode.decode_schedule),
+        "team_stats": (encode(team_stats_payload(start.year)), stats_dict, statsapi_decode.decode_team_stats),
+    }
+
+
+def peak_bytes(call: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        call()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--days", type=int, default=186, help="days of schedule per payload (186 = a regular season)")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--min-time", type=float, default=0.2, help="seconds per repeat")
+    p.add_argument("--output", help="write the JSON report here")
+    args = p.parse_args(argv)
+
+    backend = "msgspec" if statsapi_decode.msgspec is not None else "dict walk (msgspec not installed)"
+    print(f"typed decoder: {backend}\n")
+    print(f"{'payload':24s} {'KiB':>7s} {'dict ms':>9s} {'typed ms':>9s} {'speedup':>8s} {'dict peak KiB':>14s} {'typed peak KiB':>15s}")
+    report: Dict[str, Any] = {"decoder": backend, "days": args.days, "payloads": {}}
+    for name, (raw, dict_path, typed_path) in scenarios(args.days).items():
+        if dict_path(raw) != typed_path(raw):
+            print(f"{name}: typed decoding differs from the dict path")
+            return 1
+        slow = measure(lambda: dict_path(raw), args.repeat, args.min_time)["best_s"] * 1e3
+        fast = measure(lambda: typed_path(raw), args.repeat, args.min_time)["best_s"] * 1e3
+        slow_peak = peak_bytes(lambda: dict_path(raw)) / 1024
+        fast_peak = peak_bytes(lambda: typed_path(raw)) / 1024
+        report["payloads"][name] = {
+            "bytes": len(raw), "dict_ms": round(slow, 3), "typed_ms": round(fast, 3),
+            "dict_peak_kib": round(slow_peak, 1), "typed_peak_kib": round(fast_peak, 1),
+        }
+        print(f"{name:24s} {len(raw) / 1024:7.0f} {slow:9.2f} {fast:9.2f} {slow / fast:7.1f}x {slow_peak:14.0f} {fast_peak:15.0f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+"""End-to-end benchmark: drive every /tools/* endpoint against local stub upstreams.
+
+Usage (from backend/):
+    python -m benchmarks.e2e --concurrency 16 --requests 200 --output bench-e2e.json
+    python -m benchmarks.e2e --compare bench-e2e.json --output bench-new.json
+
+The backend runs as a uvicorn subprocess with STATS_API, NEWS_API_URL,
+YOUTUBE_*_URL and the LLM base URLs pointed at the stubs in `benchmarks.stubs`,
+or, with --replay, serving upstream traffic from a recorded cassette.
+The report lists throughput, p50/p95/p99 latency and upstream calls per request
+for each endpoint.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.stubs import StubConfig, start_stubs, stub_env  # noqa: E402
+
+BENCH_USER = "bench_user"
+
+# (name, method, path, params, json body)
+SCENARIOS: List[Tuple[str, str, str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]] = [
+    ("echo", "POST", "/tools/echo", None, {"ping": "pong"}),
+    ("check_schedule", "POST", "/tools/check_schedule", None, {"team": "Yankees", "days": 14}),
+    ("news", "POST", "/tools/news", None, {"team": "Yankees", "max_results": 10}),
+    ("youtube", "POST", "/tools/youtube", None, {"team": "Yankees", "max_results": 10}),
+    ("compare_stats", "POST", "/tools/compare_stats", None, {"team1": "Yankees", "team2": "Red Sox"}),
+    ("team_intelligence", "POST", "/tools/team_intelligence", None, {"team": "Yankees"}),
+    ("aggregate", "POST", "/tools/aggregate", None,
+     {"team": "Yankees", "team1": "Yankees", "team2": "Red Sox", "include_compare": True, "include_youtube": True}),
+    ("multi_sport", "POST", "/tools/multi-sport", None, {"sport": "mlb", "team": "Yankees", "action": "stats"}),
+    ("nba", "POST", "/tools/nba", None, {"team": "Lakers", "action": "stats"}),
+    ("nfl", "POST", "/tools/nfl", None, {"team": "Chiefs", "action": "stats"}),
+    ("pipeline", "POST", "/tools/pipeline", None, {"team": "Yankees", "sport": "mlb"}),
+    ("sentiment", "POST", "/tools/sentiment", None, {"team": "Yankees"}),
+    ("predict", "POST", "/tools/predict", None, {"team": "Yankees", "opponent": "Red Sox"}),
+    ("visual_analytics", "POST", "/tools/visual-analytics", None, {"team": "Yankees"}),
+    ("personalized_agent", "POST", "/tools/personalized-agent", None,
+     {"user_id": BENCH_USER, "favorite_team": "Yankees", "preferences": {"analysis_style": "detailed"}}),
+    ("user_profile", "GET", f"/tools/user-profile/{BENCH_USER}", None, None),
+    ("update_preferences", "POST", "/tools/update-preferences", {"user_id": BENCH_USER}, {"analysis_style": "brief"}),
+    ("gamification_trivia", "POST", "/tools/gamification-agent", None, {"user_id": BENCH_USER, "action": "get_trivia"}),
+    ("gamification_answer", "POST", "/tools/gamification-agent", None,
+     {"user_id": BENCH_USER, "action": "submit_answer", "question_id": "q1", "answer": 0}),
+    ("gamification_predict", "POST", "/tools/gamification-agent", None,
+     {"user_id": BENCH_USER, "action": "make_prediction", "prediction_data": {"type": "game_outcome", "winner": "Yankees"}}),
+    ("gamification_leaderboard", "POST", "/tools/gamification-agent", None, {"user_id": BENCH_USER, "action": "get_leaderboard"}),
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def start_backend(port: int, env: Dict[str, str], workers: int, log_path: Optional[str]) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+           "--log-level", "warning", "--workers", str(workers)]
+    out = open(log_path, "w") if log_path else subprocess.DEVNULL
+    return subprocess.Popen(cmd, cwd=BACKEND_DIR, env={**os.environ, **env}, stdout=out, stderr=subprocess.STDOUT)
+
+
+def wait_ready(base_url: str, timeout: float = 30.0) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return time.perf_counter() - start
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError(f"backend did not become ready within {timeout}s")
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Tuple, total: int, concurrency: int) -> Dict[str, Any]:
+    name, method, path, params, body = scenario
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    remaining = total
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            t0 = time.perf_counter()
+            try:
+                resp = await client.request(method, path, params=params, json=body)
+                key = str(resp.status_code)
+            except httpx.HTTPError as e:
+                key = type(e).__name__
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            statuses[key] = statuses.get(key, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    errors = sum(n for k, n in statuses.items() if not k.startswith("2"))
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": statuses,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 50), 3),
+        "p95_ms": round(_percentile(latencies, 95), 3),
+        "p99_ms": round(_percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+    }
+
+
+async def drive(base_url: str, stubs: Dict[str, Any], args: argparse.Namespace) -> Dict[str, Any]:
+    selected = set(args.endpoints.split(",")) if args.endpoints else None
+    results: Dict[str, Any] = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    headers = {"X-Tool-Token": args.tool_token} if args.tool_token else {}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout, headers=headers) as client:
+        for scenario in SCENARIOS:
+            name = scenario[0]
+            if selected and name not in selected:
+                continue
+            # Warm caches and connections so the run measures steady state
+            for _ in range(args.warmup):
+                await client.request(scenario[1], scenario[2], params=scenario[3], json=scenario[4])
+            for stub in stubs.values():
+                stub.reset()
+            res = await run_scenario(client, scenario, args.requests, args.concurrency)
+            calls = {n: s.calls for n, s in stubs.items()}
+            res["upstream_calls"] = calls
+            res["upstream_calls_per_request"] = round(sum(calls.values()) / max(1, res["requests"]), 3)
+            results[name] = res
+            print(f"{name:26s} {res['throughput_rps']:9.1f} rps  p50 {res['p50_ms']:8.1f}  p95 {res['p95_ms']:8.1f}  "
+                  f"p99 {res['p99_ms']:8.1f} ms  upstream/req {res['upstream_calls_per_request']:.2f}  errors {res['errors']}")
+    return results
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any], max_regression: Optional[float]) -> bool:
+    """Print per-endpoint deltas; return False if any p95 regressed beyond `max_regression` (fraction)."""
+    ok = True
+    print(f"\ncompare {old.get('meta', {}).get('commit')} -> {new.get('meta', {}).get('commit')}")
+    for name, res in new["endpoints"].items():
+        prev = old.get("endpoints", {}).get(name)
+        if not prev:
+            continue
+
+        def delta(key: str) -> float:
+            return (res[key] - prev[key]) / prev[key] if prev[key] else 0.0
+
+        d95 = delta("p95_ms")
+        flag = ""
+        if max_regression is not None and d95 > max_regression:
+            ok = False
+            flag = "  REGRESSION"
+        print(f"{name:26s} rps {delta('throughput_rps'):+7.1%}  p50 {delta('p50_ms'):+7.1%}  p95 {d95:+7.1%}  "
+              f"p99 {delta('p99_ms'):+7.1%}  upstream/req {prev['upstream_calls_per_request']:.2f}->{res['upstream_calls_per_request']:.2f}{flag}")
+    return ok
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    p.add_argument("--warmup", type=int, default=2, help="unmeasured requests per endpoint")
+    p.add_argument("--endpoints", help="comma-separated scenario names (default: all)")
+    p.add_argument("--latency-ms", type=float, default=50.0, help="stub base latency")
+    p.add_argument("--jitter-ms", type=float, default=10.0, help="stub latency jitter (+/-)")
+    p.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub calls answered with 503")
+    p.add_argument("--llm-latency-ms", type=float, default=None, help="override latency for Mistral/OpenAI stubs")
+    p.add_argument("--no-llm", action="store_true", help="leave LLM keys unset so endpoints use their non-LLM paths")
+    p.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    p.add_argument("--timeout", type=float, default=60.0)
+    p.add_argument("--tool-token", default=None, help="TOOL_TOKEN to configure and send")
+    p.add_argument("--output", help="write the JSON report here")
+    p.add_argument("--compare", help="previous report to compare against")
+    p.add_argument("--max-regression", type=float, default=None, help="fail if any p95 grows by more than this fraction")
+    p.add_argument("--server-log", default=None, help="file for backend stdout/stderr")
+    p.add_argument("--replay", default=None, help="serve upstream calls from this cassette instead of the stubs")
+    p.add_argument("--replay-latency", type=float, default=1.0, help="scale recorded upstream latency in replay")
+    args = p.parse_args(argv)
+
+    base = StubConfig(args.latency_ms, args.jitter_ms, args.error_rate)
+    llm = StubConfig(args.llm_latency_ms if args.llm_latency_ms is not None else args.latency_ms, args.jitter_ms, args.error_rate)
+    stubs = start_stubs({"statsapi": base, "newsapi": base, "youtube": base, "mistral": llm, "openai": llm})
+
+    if args.replay:
+        env = {"CASSETTE_MODE": "replay", "CASSETTE_PATH": os.path.abspath(args.replay),
+               "CASSETTE_LATENCY": str(args.replay_latency)}
+    else:
+        env = stub_env(stubs)
+    # Every run starts cold: no cache snapshot is loaded or left behind
+    env.update({"NEWS_API_KEY": "bench", "YOUTUBE_API_KEY": "bench", "PYTHONUNBUFFERED": "1", "CACHE_SNAPSHOT": ""})
+    if args.no_llm:
+        env.update({"OPENAI_API_KEY": "", "MISTRAL_API_KEY": ""})
+    else:
+        env.update({"OPENAI_API_KEY": "bench", "MISTRAL_API_KEY": "bench"})
+    env["TOOL_TOKEN"] = args.tool_token or ""
+    # Leaderboard, prediction and profile writes go to a scratch directory, not backend/data/
+    data_dir = tempfile.TemporaryDirectory(prefix="bench-e2e-")
+    env.update({
+        "DATA_DIR": data_dir.name,
+        "LEADERBOARD_DB": os.path.join(data_dir.name, "leaderboard.db"),
+        "PREDICTIONS_LOG": os.path.join(data_dir.name, "predictions.log"),
+        "PROFILES_DB": os.path.join(data_dir.name, "profiles.db"),
+    })
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    proc = start_backend(port, env, args.workers, args.server_log)
+    try:
+        ready_s = wait_ready(base_url)
+        endpoints = asyncio.run(drive(base_url, stubs, args))
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        for stub in stubs.values():
+            stub.stop()
+        data_dir.cleanup()
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "ready_s": round(ready_s, 3),
+            "config": {k: v for k, v in vars(args).items() if k not in {"output", "compare", "tool_token", "server_log"}},
+        },
+        "endpoints": endpoints,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    ok = True
+    if args.compare:
+        with open(args.compare) as f:
+            ok = compare(json.load(f), report, args.max_regression)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
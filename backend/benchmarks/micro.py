@@ -0,0 +1,483 @@
+"""Microbenchmarks for CPU-side hot paths, at realistic and 100x data sizes.
+
+Usage (from backend/):
+    python -m benchmarks.micro                      # run and print
+    python -m benchmarks.micro --save               # write benchmarks/baselines/micro.json
+    python -m benchmarks.micro --check --threshold 0.25
+    python -m benchmarks.micro --cases view_count,leaderboard --scale 100x
+
+Network calls are replaced with canned payloads from `benchmarks.stubs`, so only
+parsing, normalization and rendering are measured. Each case reports the best
+per-call time over several repeats; `--check` fails if any case is slower than
+the baseline by more than the threshold fraction. Baselines are machine-specific:
+regenerate them with --save on the machine that runs --check.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.stubs import TEAMS, news_payload, schedule_payload, teams_payload  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "micro.json")
+SCALES = {"1x": 1, "100x": 100}
+
+# A case builder takes the scale factor and returns (call, items per call, restore)
+Builder = Callable[[int], Tuple[Callable[[], Any], int, Callable[[], None]]]
+CASES: Dict[str, Builder] = {}
+
+
+def case(name: str) -> Callable[[Builder], Builder]:
+    def register(fn: Builder) -> Builder:
+        CASES[name] = fn
+        return fn
+    return register
+
+
+def _noop() -> None:
+    return None
+
+
+class _FakeResponse:
+    def __init__(self, payload: Any) -> None:
+        self._payload = payload
+        # Raw body, for code that decodes the bytes itself (as statsapi parsing does)
+        self.content = json.dumps(payload).encode("utf-8")
+
+    def raise_for_status(self) -> None:
+        return None
+
+    def json(self) -> Any:
+        return self._payload
+
+
+class _FakeSession:
+    def __init__(self, payload: Any) -> None:
+        self._response = _FakeResponse(payload)
+
+    def get(self, *args: Any, **kwargs: Any) -> _FakeResponse:
+        return self._response
+
+
+TEAM_INPUTS = ["Yankees", "red sox", "Dodgers", "Kansas City Royals", "cubs", "NY Mets", "Mariners", "Expos"]
+
+
+def _teams(scale: int) -> List[dict]:
+    teams = teams_payload()["teams"]
+    # Extra synthetic clubs go first so real lookups scan the whole list, as a miss would
+    synthetic = [
+        {"id": 10_000 + i, "name": f"Synthetic Club {i}", "teamName": f"Club {i}", "shortName": f"SC {i}",
+         "clubName": f"Club {i}", "locationName": f"Town {i}", "fileCode": f"s{i}", "teamCode": f"s{i}"}
+        for i in range(len(teams) * (scale - 1))
+    ]
+    return synthetic + teams
+
+
+@case("resolve_team_id")
+def _resolve_team_id(scale: int):
+    import mlb_service
+
+    old = mlb_service._team_cache
+    mlb_service._team_cache = _teams(scale)
+
+    def run() -> None:
+        for t in TEAM_INPUTS:
+            mlb_service.resolve_team_id(t)
+
+    def restore() -> None:
+        mlb_service._team_cache = old
+
+    return run, len(TEAM_INPUTS), restore
+
+
+@case("team_search_terms")
+def _team_search_terms(scale: int):
+    from news_service import get_team_search_terms
+
+    inputs = TEAM_INPUTS * scale
+
+    def run() -> None:
+        for t in inputs:
+            get_team_search_terms(t)
+
+    return run, len(inputs), _noop
+
+
+@case("schedule_parse")
+def _schedule_parse(scale: int):
+    import mlb_service
+
+    start = date.today() - timedelta(days=7)
+    end = start + timedelta(days=14 * scale - 1)
+    payload = schedule_payload(147, start, end)
+    old = mlb_service._session
+    mlb_service._session = _FakeSession(payload)
+
+    def run() -> None:
+        mlb_service.get_schedule(147, start, end)
+
+    def restore() -> None:
+        mlb_service._session = old
+
+    return run, payload["totalGames"], restore
+
+
+def _league_payload(scale: int) -> Tuple[date, date, Dict[str, Any]]:
+    start = date.today() - timedelta(days=7)
+    end = start + timedelta(days=14 * scale - 1)
+    return start, end, schedule_payload(None, start, end)
+
+
+@case("schedule_batch_build")
+def _schedule_batch_build(scale: int):
+    from mlb_service import ScheduleBatch
+
+    _, _, payload = _league_payload(scale)
+    raw = json.dumps(payload).encode("utf-8")
+
+    def run() -> None:
+        ScheduleBatch.from_json(raw)
+
+    return run, payload["totalGames"], _noop
+
+
+@case("schedule_batch_filter")
+def _schedule_batch_filter(scale: int):
+    from mlb_service import ScheduleBatch
+
+    start, end, payload = _league_payload(scale)
+    batch = ScheduleBatch.from_payload(payload)
+    team_id = batch.team_ids[0]
+    # One team's games in a week-long window, as a per-request lookup would ask
+    lo = datetime.combine(start + timedelta(days=7 * scale), datetime.min.time(), tzinfo=timezone.utc)
+    hi = lo + timedelta(days=7)
+
+    def run() -> None:
+        batch.for_team(team_id, lo, hi)
+
+    return run, len(batch), _noop
+
+
+VIEW_TEXTS = ["1.2M views", "532K views", "12,345 views", "987 views", "3B views", "No views", "2.5k views", "45 views"]
+
+
+@case("view_count")
+def _view_count(scale: int):
+    from youtube_service import _parse_view_count
+
+    texts = VIEW_TEXTS * scale
+
+    def run() -> None:
+        for t in texts:
+            _parse_view_count(t)
+
+    return run, len(texts), _noop
+
+
+@case("youtube_scrape_normalize")
+def _youtube_scrape_normalize(scale: int):
+    import youtube_service
+
+    units = ["minutes", "hours", "days", "weeks", "months"]
+    result = {"result": [
+        {
+            "id": f"vid{i:08d}",
+            "title": f"Yankees highlights #{i}",
+            "channel": {"name": "MLB"},
+            "link": f"https://www.youtube.com/watch?v=vid{i:08d}",
+            "viewCount": {"text": VIEW_TEXTS[i % len(VIEW_TEXTS)]},
+            "publishedTime": f"{i % 11 + 1} {units[i % len(units)]} ago",
+        }
+        for i in range(20 * scale)
+    ]}
+
+    class FakeVideosSearch:
+        def __init__(self, query: str, limit: int = 20) -> None:
+            pass
+
+        def result(self) -> Dict[str, Any]:
+            return result
+
+    old = youtube_service._videos_search
+    youtube_service._videos_search = lambda: FakeVideosSearch
+
+    def run() -> None:
+        youtube_service.search_videos("Yankees", max_results=10, use_official_api=False)
+
+    def restore() -> None:
+        youtube_service._videos_search = old
+
+    return run, len(result["result"]), restore
+
+
+def _games(n: int) -> List[Any]:
+    from mlb_service import GameInfo
+
+    base = datetime(2025, 4, 1, 23, 5, tzinfo=timezone.utc)
+    return [
+        GameInfo(game_pk=700000 + i, game_date=base + timedelta(days=i), home_team="New York Yankees",
+                 away_team=TEAMS[i % len(TEAMS)][1], is_home=bool(i % 2), opponent=TEAMS[i % len(TEAMS)][1],
+                 venue="Yankee Stadium", status="Scheduled")
+        for i in range(n)
+    ]
+
+
+@case("game_encode")
+def _game_encode(scale: int):
+    from serialization import dumps
+
+    games = _games(14 * scale)
+
+    def run() -> None:
+        dumps({"schedule": games})
+
+    return run, len(games), _noop
+
+
+def _intelligence(team: str, scale: int) -> Any:
+    from news_service import NewsArticle
+    from sports_data_service import TeamIntelligence
+    from youtube_service import VideoItem
+
+    n = 10 * scale
+    articles = [
+        NewsArticle(title=a["title"], description=a["description"], url=a["url"], source=a["source"]["name"],
+                    published_at=datetime.fromisoformat(a["publishedAt"].replace("Z", "+00:00")), url_to_image=a["urlToImage"])
+        for a in news_payload(team, n)["articles"]
+    ]
+    videos = [
+        VideoItem(video_id=f"vid{i:08d}", title=f"{team} highlights #{i}", url=f"https://www.youtube.com/watch?v=vid{i:08d}",
+                  channel="MLB", view_count=1000 + i * 137)
+        for i in range(n)
+    ]
+    return TeamIntelligence(team_name=team, news_articles=articles, youtube_videos=videos, generated_at=datetime.now())
+
+
+@case("intelligence_summary")
+def _intelligence_summary(scale: int):
+    from sports_data_service import SportsDataService
+
+    service = SportsDataService.__new__(SportsDataService)  # skip NewsService construction
+    intel = _intelligence("Yankees", scale)
+
+    def run() -> None:
+        service.generate_intelligence_summary(intel)
+
+    return run, 1, _noop
+
+
+@case("matchup_summary")
+def _matchup_summary(scale: int):
+    from sports_data_service import SportsDataService
+
+    service = SportsDataService.__new__(SportsDataService)
+    matchup = {"Yankees": _intelligence("Yankees", scale), "Red Sox": _intelligence("Red Sox", scale)}
+
+    def run() -> None:
+        service.generate_matchup_summary(matchup)
+
+    return run, 1, _noop
+
+
+@case("leaderboard")
+def _leaderboard(scale: int):
+    from leaderboard import Leaderboard, Standing
+
+    n = 1_000 * scale
+    board = Leaderboard(seed=0)
+    board.seed(Standing(user_id=f"user_{i}", username=f"user_{i}", trivia_points=(n - i) * 10) for i in range(n))
+    step = [0]
+
+    def run() -> None:
+        # One score change plus the caller's rank, as submit_answer / get_leaderboard do
+        user_id = f"user_{(step[0] * 7919) % n}"
+        step[0] += 1
+        board.add_points(user_id, trivia=10, correct=True)
+        board.rank(user_id)
+
+    return run, 1, _noop
+
+
+def _score_accumulator(scale: int, writes: int):
+    from leaderboard import Leaderboard, ScoreAccumulator, Standing
+
+    n = 1_000 * scale
+    board = Leaderboard(seed=0)
+    board.seed(Standing(user_id=f"user_{i}", username=f"user_{i}", trivia_points=(n - i) * 10) for i in range(n))
+    return ScoreAccumulator(board), [f"user_{(i * 7919) % n}" for i in range(writes)]
+
+
+@case("leaderboard_writes")
+def _leaderboard_writes(scale: int):
+    # Request-path cost of a burst of answers: buffered deltas only (the same
+    # users repeat every run, so the buffer stays bounded without folding)
+    scores, user_ids = _score_accumulator(scale, 1_000)
+
+    def run() -> None:
+        for user_id in user_ids:
+            scores.add_points(user_id, trivia=10, correct=True)
+
+    return run, len(user_ids), _noop
+
+
+@case("leaderboard_fold")
+def _leaderboard_fold(scale: int):
+    # End-to-end throughput: the same burst plus one micro-batch fold into the ranking
+    scores, user_ids = _score_accumulator(scale, 1_000)
+
+    def run() -> None:
+        for user_id in user_ids:
+            scores.add_points(user_id, trivia=10, correct=True)
+        scores.fold()
+
+    return run, len(user_ids), _noop
+
+
+def measure(call: Callable[[], Any], repeat: int, min_time: float) -> Dict[str, float]:
+    """Best and median seconds per call, calibrating the loop count to `min_time` per repeat."""
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            call()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for _ in range(number):
+                call()
+            timings.append((time.perf_counter() - t0) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    timings.sort()
+    return {"best_s": timings[0], "median_s": timings[len(timings) // 2], "loops": number}
+
+
+def run_cases(names: List[str], scales: List[str], repeat: int, min_time: float) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name in names:
+        for scale_name in scales:
+            call, items, restore = CASES[name](SCALES[scale_name])
+            try:
+                call()  # warm caches and lazy imports
+                m = measure(call, repeat, min_time)
+            finally:
+                restore()
+            key = f"{name}[{scale_name}]"
+            results[key] = {
+                "items": items,
+                "best_us": round(m["best_s"] * 1e6, 3),
+                "median_us": round(m["median_s"] * 1e6, 3),
+                "per_item_ns": round(m["best_s"] * 1e9 / max(1, items), 1),
+                "loops": m["loops"],
+            }
+            r = results[key]
+            print(f"{key:36s} {r['best_us']:12.1f} us  median {r['median_us']:12.1f} us  "
+                  f"{r['per_item_ns']:10.1f} ns/item  ({items} items)")
+    return results
+
+
+def check(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> bool:
+    """Print deltas against `baseline`; False if any case regressed by more than `threshold`."""
+    ok = True
+    print(f"\ncheck against {baseline.get('meta', {}).get('commit')} (threshold {threshold:+.0%})")
+    for key, res in current.items():
+        prev = baseline.get("cases", {}).get(key)
+        if not prev:
+            print(f"{key:36s} (no baseline)")
+            continue
+        delta = (res["best_us"] - prev["best_us"]) / prev["best_us"] if prev["best_us"] else 0.0
+        flag = ""
+        if delta > threshold:
+            ok = False
+            flag = "  REGRESSION"
+        print(f"{key:36s} {prev['best_us']:12.1f} -> {res['best_us']:12.1f} us  {delta:+8.1%}{flag}")
+    return ok
+
+
+def _git_commit() -> Optional[str]:
+    import subprocess
+
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--cases", help=f"comma-separated subset of: {', '.join(CASES)}")
+    p.add_argument("--scale", choices=[*SCALES, "all"], default="all")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--min-time", type=float, default=0.2, help="seconds per repeat")
+    p.add_argument("--baseline", default=DEFAULT_BASELINE)
+    p.add_argument("--save", action="store_true", help="write results as the new baseline")
+    p.add_argument("--check", action="store_true", help="compare against the baseline")
+    p.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown fraction for --check")
+    p.add_argument("--output", help="also write the JSON report here")
+    args = p.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    names = args.cases.split(",") if args.cases else list(CASES)
+    unknown = [n for n in names if n not in CASES]
+    if unknown:
+        p.error(f"unknown cases: {', '.join(unknown)}")
+    scales = list(SCALES) if args.scale == "all" else [args.scale]
+
+    results = run_cases(names, scales, args.repeat, args.min_time)
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "cases": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    ok = True
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"no baseline at {args.baseline}; run with --save first")
+            return 2
+        with open(args.baseline) as f:
+            ok = check(json.load(f), results, args.threshold)
+    if args.save:
+        baseline: Dict[str, Any] = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        # Merge so saving a subset keeps the other cases' baselines
+        baseline["meta"] = report["meta"]
+        baseline.setdefault("cases", {}).update(results)
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nbaseline written to {args.baseline}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
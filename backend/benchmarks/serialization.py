@@ -0,0 +1,170 @@
+"""Serialization cost per /tools/* endpoint: FastAPI's default path versus serialization.FastJSONResponse.
+
+Usage (from backend/):
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --scale 10 --output bench-serialization.json
+
+For each endpoint a representative response is built from in-memory records
+(no network). "default" is what the handlers did before: hand-built dicts
+(GameOut models for games), then FastAPI's jsonable_encoder pass and
+JSONResponse rendering. "fast" returns the records as-is and encodes them in
+one pass with `serialization.dumps` (orjson when installed). Both must produce
+the same JSON document. With msgspec or msgpack installed, "msgpack" is the
+same fast path negotiated with `Accept: application/msgpack` and must decode to
+the same document.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import BaseModel  # noqa: E402
+
+import serialization  # noqa: E402
+from benchmarks.micro import _games, _intelligence, measure  # noqa: E402
+
+
+class GameOut(BaseModel):
+    """The pydantic model schedule responses used to build per game."""
+
+    game_pk: int
+    game_date: str
+    home_team: str
+    away_team: str
+    is_home: bool
+    opponent: str
+    venue: Optional[str] = None
+    status: str
+
+
+def _game_out(g: Any) -> Dict[str, Any]:
+    return GameOut(
+        game_pk=g.game_pk, game_date=g.game_date.isoformat(), home_team=g.home_team, away_team=g.away_team,
+        is_home=g.is_home, opponent=g.opponent, venue=g.venue, status=g.status,
+    ).model_dump()
+
+
+def _article(a: Any) -> Dict[str, Any]:
+    return {"title": a.title, "description": a.description, "url": a.url, "source": a.source,
+            "published_at": a.published_at.isoformat(), "url_to_image": a.url_to_image}
+
+
+def _video(v: Any) -> Dict[str, Any]:
+    return {"video_id": v.video_id, "title": v.title, "url": v.url, "channel": v.channel, "view_count": v.view_count}
+
+
+# endpoint -> (default content builder, fast content builder)
+Scenario = Tuple[Callable[[], Any], Callable[[], Any]]
+
+
+def scenarios(scale: int) -> Dict[str, Scenario]:
+    from leaderboard import Standing
+
+    games = _games(14 * scale)
+    intel = _intelligence("Yankees", scale)
+    articles, videos = intel.news_articles, intel.youtube_videos
+    now = datetime(2025, 4, 1, tzinfo=timezone.utc)
+    comparison = {"season": 2025, "team1": {"hitting": {"avg": ".251", "homeRuns": 180, "ops": ".742"}},
+                  "team2": {"hitting": {"avg": ".243", "homeRuns": 162, "ops": ".718"}}}
+    standings = [Standing(user_id=f"user_{i}", username=f"user_{i}", trivia_points=1000 - i, prediction_points=i % 50,
+                          games_played=i % 30, answered=i % 30, accuracy=0.5) for i in range(100 * scale)]
+
+    def schedule(encode_game: Callable[[Any], Any], encode_list: Callable[[List[Any]], Any]) -> Dict[str, Any]:
+        return {"team_id": 147, "team_name": "New York Yankees", "from": now.isoformat(), "to": now.isoformat(),
+                "next_game": encode_game(games[0]), "schedule": encode_list(games), "source": "MLB API"}
+
+    return {
+        "check_schedule": (
+            lambda: schedule(_game_out, lambda gs: [_game_out(g) for g in gs]),
+            lambda: schedule(lambda g: g, lambda gs: gs),
+        ),
+        "news": (
+            lambda: {"team": "Yankees", "articles": [_article(a) for a in articles], "source": "NewsAPI"},
+            lambda: {"team": "Yankees", "articles": articles, "source": "NewsAPI"},
+        ),
+        "youtube": (
+            lambda: {"query": "Yankees", "results": [_video(v) for v in videos], "source": "YouTube API"},
+            lambda: {"query": "Yankees", "results": videos, "source": "YouTube API"},
+        ),
+        "team_intelligence": (
+            lambda: {"team": intel.team_name, "generated_at": intel.generated_at.isoformat(),
+                     "news": [_article(a) for a in articles], "youtube": [_video(v) for v in videos]},
+            lambda: {"team": intel.team_name, "generated_at": intel.generated_at.isoformat(),
+                     "news": articles, "youtube": videos},
+        ),
+        "aggregate": (
+            lambda: {"summary": "", "data": {"schedule": schedule(_game_out, lambda gs: [_game_out(g) for g in gs]),
+                                             "compare_stats": comparison, "news": [_article(a) for a in articles],
+                                             "youtube": [_video(v) for v in videos]}},
+            lambda: {"summary": "", "data": {"schedule": schedule(lambda g: g, lambda gs: gs),
+                                             "compare_stats": comparison, "news": articles, "youtube": videos}},
+        ),
+        "gamification_leaderboard": (
+            lambda: {"leaderboard": [s.to_dict(rank) for rank, s in enumerate(standings, 1)], "status": "success"},
+            lambda: {"leaderboard": [s.to_dict(rank) for rank, s in enumerate(standings, 1)], "status": "success"},
+        ),
+    }
+
+
+def default_path(build: Callable[[], Any]) -> bytes:
+    return JSONResponse(jsonable_encoder(build())).body
+
+
+def fast_path(build: Callable[[], Any]) -> bytes:
+    return serialization.FastJSONResponse(build()).body
+
+
+def msgpack_path(build: Callable[[], Any]) -> bytes:
+    return serialization.MsgpackResponse(build()).body
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--scale", type=int, default=1, help="multiply list sizes in every payload")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--min-time", type=float, default=0.2, help="seconds per repeat")
+    p.add_argument("--output", help="write the JSON report here")
+    args = p.parse_args(argv)
+
+    backend = "orjson" if serialization.orjson is not None else "json"
+    packer = serialization._unpack is not None
+    print(f"fast path encoder: {backend}; msgpack: {'yes' if packer else 'not installed'}\n")
+    print(f"{'endpoint':28s} {'bytes':>9s} {'default us':>12s} {'fast us':>10s} {'speedup':>8s}"
+          + (f" {'msgpack bytes':>14s} {'msgpack us':>11s}" if packer else ""))
+    report: Dict[str, Any] = {"encoder": backend, "scale": args.scale, "endpoints": {}}
+    for name, (default_build, fast_build) in scenarios(args.scale).items():
+        body = default_path(default_build)
+        if json.loads(body) != json.loads(fast_path(fast_build)):
+            print(f"{name}: fast path output differs from the default path")
+            return 1
+        slow = measure(lambda: default_path(default_build), args.repeat, args.min_time)["best_s"] * 1e6
+        fast = measure(lambda: fast_path(fast_build), args.repeat, args.min_time)["best_s"] * 1e6
+        entry = report["endpoints"][name] = {"bytes": len(body), "default_us": round(slow, 2), "fast_us": round(fast, 2)}
+        line = f"{name:28s} {len(body):9d} {slow:12.1f} {fast:10.1f} {slow / fast:7.1f}x"
+        if packer:
+            packed = msgpack_path(fast_build)
+            if serialization._unpack(packed) != json.loads(body):
+                print(f"{name}: msgpack output differs from the JSON document")
+                return 1
+            mp = measure(lambda: msgpack_path(fast_build), args.repeat, args.min_time)["best_s"] * 1e6
+            entry.update(msgpack_bytes=len(packed), msgpack_us=round(mp, 2))
+            line += f" {len(packed):14d} {mp:11.1f}"
+        print(line)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
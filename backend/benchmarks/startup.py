@@ -0,0 +1,152 @@
+"""Cold start: what importing the app costs, and how long a worker takes to become ready.
+
+Usage (from backend/):
+    python -m benchmarks.startup
+    python -m benchmarks.startup --top 30 --output bench-startup.json
+    python -m benchmarks.startup --warm   # workers start from the previous worker's cache snapshot
+    python -m benchmarks.startup --budget-ms 2500 --import-budget-ms 1500   # exit 1 when over budget
+
+Every measurement is a fresh interpreter. The import report runs
+`python -X importtime -c "import main"` and lists the modules with the largest
+self time, plus whether any library that is meant to load lazily (aiohttp,
+newsapi, youtubesearchpython, youtube_transcript_api) was imported anyway.
+The readiness runs import `main` and run its lifespan startup with upstreams
+pointed at `benchmarks.stubs`, so the warmup's team fetch stays local; they
+report the worker's own `startup_report` (import, each startup phase, warmup
+tasks) and the wall time from process spawn to ready. Figures are the best of
+--repeat runs. Runs start cold unless --warm, where every run after the first
+adopts the cache snapshot its predecessor saved on shutdown. With a budget,
+the run fails if the best time exceeds it.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.stubs import StubConfig, start_stubs, stub_env  # noqa: E402
+
+LAZY_MODULES = ("aiohttp", "newsapi", "youtubesearchpython", "youtube_transcript_api")
+
+# Imports the app, runs its startup, prints the startup report, then shuts down
+READY_SCRIPT = """
+import asyncio, json, sys
+import main
+
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        sys.stdout.write(json.dumps(main.startup_report.as_dict()) + "\\n")
+        sys.stdout.flush()
+
+asyncio.run(run())
+"""
+
+# (module, nesting depth, self microseconds, cumulative microseconds)
+ImportRow = Tuple[str, int, int, int]
+
+
+def import_profile(env: Dict[str, str]) -> List[ImportRow]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env={**os.environ, **env}, capture_output=True, text=True, timeout=120,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import main failed:\n{proc.stderr[-2000:]}")
+    rows: List[ImportRow] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def ready_run(env: Dict[str, str]) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", READY_SCRIPT],
+        cwd=BACKEND_DIR, env={**os.environ, **env}, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+    line = proc.stdout.readline() if proc.stdout else ""
+    spawn_to_ready = time.perf_counter() - t0
+    _, stderr = proc.communicate(timeout=60)
+    if not line:
+        raise RuntimeError(f"startup failed:\n{stderr[-2000:]}")
+    report = json.loads(line)
+    report["spawn_to_ready_ms"] = round(spawn_to_ready * 1000, 1)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--top", type=int, default=15, help="modules to list by self import time")
+    p.add_argument("--latency-ms", type=float, default=50.0, help="stub upstream latency seen by the warmup")
+    p.add_argument("--warm", action="store_true", help="keep the cache snapshot between runs")
+    p.add_argument("--budget-ms", type=float, help="fail if spawn-to-ready exceeds this")
+    p.add_argument("--import-budget-ms", type=float, help="fail if importing main exceeds this")
+    p.add_argument("--output", help="write the JSON report here")
+    args = p.parse_args(argv)
+
+    stubs = start_stubs({name: StubConfig(args.latency_ms, 0.0) for name in ("statsapi", "newsapi", "youtube", "mistral", "openai")})
+    try:
+        with tempfile.TemporaryDirectory() as data_dir:
+            env = {**stub_env(stubs), "DATA_DIR": data_dir, "NEWS_API_KEY": "bench", "YOUTUBE_API_KEY": "bench"}
+            if not args.warm:
+                env["CACHE_SNAPSHOT"] = ""
+            rows = import_profile(env)
+            runs = [ready_run(env) for _ in range(args.repeat + (1 if args.warm else 0))]
+            if args.warm:
+                runs = runs[1:]  # the first run only leaves the snapshot behind
+    finally:
+        for stub in stubs.values():
+            stub.stop()
+
+    imported = {name for name, _, _, _ in rows}
+    eager = [m for m in LAZY_MODULES if m in imported]
+    main_row = next((r for r in rows if r[0] == "main"), None)
+    print(f"import main: {main_row[3] / 1000:.0f} ms under -X importtime" if main_row else "import main: not found")
+    print(f"lazy libraries imported eagerly: {', '.join(eager) or 'none'}\n")
+    print(f"{'module':48s} {'self ms':>8s} {'cumulative ms':>14s}")
+    for name, depth, self_us, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[: args.top]:
+        print(f"{name:48s} {self_us / 1000:8.1f} {cumulative_us / 1000:14.1f}")
+
+    best = min(runs, key=lambda r: r["spawn_to_ready_ms"])
+    import_ms = min(r["phases_ms"].get("import", float("inf")) for r in runs)
+    print(f"\nready (best of {len(runs)}): {best['spawn_to_ready_ms']:.0f} ms from spawn, "
+          f"{best['ready_ms']:.0f} ms from the start of the import; import {import_ms:.0f} ms")
+    for name, ms in best["phases_ms"].items():
+        print(f"  {name:24s} {ms:8.1f} ms")
+    for name, error in best["errors"].items():
+        print(f"  {name}: {error}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "imports": [{"module": n, "depth": d, "self_us": s, "cumulative_us": c} for n, d, s, c in rows],
+                "eager_lazy_modules": eager,
+                "runs": runs,
+            }, f, indent=2)
+
+    failed = False
+    if args.budget_ms is not None and best["spawn_to_ready_ms"] > args.budget_ms:
+        print(f"\nFAIL: ready in {best['spawn_to_ready_ms']:.0f} ms, budget {args.budget_ms:.0f} ms")
+        failed = True
+    if args.import_budget_ms is not None and import_ms > args.import_budget_ms:
+        print(f"\nFAIL: import took {import_ms:.0f} ms, budget {args.import_budget_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,333 @@
+"""Local stand-ins for statsapi, NewsAPI, YouTube Data API, Mistral and OpenAI.
+
+Each stub is a threaded HTTP server with configurable latency, jitter and error
+injection, and counts the calls it receives so benchmarks can report upstream
+fan-out per endpoint.
+"""
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+TEAMS = [
+    (147, "New York Yankees", "Yankees", "NY Yankees", "New York", "nyy"),
+    (111, "Boston Red Sox", "Red Sox", "Boston", "Boston", "bos"),
+    (119, "Los Angeles Dodgers", "Dodgers", "LA Dodgers", "Los Angeles", "la"),
+    (137, "San Francisco Giants", "Giants", "San Francisco", "San Francisco", "sf"),
+    (112, "Chicago Cubs", "Cubs", "Chicago Cubs", "Chicago", "chc"),
+    (121, "New York Mets", "Mets", "NY Mets", "New York", "nym"),
+    (117, "Houston Astros", "Astros", "Houston", "Houston", "hou"),
+    (144, "Atlanta Braves", "Braves", "Atlanta", "Atlanta", "atl"),
+    (143, "Philadelphia Phillies", "Phillies", "Philadelphia", "Philadelphia", "phi"),
+    (135, "San Diego Padres", "Padres", "San Diego", "San Diego", "sd"),
+    (108, "Los Angeles Angels", "Angels", "LA Angels", "Anaheim", "ana"),
+    (136, "Seattle Mariners", "Mariners", "Seattle", "Seattle", "sea"),
+    (140, "Texas Rangers", "Rangers", "Texas", "Arlington", "tex"),
+    (133, "Athletics", "Athletics", "Athletics", "Sacramento", "ath"),
+    (141, "Toronto Blue Jays", "Blue Jays", "Toronto", "Toronto", "tor"),
+    (110, "Baltimore Orioles", "Orioles", "Baltimore", "Baltimore", "bal"),
+    (139, "Tampa Bay Rays", "Rays", "Tampa Bay", "St. Petersburg", "tb"),
+    (145, "Chicago White Sox", "White Sox", "Chi White Sox", "Chicago", "cws"),
+    (114, "Cleveland Guardians", "Guardians", "Cleveland", "Cleveland", "cle"),
+    (116, "Detroit Tigers", "Tigers", "Detroit", "Detroit", "det"),
+    (142, "Minnesota Twins", "Twins", "Minnesota", "Minneapolis", "min"),
+    (118, "Kansas City Royals", "Royals", "Kansas City", "Kansas City", "kc"),
+    (138, "St. Louis Cardinals", "Cardinals", "St. Louis", "St. Louis", "stl"),
+    (158, "Milwaukee Brewers", "Brewers", "Milwaukee", "Milwaukee", "mil"),
+    (113, "Cincinnati Reds", "Reds", "Cincinnati", "Cincinnati", "cin"),
+    (134, "Pittsburgh Pirates", "Pirates", "Pittsburgh", "Pittsburgh", "pit"),
+    (120, "Washington Nationals", "Nationals", "Washington", "Washington", "wsh"),
+    (146, "Miami Marlins", "Marlins", "Miami", "Miami", "mia"),
+    (109, "Arizona Diamondbacks", "D-backs", "Arizona", "Phoenix", "ari"),
+    (115, "Colorado Rockies", "Rockies", "Colorado", "Denver", "col"),
+]
+
+
+def teams_payload() -> Dict[str, Any]:
+    return {
+        "teams": [
+            {
+                "id": tid,
+                "name": name,
+                "teamName": club,
+                "shortName": short,
+                "clubName": club,
+                "locationName": loc,
+                "fileCode": code,
+                "teamCode": code,
+                "venue": {"id": tid * 10, "name": f"{club} Park"},
+            }
+            for tid, name, club, short, loc, code in TEAMS
+        ]
+    }
+
+
+def schedule_payload(team_id: Optional[int], start: date, end: date) -> Dict[str, Any]:
+    """One game per day for `team_id` (or for every team when None) between start and end."""
+    by_id = {t[0]: t for t in TEAMS}
+    team_ids = [team_id] if team_id in by_id else [t[0] for t in TEAMS]
+    dates = []
+    day = start
+    while day <= end:
+        games = []
+        for i, tid in enumerate(team_ids):
+            opp = TEAMS[(day.toordinal() + i + 1) % len(TEAMS)]
+            if opp[0] == tid:
+                opp = TEAMS[(day.toordinal() + i + 2) % len(TEAMS)]
+            home, away = (by_id[tid], opp) if day.toordinal() % 2 else (opp, by_id[tid])
+            final = day < date.today()
+            # Stable per (day, team) so overlapping windows agree on ids
+            pk = 700000 + day.toordinal() % 10000 * 1000 + tid
+            games.append({
+                "gamePk": pk,
+                "gameDate": datetime(day.year, day.month, day.day, 23, 5, tzinfo=timezone.utc).isoformat().replace("+00:00", "Z"),
+                "officialDate": day.isoformat(),
+                "status": {
+                    "abstractGameState": "Final" if final else "Preview",
+                    "detailedState": "Final" if final else "Scheduled",
+                    "statusCode": "F" if final else "S",
+                },
+                "teams": {
+                    "home": {"team": {"id": home[0], "name": home[1], "link": f"/api/v1/teams/{home[0]}"},
+                             "score": 5 if final else None, "isWinner": final, "leagueRecord": {"wins": 80, "losses": 70}},
+                    "away": {"team": {"id": away[0], "name": away[1], "link": f"/api/v1/teams/{away[0]}"},
+                             "score": 3 if final else None, "isWinner": False, "leagueRecord": {"wins": 75, "losses": 75}},
+                },
+                "venue": {"id": home[0] * 10, "name": f"{home[2]} Park", "link": f"/api/v1/venues/{home[0] * 10}"},
+                "content": {"link": f"/api/v1/game/{pk}/content"},
+                "gameNumber": 1,
+                "dayNight": "night",
+                "seriesDescription": "Regular Season",
+            })
+        dates.append({"date": day.isoformat(), "totalGames": len(games), "games": games})
+        day += timedelta(days=1)
+    return {"totalGames": sum(d["totalGames"] for d in dates), "dates": dates}
+
+
+def team_stats_payload(season: int) -> Dict[str, Any]:
+    def split(tid: int, group: str) -> Dict[str, Any]:
+        rng = random.Random(tid * 31 + season)
+        if group == "hitting":
+            stat = {
+                "gamesPlayed": 150, "runs": rng.randint(550, 850), "homeRuns": rng.randint(120, 260),
+                "avg": f".{rng.randint(230, 275)}", "obp": f".{rng.randint(295, 345)}", "slg": f".{rng.randint(370, 460)}",
+                "hits": rng.randint(1200, 1450), "doubles": rng.randint(230, 320), "triples": rng.randint(10, 35),
+                "strikeOuts": rng.randint(1200, 1600), "baseOnBalls": rng.randint(400, 650),
+            }
+        else:
+            stat = {
+                "gamesPlayed": 150, "era": f"{rng.uniform(3.2, 5.1):.2f}", "whip": f"{rng.uniform(1.1, 1.45):.2f}",
+                "strikeOuts": rng.randint(1200, 1600), "saves": rng.randint(25, 55), "inningsPitched": "1350.1",
+            }
+        return {"season": str(season), "stat": stat, "team": {"id": tid, "name": next(t[1] for t in TEAMS if t[0] == tid)}}
+
+    return {
+        "stats": [
+            {"type": {"displayName": "season"}, "group": {"displayName": group},
+             "splits": [split(t[0], group) for t in TEAMS]}
+            for group in ("hitting", "pitching")
+        ]
+    }
+
+
+def news_payload(q: str, page_size: int) -> Dict[str, Any]:
+    now = datetime.now(timezone.utc)
+    return {
+        "status": "ok",
+        "totalResults": page_size,
+        "articles": [
+            {
+                "source": {"id": None, "name": f"Source {i % 7}"},
+                "author": "Staff",
+                "title": f"{q} story {i}",
+                "description": f"Coverage of {q}: injuries, trades and the latest results ({i}).",
+                "url": f"https://news.example.com/{i}",
+                "urlToImage": f"https://img.example.com/{i}.jpg",
+                "publishedAt": (now - timedelta(hours=i)).isoformat().replace("+00:00", "Z"),
+                "content": "Lorem ipsum " * 20,
+            }
+            for i in range(page_size)
+        ],
+    }
+
+
+def youtube_search_payload(q: str, max_results: int) -> Dict[str, Any]:
+    return {"items": [{"id": {"kind": "youtube#video", "videoId": f"vid{i:08d}"},
+                       "snippet": {"title": f"{q} #{i}", "channelTitle": "MLB"}} for i in range(max_results)]}
+
+
+def youtube_videos_payload(ids: str) -> Dict[str, Any]:
+    return {"items": [{"id": vid, "snippet": {"title": f"Video {vid}", "channelTitle": "MLB"},
+                       "statistics": {"viewCount": str(1000 + i * 137)}} for i, vid in enumerate(ids.split(",")) if vid]}
+
+
+def chat_payload(body: Dict[str, Any]) -> Dict[str, Any]:
+    messages = body.get("messages") or []
+    prompt = (messages[-1].get("content") if messages else "") or ""
+    if "JSON array" in prompt:
+        content = json.dumps([
+            {"title": f"Stub item {i}", "description": "Generated by stub", "source": "stub",
+             "published_at": "2024-01-01T00:00:00", "video_id": f"stub{i}", "url": f"https://example.com/{i}",
+             "channel": "stub", "view_count": 1000 + i}
+            for i in range(5)
+        ])
+    else:
+        content = json.dumps({
+            "agent_name": "Stub Agent", "description": "Stub description",
+            "specializations": ["analysis"], "custom_prompts": {"greeting": "hi"},
+            "capabilities": ["analysis"], "data_sources": ["stub"],
+            "overall_sentiment": "positive", "confidence_score": 0.8,
+            "summary": "Stub summary",
+        })
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 100, "completion_tokens": 200, "total_tokens": 300},
+    }
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 50.0
+    jitter_ms: float = 10.0
+    error_rate: float = 0.0
+
+
+@dataclass
+class StubServer:
+    name: str
+    route: Callable[[str, str, Dict[str, str], Dict[str, Any]], Tuple[int, Any]]
+    config: StubConfig = field(default_factory=StubConfig)
+    calls: int = 0
+    errors: int = 0
+    _server: Optional[ThreadingHTTPServer] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def url(self) -> str:
+        assert self._server is not None
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.errors = 0
+
+    def start(self) -> "StubServer":
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args: Any) -> None:
+                return
+
+            def _handle(self) -> None:
+                parts = urlsplit(self.path)
+                query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                body: Dict[str, Any] = {}
+                if length:
+                    try:
+                        body = json.loads(self.rfile.read(length))
+                    except ValueError:
+                        body = {}
+                cfg = stub.config
+                delay = max(0.0, cfg.latency_ms + random.uniform(-cfg.jitter_ms, cfg.jitter_ms)) / 1000.0
+                if delay:
+                    time.sleep(delay)
+                failed = cfg.error_rate > 0 and random.random() < cfg.error_rate
+                with stub._lock:
+                    stub.calls += 1
+                    stub.errors += int(failed)
+                if failed:
+                    status, payload = 503, {"error": "injected failure"}
+                else:
+                    status, payload = stub.route(self.command, parts.path, query, body)
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = _handle
+            do_POST = _handle
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name=f"stub-{self.name}", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def _statsapi_route(method: str, path: str, q: Dict[str, str], body: Dict[str, Any]) -> Tuple[int, Any]:
+    if path.endswith("/teams/stats") or (path.endswith("/stats") and "/teams/" in path):
+        return 200, team_stats_payload(int(q.get("season") or date.today().year))
+    if path.endswith("/teams"):
+        return 200, teams_payload()
+    if path.endswith("/schedule"):
+        start = date.fromisoformat(q.get("startDate") or date.today().isoformat())
+        end = date.fromisoformat(q.get("endDate") or start.isoformat())
+        team_id = int(q["teamId"]) if q.get("teamId") else None
+        return 200, schedule_payload(team_id, start, end)
+    return 404, {"message": "not found"}
+
+
+def _news_route(method: str, path: str, q: Dict[str, str], body: Dict[str, Any]) -> Tuple[int, Any]:
+    if path.endswith("/everything") or path.endswith("/top-headlines"):
+        return 200, news_payload(q.get("q", "news"), int(q.get("pageSize") or 10))
+    return 404, {"status": "error"}
+
+
+def _youtube_route(method: str, path: str, q: Dict[str, str], body: Dict[str, Any]) -> Tuple[int, Any]:
+    if path.endswith("/search"):
+        return 200, youtube_search_payload(q.get("q", ""), int(q.get("maxResults") or 25))
+    if path.endswith("/videos"):
+        return 200, youtube_videos_payload(q.get("id", ""))
+    return 404, {"error": "not found"}
+
+
+def _chat_route(method: str, path: str, q: Dict[str, str], body: Dict[str, Any]) -> Tuple[int, Any]:
+    if path.endswith("/chat/completions"):
+        return 200, chat_payload(body)
+    return 404, {"error": "not found"}
+
+
+def start_stubs(config: Optional[Dict[str, StubConfig]] = None) -> Dict[str, StubServer]:
+    """Start all stubs; `config` maps stub name to its latency/error settings."""
+    config = config or {}
+    routes = {
+        "statsapi": _statsapi_route,
+        "newsapi": _news_route,
+        "youtube": _youtube_route,
+        "mistral": _chat_route,
+        "openai": _chat_route,
+    }
+    return {name: StubServer(name, route, config.get(name, StubConfig())).start() for name, route in routes.items()}
+
+
+def stub_env(stubs: Dict[str, StubServer]) -> Dict[str, str]:
+    """Environment pointing the backend's upstream URLs at running stubs."""
+    return {
+        "STATS_API": f"{stubs['statsapi'].url}/api/v1",
+        "NEWS_API_URL": f"{stubs['newsapi'].url}/v2",
+        "YOUTUBE_SEARCH_URL": f"{stubs['youtube'].url}/youtube/v3/search",
+        "YOUTUBE_VIDEOS_URL": f"{stubs['youtube'].url}/youtube/v3/videos",
+        "MISTRAL_BASE_URL": f"{stubs['mistral'].url}/v1",
+        "OPENAI_BASE_URL": f"{stubs['openai'].url}/v1",
+    }
@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from tracing import record
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that carry credentials; dropped from keys and stored URLs
+SECRET_PARAMS = {"key", "apikey", "api_key", "apiKey", "token", "access_token"}
+# Date-window parameters derived from "now"; ignored when no exact match exists
+VOLATILE_PARAMS = {"publishedAfter", "from", "to", "startDate", "endDate"}
+
+_TEXT_TYPES = ("application/json", "text/", "application/xml")
+
+
+def _canonical_url(url: str, params: Any = None, drop: frozenset = frozenset()) -> str:
+    """URL with merged, sorted query and credentials (plus `drop`) removed."""
+    parts = urlsplit(str(url))
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        items = params.items() if hasattr(params, "items") else params
+        for k, v in items:
+            if isinstance(v, (list, tuple)):
+                query.extend((str(k), str(x)) for x in v)
+            else:
+                query.append((str(k), str(v)))
+    query = sorted((k, v) for k, v in query if k not in SECRET_PARAMS and k not in drop)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+def _body_digest(body: Any) -> str:
+    if body is None or body == b"" or body == "":
+        return ""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    elif not isinstance(body, (bytes, bytearray)):
+        body = json.dumps(body, sort_keys=True, default=str).encode("utf-8")
+    else:
+        # JSON bodies are normalised so key order does not change the key
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True).encode("utf-8")
+        except ValueError:
+            pass
+    return hashlib.sha1(bytes(body)).hexdigest()[:16]
+
+
+def request_keys(method: str, url: str, params: Any = None, body: Any = None) -> Tuple[str, str]:
+    """(exact key, loose key without date-window params) for a request."""
+    digest = _body_digest(body)
+    suffix = f" #{digest}" if digest else ""
+    exact = f"{method.upper()} {_canonical_url(url, params)}{suffix}"
+    loose = f"{method.upper()} {_canonical_url(url, params, frozenset(VOLATILE_PARAMS))}{suffix}"
+    return exact, loose
+
+
+class Cassette:
+    """Append-only store of upstream request/response pairs (gzip'd JSON lines).
+
+    In replay mode responses for the same key are served in recorded order and
+    then cycle, so repeated benchmark runs stay deterministic.
+    """
+
+    def __init__(self, path: str, mode: str, latency: float = 0.0) -> None:
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._loose: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._fh: Optional[gzip.GzipFile] = None
+        if mode == "replay":
+            self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            logger.warning("Cassette %s not found; every upstream call will fail", self.path)
+            return
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["k"], []).append(entry)
+                    self._loose.setdefault(entry.get("lk") or entry["k"], []).append(entry)
+        logger.info("Loaded %d cassette keys from %s", len(self._entries), self.path)
+
+    def lookup(self, key: str, loose_key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                key = f"~{loose_key}"
+                entries = self._loose.get(loose_key)
+            if not entries:
+                return None
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = i + 1
+            return entries[i % len(entries)]
+
+    def append(self, key: str, loose_key: str, method: str, url: str, status: int, headers: Dict[str, str], body: bytes, elapsed_ms: float) -> None:
+        content_type = headers.get("content-type") or headers.get("Content-Type") or ""
+        entry: Dict[str, Any] = {
+            "k": key,
+            "lk": loose_key,
+            "m": method.upper(),
+            "u": _canonical_url(url),
+            "s": status,
+            "ct": content_type,
+            "t": round(elapsed_ms, 1),
+        }
+        if content_type.startswith(_TEXT_TYPES):
+            entry["b"] = body.decode("utf-8", errors="replace")
+        else:
+            entry["b64"] = base64.b64encode(body).decode("ascii")
+        line = (json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            if self._fh is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                # Each run appends a new gzip member; gzip.open reads them back as one stream
+                self._fh = gzip.open(self.path, "ab")
+                atexit.register(self.close)
+            self._fh.write(line)
+            self._fh.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    @staticmethod
+    def body_of(entry: Dict[str, Any]) -> bytes:
+        if "b64" in entry:
+            return base64.b64decode(entry["b64"])
+        return (entry.get("b") or "").encode("utf-8")
+
+    def delay(self, entry: Dict[str, Any]) -> float:
+        return (entry.get("t") or 0.0) / 1000.0 * self.latency
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+_cassette: Optional[Cassette] = None
+
+
+def _install_requests(cassette: Cassette) -> None:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from requests.structures import CaseInsensitiveDict
+
+    original_send = HTTPAdapter.send
+
+    def send(self: Any, request: Any, *args: Any, **kwargs: Any) -> Any:
+        key, loose_key = request_keys(request.method, request.url, body=request.body)
+        if cassette.mode == "replay":
+            entry = cassette.lookup(key, loose_key)
+            if entry is None:
+                raise requests.ConnectionError(CassetteMiss(f"no cassette entry for {key}"), request=request)
+            if cassette.latency:
+                time.sleep(cassette.delay(entry))
+            resp = requests.Response()
+            resp.status_code = entry["s"]
+            resp._content = Cassette.body_of(entry)
+            resp.headers = CaseInsensitiveDict({"Content-Type": entry.get("ct") or "application/json"})
+            resp.url = request.url
+            resp.request = request
+            resp.reason = "Replayed"
+            resp.encoding = "utf-8"
+            resp.elapsed = timedelta(milliseconds=entry.get("t") or 0.0)
+            return resp
+        start = time.perf_counter()
+        resp = original_send(self, request, *args, **kwargs)
+        # `resp.elapsed` is only filled in by Session.send after the adapter returns
+        cassette.append(key, loose_key, request.method, request.url, resp.status_code, dict(resp.headers), resp.content,
+                        (time.perf_counter() - start) * 1000.0)
+        return resp
+
+    HTTPAdapter.send = send  # type: ignore[method-assign]
+
+
+class _ReplayedResponse:
+    """Minimal stand-in for `aiohttp.ClientResponse` built from a cassette entry."""
+
+    def __init__(self, entry: Dict[str, Any], method: str, url: str) -> None:
+        self.status = entry["s"]
+        self.method = method
+        self.url = url
+        self.reason = "Replayed"
+        self.content_type = (entry.get("ct") or "application/json").split(";")[0]
+        self.headers = {"Content-Type": entry.get("ct") or "application/json"}
+        self._body = Cassette.body_of(entry)
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self, encoding: Optional[str] = None, errors: str = "strict") -> str:
+        return self._body.decode(encoding or "utf-8", errors)
+
+    async def json(self, *args: Any, loads: Any = json.loads, **kwargs: Any) -> Any:
+        return loads(self._body.decode("utf-8"))
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            import aiohttp
+
+            raise aiohttp.ClientResponseError(None, (), status=self.status, message=self.reason)  # type: ignore[arg-type]
+
+    def release(self) -> None:
+        return None
+
+    async def wait_for_close(self) -> None:
+        return None
+
+    async def __aenter__(self) -> "_ReplayedResponse":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        return None
+
+
+def _install_aiohttp(cassette: Cassette) -> None:
+    try:
+        import aiohttp
+    except ImportError:  # pragma: no cover
+        return
+
+    original_request = aiohttp.ClientSession._request
+
+    async def _request(self: Any, method: str, str_or_url: Any, *args: Any, **kwargs: Any) -> Any:
+        body = kwargs.get("json")
+        if body is None:
+            body = kwargs.get("data")
+        key, loose_key = request_keys(method, str(str_or_url), kwargs.get("params"), body)
+        if cassette.mode == "replay":
+            entry = cassette.lookup(key, loose_key)
+            if entry is None:
+                raise aiohttp.ClientConnectionError(f"no cassette entry for {key}")
+            if cassette.latency:
+                await asyncio.sleep(cassette.delay(entry))
+            record(urlsplit(str(str_or_url)).hostname or "upstream", entry.get("t") or 0.0, cache="replay")
+            return _ReplayedResponse(entry, method, str(str_or_url))
+        start = time.perf_counter()
+        resp = await original_request(self, method, str_or_url, *args, **kwargs)
+        data = await resp.read()
+        cassette.append(key, loose_key, method, str(resp.url), resp.status, dict(resp.headers), data,
+                        (time.perf_counter() - start) * 1000.0)
+        return resp
+
+    aiohttp.ClientSession._request = _request  # type: ignore[method-assign]
+
+
+def install(path: str, mode: str, latency: float = 0.0) -> Cassette:
+    """Patch the requests and aiohttp transports to record to / replay from `path`."""
+    global _cassette
+    if _cassette is not None:
+        return _cassette
+    if mode not in ("record", "replay"):
+        raise ValueError(f"unknown cassette mode: {mode!r}")
+    _cassette = Cassette(path, mode, latency)
+    _install_requests(_cassette)
+    _install_aiohttp(_cassette)
+    logger.info("Upstream cassette %s in %s mode", path, mode)
+    return _cassette
+
+
+def install_from_env() -> Optional[Cassette]:
+    """Install when CASSETTE_MODE is record/replay; CASSETTE_PATH and CASSETTE_LATENCY tune it.
+
+    CASSETTE_LATENCY scales the recorded latency in replay (0 = instant, 1 = original).
+    """
+    mode = (os.getenv("CASSETTE_MODE") or "").strip().lower()
+    if not mode or mode == "off":
+        return None
+    path = os.getenv("CASSETTE_PATH") or os.path.join("cassettes", "upstream.jsonl.gz")
+    latency = float(os.getenv("CASSETTE_LATENCY") or 0.0)
+    return install(path, mode, latency)
@@ -16,6 +16,31 @@ class Settings:
     YOUTUBE_API_KEY: str | None = os.getenv("YOUTUBE_API_KEY")
     ELEVEN_AGENT_ID: str | None = os.getenv("ELEVEN_AGENT_ID")
     TOOL_TOKEN: str | None = os.getenv("TOOL_TOKEN")
+    # Send Server-Timing on every response (single requests can opt in with X-Debug-Trace)
+    TRACE_REQUESTS: bool = os.getenv("TRACE_REQUESTS", "").lower() in ("1", "true", "yes")
+    # Local state (SQLite databases, logs) lives here unless a path is given explicitly
+    DATA_DIR: str = os.getenv("DATA_DIR", "data")
+    LEADERBOARD_DB: str = os.getenv("LEADERBOARD_DB") or os.path.join(os.getenv("DATA_DIR", "data"), "leaderboard.db")
+    LEADERBOARD_FLUSH_SECONDS: float = float(os.getenv("LEADERBOARD_FLUSH_SECONDS", "1.0"))
+    # How often buffered score changes are folded into the ranking (its maximum staleness)
+    LEADERBOARD_FOLD_SECONDS: float = float(os.getenv("LEADERBOARD_FOLD_SECONDS", "0.2"))
+    # SQLite (.db), JSON or JSON-lines question bank; the built-in sample questions are used if missing
+    TRIVIA_BANK: str = os.getenv("TRIVIA_BANK") or os.path.join(os.getenv("DATA_DIR", "data"), "trivia.db")
+    PREDICTIONS_LOG: str = os.getenv("PREDICTIONS_LOG") or os.path.join(os.getenv("DATA_DIR", "data"), "predictions.log")
+    SETTLEMENT_INTERVAL_SECONDS: float = float(os.getenv("SETTLEMENT_INTERVAL_SECONDS", "60"))
+    PROFILES_DB: str = os.getenv("PROFILES_DB") or os.path.join(os.getenv("DATA_DIR", "data"), "profiles.db")
+    # Upper bound on how stale a cached profile can be when several workers share PROFILES_DB
+    PROFILE_CACHE_TTL_SECONDS: float = float(os.getenv("PROFILE_CACHE_TTL_SECONDS", "30"))
+    # How long a mock agent config served because Mistral failed is reused before Mistral is retried
+    AGENT_FALLBACK_TTL_SECONDS: float = float(os.getenv("AGENT_FALLBACK_TTL_SECONDS", "60"))
+    # How long a paginated result set (schedule, news, videos) stays walkable by cursor
+    PAGE_CACHE_TTL_SECONDS: float = float(os.getenv("PAGE_CACHE_TTL_SECONDS", "300"))
+    PAGE_CACHE_SIZE: int = int(os.getenv("PAGE_CACHE_SIZE", "256"))
+    # Fetch the team index and import the HTTP clients at startup; readiness waits at most this long for it
+    STARTUP_WARMUP: bool = os.getenv("STARTUP_WARMUP", "1").lower() not in ("0", "false", "no")
+    WARMUP_TIMEOUT_SECONDS: float = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "5"))
+    # Caches are saved here on shutdown and adopted by the next worker; empty disables snapshots
+    CACHE_SNAPSHOT: str = os.getenv("CACHE_SNAPSHOT", os.path.join(os.getenv("DATA_DIR", "data"), "cache.snapshot"))
 
     # Provide both UPPER and lower-case convenience attributes
     @property
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+# {"next_game": {}, "data": {"summary": {}}}: an empty node selects the whole subtree
+FieldTree = Dict[str, "FieldTree"]
+
+# Top-level keys every pruned response keeps, so callers can still tell a failure from an empty result
+ALWAYS_KEPT = ("status", "error")
+
+# Selection for the request being handled (set by serialization.WireFormatRoute); None = everything
+_selection: ContextVar[Optional[FieldTree]] = ContextVar("field_selection", default=None)
+
+
+def parse_fields(spec: Union[str, Iterable[str], None]) -> Optional[FieldTree]:
+    """Tree for a selector like "next_game,team_name" or ["data.schedule.next_game", "summary"].
+
+    Dotted paths select nested fields; None or an empty selector selects everything.
+    """
+    if spec is None:
+        return None
+    paths = spec.split(",") if isinstance(spec, str) else [str(p) for p in spec]
+    tree: FieldTree = {}
+    for path in paths:
+        parts = [p.strip() for p in path.split(".")]
+        if not all(parts):
+            continue
+        node = tree
+        for i, part in enumerate(parts):
+            child = node.get(part)
+            if child is None:
+                child = node[part] = {}
+            elif not child:
+                break  # an ancestor already selects the whole subtree
+            node = child
+            if i == len(parts) - 1:
+                node.clear()  # the whole subtree wins over narrower selections
+    return tree or None
+
+
+def selected() -> Optional[FieldTree]:
+    return _selection.get()
+
+
+def use(tree: Optional[FieldTree]) -> Any:
+    """Make `tree` the current selection; returns the token for `reset`."""
+    return _selection.set(tree)
+
+
+def reset(token: Any) -> None:
+    _selection.reset(token)
+
+
+def wants(*paths: str) -> bool:
+    """True if any of the dotted `paths` will appear in the response.
+
+    A path is wanted when it, an ancestor or a descendant of it is selected, so
+    handlers can skip fetching data nobody asked for.
+    """
+    tree = _selection.get()
+    if tree is None:
+        return True
+    for path in paths:
+        node = tree
+        for part in path.split("."):
+            if not node:
+                return True
+            node = node.get(part)
+            if node is None:
+                break
+        else:
+            return True
+    return False
+
+
+def node(tree: FieldTree, path: str) -> Optional[FieldTree]:
+    """Selection below the dotted `path`: {} if all of it is selected, None if none of it."""
+    for part in path.split("."):
+        if not tree:
+            return {}
+        tree = tree.get(part)
+        if tree is None:
+            return None
+    return tree
+
+
+def prune(obj: Any, tree: FieldTree, convert: Callable[[Any], Any]) -> Any:
+    """`obj` reduced to the fields in `tree`.
+
+    Lists are pruned element-wise; records that are not dicts are turned into
+    one with `convert` (the serializer's encoder hook) only when a nested
+    selection has to look inside them.
+    """
+    if not tree or obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    if isinstance(obj, (list, tuple)):
+        return [prune(item, tree, convert) for item in obj]
+    if not isinstance(obj, dict):
+        converted = convert(obj)
+        if converted is obj or not isinstance(converted, (dict, list, tuple)):
+            return converted
+        return prune(converted, tree, convert)
+    return {k: prune(v, tree[k], convert) for k, v in obj.items() if k in tree}
+
+
+def prune_response(content: Any, tree: FieldTree, convert: Callable[[Any], Any]) -> Any:
+    """Top-level pruning: like `prune`, but ALWAYS_KEPT keys survive."""
+    if not isinstance(content, dict):
+        return prune(content, tree, convert)
+    return {
+        k: prune(v, tree[k], convert) if k in tree else v
+        for k, v in content.items()
+        if k in tree or k in ALWAYS_KEPT
+    }
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cache import LRUCache
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+logger = logging.getLogger(__name__)
+
+Headers = List[Tuple[bytes, bytes]]
+
+# Representations worth compressing; everything else (images, already-compressed data) passes through
+COMPRESSIBLE_TYPES = (b"application/json", b"application/msgpack", b"text/", b"application/javascript", b"application/xml")
+# Responses sent chunk by chunk as produced, never buffered
+STREAMING_TYPES = (b"text/event-stream", b"application/x-ndjson")
+# Headers a 304 carries over from the 200 it stands in for
+NOT_MODIFIED_HEADERS = {b"etag", b"vary", b"cache-control", b"content-location", b"expires", b"date"}
+
+
+def strong_etag(body: bytes) -> str:
+    """Strong ETag for a serialized body: equal bytes, equal tag."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def version_etag(*parts: Any) -> str:
+    """Strong ETag from a cache version (e.g. a profile's user_id and version), without serializing."""
+    key = "\x1f".join(str(p) for p in parts).encode("utf-8")
+    return '"v-' + hashlib.blake2b(key, digest_size=12).hexdigest() + '"'
+
+
+def _opaque(tag: str) -> str:
+    # Weak comparison (RFC 9110 13.1.2) ignores W/; coded variants share the identity tag's validator
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for suffix in ('-gzip"', '-br"'):
+        if tag.endswith(suffix):
+            return tag[: -len(suffix)] + '"'
+    return tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header value selects `etag`."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = _opaque(etag)
+    return any(_opaque(t.strip()) == wanted for t in if_none_match.split(","))
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """"br" or "gzip" from an Accept-Encoding header (q-values honoured, br only when installed)."""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip()] = q
+    star = weights.get("*", 0.0)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best = max(candidates, key=lambda c: weights.get(c, star))
+    return best if weights.get(best, star) > 0 else None
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    # mtime=0 keeps the output deterministic, so equal bodies compress to equal bytes
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+def _header(headers: Headers, name: bytes) -> Optional[bytes]:
+    return next((v for k, v in headers if k == name), None)
+
+
+def _vary(headers: Headers) -> Headers:
+    """`headers` with Accept-Encoding added to Vary (merged into an existing Vary, e.g. CORS's Origin)."""
+    existing = _header(headers, b"vary")
+    if existing is None:
+        return headers + [(b"vary", b"Accept-Encoding")]
+    if b"accept-encoding" in existing.lower() or existing.strip() == b"*":
+        return headers
+    merged = existing + b", Accept-Encoding"
+    return [(k, merged if k == b"vary" else v) for k, v in headers]
+
+
+class HTTPCacheMiddleware:
+    """Strong ETags, If-None-Match revalidation and gzip/brotli compression for buffered responses.
+
+    For requests under `prefix`, a complete (non-streaming) response is held
+    until its last body chunk. If `revalidate(method, path)` says the call is
+    idempotent, a 200 gets a strong ETag (the handler's own ETag header, e.g.
+    one built from a cache version, or a hash of the body) and a matching
+    If-None-Match turns it into a 304 with no body. Bodies of at least
+    `minimum_size` bytes are then compressed with the best coding the client
+    accepts; compressed bodies are cached by ETag so re-fetches of an
+    unchanged response skip the compressor too.
+    """
+
+    def __init__(
+        self,
+        app: Any,
+        revalidate: Callable[[str, str], bool],
+        prefix: str = "/tools/",
+        minimum_size: int = 500,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        cache_size: int = 256,
+    ) -> None:
+        self.app = app
+        self.revalidate = revalidate
+        self.prefix = prefix
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.compressed: LRUCache[bytes] = LRUCache(maxsize=cache_size)
+        self.not_modified = 0
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not scope.get("path", "").startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+        accept_encoding: Optional[str] = None
+        if_none_match: Optional[str] = None
+        for key, value in scope.get("headers") or ():
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+            elif key == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+        encoding = negotiate(accept_encoding)
+        cacheable = self.revalidate(scope["method"], scope["path"])
+        if encoding is None and not cacheable:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Dict[str, Any] = {}
+        chunks: List[bytes] = []
+        streaming = False
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal start_message, streaming
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or streaming:
+                await send(message)
+                return
+            if message.get("more_body") and not chunks:
+                content_type = _header(start_message.get("headers") or [], b"content-type") or b""
+                if content_type.startswith(STREAMING_TYPES):
+                    # Streams are sent as they are produced
+                    streaming = True
+                    await send(start_message)
+                    await send(message)
+                    return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body"):
+                return
+            await self._finish(start_message, b"".join(chunks), encoding, cacheable, if_none_match, send)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _finish(
+        self,
+        start_message: Dict[str, Any],
+        body: bytes,
+        encoding: Optional[str],
+        cacheable: bool,
+        if_none_match: Optional[str],
+        send: Any,
+    ) -> None:
+        headers: Headers = list(start_message.get("headers") or [])
+        status = start_message["status"]
+        content_type = _header(headers, b"content-type") or b""
+        if not (
+            encoding is not None
+            and status not in (204, 304)
+            and len(body) >= self.minimum_size
+            and _header(headers, b"content-encoding") is None
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+        ):
+            encoding = None
+
+        etag: Optional[str] = None
+        if status == 200 and cacheable:
+            existing = _header(headers, b"etag")
+            etag = existing.decode("latin-1") if existing else strong_etag(body)
+            # Each coding is its own representation, so its strong tag differs
+            tag = etag if encoding is None else etag[:-1] + "-" + encoding + '"'
+            headers = [(k, v) for k, v in headers if k != b"etag"] + [(b"etag", tag.encode("latin-1"))]
+            if etag_matches(if_none_match, etag):
+                self.not_modified += 1
+                kept = _vary([(k, v) for k, v in headers if k in NOT_MODIFIED_HEADERS])
+                await send({**start_message, "status": 304, "headers": kept})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+        if encoding is not None:
+            body = self._compress(body, encoding, etag)
+            headers = [(k, v) for k, v in headers if k != b"content-length"]
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+            headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        if status != 204:
+            headers = _vary(headers)
+        await send({**start_message, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    def _compress(self, body: bytes, encoding: str, etag: Optional[str]) -> bytes:
+        if etag is None:
+            return compress(body, encoding, self.gzip_level, self.brotli_quality)
+        key = (etag, encoding)
+        cached = self.compressed.get(key)
+        if cached is None:
+            cached = compress(body, encoding, self.gzip_level, self.brotli_quality)
+            self.compressed.put(key, cached)
+        return cached
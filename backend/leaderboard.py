@@ -0,0 +1,495 @@
+from __future__ import annotations
+
+import base64
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from write_behind import WriteBehind, connect
+
+logger = logging.getLogger(__name__)
+
+MAX_LEVEL = 24  # comfortably covers ~16M users at p=0.5
+
+Key = Tuple[float, str]  # (-total_points, user_id): best first, ties by user id
+_TAIL_KEY: Key = (float("inf"), "")
+
+
+@dataclass
+class Standing:
+    user_id: str
+    username: str
+    trivia_points: int = 0
+    prediction_points: int = 0
+    games_played: int = 0
+    answered: int = 0
+    accuracy: float = 0.0
+
+    @property
+    def total_points(self) -> int:
+        return self.trivia_points + self.prediction_points
+
+    @property
+    def key(self) -> Key:
+        return (-self.total_points, self.user_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "trivia_points": self.trivia_points,
+            "prediction_points": self.prediction_points,
+            "total_points": self.total_points,
+        }
+
+    def to_dict(self, rank: int) -> Dict[str, Any]:
+        return {
+            "rank": rank,
+            "user_id": self.user_id,
+            "username": self.username,
+            "total_points": self.total_points,
+            "trivia_points": self.trivia_points,
+            "prediction_points": self.prediction_points,
+            "games_played": self.games_played,
+            "accuracy": round(self.accuracy, 4),
+        }
+
+
+@dataclass
+class ScoreDelta:
+    """Score changes for one user not yet applied to the ranking."""
+
+    trivia: int = 0
+    prediction: int = 0
+    played: int = 0
+    answered: int = 0
+    correct: int = 0
+    username: Optional[str] = None
+
+    def add(
+        self,
+        trivia: int = 0,
+        prediction: int = 0,
+        correct: Optional[bool] = None,
+        username: Optional[str] = None,
+        played: bool = True,
+    ) -> None:
+        self.trivia += trivia
+        self.prediction += prediction
+        if played:
+            self.played += 1
+        if correct is not None:
+            self.answered += 1
+            self.correct += 1 if correct else 0
+        if self.username is None:
+            self.username = username
+
+
+def encode_cursor(standing: Standing) -> str:
+    """Opaque cursor pointing just after `standing` in rank order."""
+    raw = f"{standing.total_points}:{standing.user_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Key:
+    """Key encoded by `encode_cursor`; raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        points, user_id = raw.split(":", 1)
+        return (-int(points), user_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"invalid cursor: {cursor!r}") from e
+
+
+class LeaderboardStore:
+    """SQLite (WAL) persistence for standings with batched write-behind.
+
+    Changed standings are coalesced per user and written by a background thread
+    every `flush_interval` seconds (sooner once `batch_size` users are pending),
+    so score updates never wait on disk.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0, batch_size: int = 1000) -> None:
+        self.path = path
+        self._conn = connect(path)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS standings (
+                user_id TEXT PRIMARY KEY,
+                username TEXT NOT NULL,
+                trivia_points INTEGER NOT NULL DEFAULT 0,
+                prediction_points INTEGER NOT NULL DEFAULT 0,
+                total_points INTEGER NOT NULL DEFAULT 0,
+                games_played INTEGER NOT NULL DEFAULT 0,
+                answered INTEGER NOT NULL DEFAULT 0,
+                accuracy REAL NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_standings_score ON standings (total_points DESC, user_id)")
+        self._db_lock = threading.Lock()
+        self._writer = WriteBehind(self._write, "leaderboard-writer", flush_interval, batch_size)
+
+    def load(self) -> List[Standing]:
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT user_id, username, trivia_points, prediction_points, games_played, answered, accuracy "
+                "FROM standings ORDER BY total_points DESC, user_id"
+            ).fetchall()
+        return [Standing(*row) for row in rows]
+
+    def enqueue(self, standing: Standing) -> None:
+        row = (
+            standing.user_id, standing.username, standing.trivia_points, standing.prediction_points,
+            standing.total_points, standing.games_played, standing.answered, standing.accuracy, time.time(),
+        )
+        self._writer.put(standing.user_id, row)
+
+    def _write(self, rows: List[Tuple[Any, ...]]) -> None:
+        with self._db_lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO standings (user_id, username, trivia_points, prediction_points, total_points, "
+                    "games_played, answered, accuracy, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET username=excluded.username, "
+                    "trivia_points=excluded.trivia_points, prediction_points=excluded.prediction_points, "
+                    "total_points=excluded.total_points, games_played=excluded.games_played, "
+                    "answered=excluded.answered, accuracy=excluded.accuracy, updated_at=excluded.updated_at",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def flush(self) -> int:
+        """Write all pending standings in one transaction; returns the number written."""
+        return self._writer.flush()
+
+    def start(self) -> "LeaderboardStore":
+        self._writer.start()
+        return self
+
+    def close(self) -> None:
+        self._writer.close()
+        with self._db_lock:
+            self._conn.close()
+
+
+class _Node:
+    __slots__ = ("key", "standing", "next", "width")
+
+    def __init__(self, key: Key, standing: Optional[Standing], levels: int) -> None:
+        self.key = key
+        self.standing = standing
+        self.next: List[Optional[_Node]] = [None] * levels
+        # width[i] = number of level-0 hops to next[i]
+        self.width: List[int] = [1] * levels
+
+
+class Leaderboard:
+    """Ranked leaderboard on an indexable skip list keyed by (-points, user_id).
+
+    Score changes and rank lookups are O(log n); top-k and pages are O(log n + k).
+    """
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        self._tail = _Node(_TAIL_KEY, None, 0)
+        self._head = _Node((float("-inf"), ""), None, MAX_LEVEL)
+        self._head.next = [self._tail] * MAX_LEVEL
+        self._size = 0
+        self._standings: Dict[str, Standing] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+        self.store: Optional[LeaderboardStore] = None
+        # user ids changed since the last drain_changes(), once tracking is on
+        self._changed: Optional[Set[str]] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._standings
+
+    # --- skip list primitives -------------------------------------------------
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < MAX_LEVEL and self._rng.getrandbits(1):
+            level += 1
+        return level
+
+    def _insert(self, standing: Standing) -> None:
+        key = standing.key
+        chain: List[_Node] = [self._head] * MAX_LEVEL
+        steps_at_level = [0] * MAX_LEVEL
+        node = self._head
+        for level in range(MAX_LEVEL - 1, -1, -1):
+            while node.next[level].key < key:  # type: ignore[union-attr]
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]  # type: ignore[assignment]
+            chain[level] = node
+        height = self._random_level()
+        new = _Node(key, standing, height)
+        steps = 0
+        for level in range(height):
+            prev = chain[level]
+            new.next[level] = prev.next[level]
+            prev.next[level] = new
+            new.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(height, MAX_LEVEL):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def _remove(self, key: Key) -> None:
+        chain: List[_Node] = [self._head] * MAX_LEVEL
+        node = self._head
+        for level in range(MAX_LEVEL - 1, -1, -1):
+            while node.next[level].key < key:  # type: ignore[union-attr]
+                node = node.next[level]  # type: ignore[assignment]
+            chain[level] = node
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        height = len(target.next)
+        for level in range(height):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(height, MAX_LEVEL):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def _node_at(self, index: int) -> Optional[_Node]:
+        """Node at 0-based position `index`, or None past the end."""
+        if index < 0 or index >= self._size:
+            return None
+        remaining = index + 1
+        node = self._head
+        for level in range(MAX_LEVEL - 1, -1, -1):
+            while node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]  # type: ignore[assignment]
+        return node
+
+    def _count_le(self, key: Key) -> int:
+        """Number of standings whose key is <= `key`."""
+        pos = 0
+        node = self._head
+        for level in range(MAX_LEVEL - 1, -1, -1):
+            while node.next[level].key <= key:  # type: ignore[union-attr]
+                pos += node.width[level]
+                node = node.next[level]  # type: ignore[assignment]
+        return pos
+
+    def _walk(self, node: Optional[_Node], rank: int, limit: int) -> List[Tuple[int, Standing]]:
+        out: List[Tuple[int, Standing]] = []
+        while node is not None and node is not self._tail and len(out) < limit:
+            out.append((rank, node.standing))  # type: ignore[arg-type]
+            rank += 1
+            node = node.next[0]
+        return out
+
+    # --- public API -------------------------------------------------------------
+
+    def get(self, user_id: str) -> Optional[Standing]:
+        return self._standings.get(user_id)
+
+    def attach(self, store: LeaderboardStore) -> int:
+        """Load persisted standings from `store` and write later changes behind to it."""
+        with self._lock:
+            standings = store.load()
+            self.seed(standings)
+            self.store = store
+            return len(standings)
+
+    def seed(self, standings: Iterable[Standing]) -> None:
+        with self._lock:
+            for s in standings:
+                if s.user_id in self._standings:
+                    self._remove(self._standings[s.user_id].key)
+                self._standings[s.user_id] = s
+                self._insert(s)
+                if self._changed is not None:
+                    self._changed.add(s.user_id)
+                if self.store is not None:
+                    self.store.enqueue(s)
+
+    def _apply(self, user_id: str, delta: ScoreDelta) -> Standing:
+        standing = self._standings.get(user_id)
+        if standing is None:
+            standing = Standing(user_id=user_id, username=delta.username or user_id)
+            self._standings[user_id] = standing
+        else:
+            self._remove(standing.key)
+        standing.trivia_points += delta.trivia
+        standing.prediction_points += delta.prediction
+        standing.games_played += delta.played
+        if delta.answered:
+            standing.accuracy = (standing.accuracy * standing.answered + delta.correct) / (standing.answered + delta.answered)
+            standing.answered += delta.answered
+        self._insert(standing)
+        if self.store is not None:
+            self.store.enqueue(standing)
+        if self._changed is not None:
+            self._changed.add(user_id)
+        return standing
+
+    def add_points(
+        self,
+        user_id: str,
+        trivia: int = 0,
+        prediction: int = 0,
+        correct: Optional[bool] = None,
+        username: Optional[str] = None,
+        played: bool = True,
+    ) -> Standing:
+        """Apply a score change for `user_id` (created on first use) and re-rank it.
+
+        `correct` marks a graded answer and folds into the running accuracy;
+        `played=False` is for results of earlier plays (e.g. settled predictions).
+        """
+        delta = ScoreDelta()
+        delta.add(trivia, prediction, correct, username, played)
+        with self._lock:
+            return self._apply(user_id, delta)
+
+    def apply(self, deltas: Dict[str, ScoreDelta]) -> int:
+        """Apply a batch of per-user deltas under a single lock; returns users re-ranked."""
+        with self._lock:
+            for user_id, delta in deltas.items():
+                self._apply(user_id, delta)
+        return len(deltas)
+
+    def track_changes(self) -> None:
+        """Start recording which users change, for drain_changes()."""
+        with self._lock:
+            if self._changed is None:
+                self._changed = set()
+
+    def drain_changes(self) -> Set[str]:
+        """User ids whose standing changed since the previous call."""
+        with self._lock:
+            if not self._changed:
+                return set()
+            changed, self._changed = self._changed, set()
+            return changed
+
+    def rank(self, user_id: str) -> Optional[int]:
+        """1-based rank of `user_id`, or None if they have no standing."""
+        with self._lock:
+            standing = self._standings.get(user_id)
+            if standing is None:
+                return None
+            return self._count_le(standing.key)
+
+    def top(self, k: int) -> List[Tuple[int, Standing]]:
+        """[(rank, standing)] for the best `k` users."""
+        with self._lock:
+            return self._walk(self._head.next[0], 1, k)
+
+    def page(self, offset: int, limit: int) -> List[Tuple[int, Standing]]:
+        """[(rank, standing)] starting at 0-based `offset`."""
+        with self._lock:
+            return self._walk(self._node_at(offset), offset + 1, limit)
+
+    def page_after(self, cursor: Key, limit: int) -> List[Tuple[int, Standing]]:
+        """[(rank, standing)] following the position encoded in `cursor`.
+
+        Unlike offsets, cursors stay put when users above the page change score.
+        """
+        with self._lock:
+            offset = self._count_le(cursor)
+            return self._walk(self._node_at(offset), offset + 1, limit)
+
+    def around(self, user_id: str, radius: int) -> List[Tuple[int, Standing]]:
+        """Up to `radius` users either side of `user_id`, including them."""
+        with self._lock:
+            rank = self.rank(user_id)
+            if rank is None:
+                return []
+            start = max(0, rank - 1 - radius)
+            return self.page(start, rank - 1 - start + radius + 1)
+
+
+class ScoreAccumulator:
+    """Sharded buffer of score deltas, folded into a Leaderboard in micro-batches.
+
+    Writers only touch their user's shard (a small lock and a dict update) and
+    never the ranking. A background thread swaps every shard out each
+    `interval` seconds and applies the merged batch under one leaderboard lock,
+    so rankings trail writes by roughly `interval`. `pending` lets a writer
+    read its own not-yet-folded changes.
+    """
+
+    def __init__(self, board: Leaderboard, shards: int = 16, interval: float = 0.2) -> None:
+        self.board = board
+        self.interval = interval
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._shards: List[Dict[str, ScoreDelta]] = [{} for _ in range(shards)]
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.folded = 0
+
+    def add_points(
+        self,
+        user_id: str,
+        trivia: int = 0,
+        prediction: int = 0,
+        correct: Optional[bool] = None,
+        username: Optional[str] = None,
+        played: bool = True,
+    ) -> None:
+        """Record a score change; same arguments as `Leaderboard.add_points`."""
+        i = hash(user_id) % len(self._shards)
+        with self._locks[i]:
+            delta = self._shards[i].get(user_id)
+            if delta is None:
+                delta = self._shards[i][user_id] = ScoreDelta()
+            delta.add(trivia, prediction, correct, username, played)
+
+    def pending(self, user_id: str) -> Optional[ScoreDelta]:
+        i = hash(user_id) % len(self._shards)
+        with self._locks[i]:
+            delta = self._shards[i].get(user_id)
+            return None if delta is None else ScoreDelta(**vars(delta))
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def fold(self) -> int:
+        """Apply everything recorded so far to the leaderboard; returns users re-ranked."""
+        batch: Dict[str, ScoreDelta] = {}
+        for i, lock in enumerate(self._locks):
+            with lock:
+                shard, self._shards[i] = self._shards[i], {}
+            batch.update(shard)  # a user always lands in the same shard
+        if not batch:
+            return 0
+        self.folded += self.board.apply(batch)
+        return len(batch)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.fold()
+            except Exception as e:
+                logger.error("Score fold failed: %s", e)
+
+    def start(self) -> "ScoreAccumulator":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="score-fold", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self) -> None:
+        """Stop the fold thread and apply whatever is still buffered."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.fold()
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from leaderboard import Leaderboard
+
+logger = logging.getLogger(__name__)
+
+WindowKey = Tuple[int, int]  # (offset, limit)
+
+
+def _dumps(message: dict) -> str:
+    return json.dumps(message, separators=(",", ":"))
+
+
+class _Window:
+    """One visible slice of the leaderboard and everyone watching it."""
+
+    def __init__(self, offset: int, limit: int) -> None:
+        self.offset = offset
+        self.limit = limit
+        self.subscribers: Set[asyncio.Queue] = set()
+        # What subscribers were last brought up to: entry dicts and user_id -> (rank, points)
+        self.entries: List[dict] = []
+        self.state: Dict[str, Tuple[int, int]] = {}
+        self.seq = 0
+        self.snapshot: Optional[str] = None
+
+
+class LeaderboardFeed:
+    """Pushes leaderboard changes to subscribers as per-tick deltas.
+
+    Subscribers are grouped by their visible window (offset, limit). Every
+    `interval` seconds, if anything on the board changed, each window is
+    re-read once, diffed against what was last sent, and the delta is
+    serialized once and queued to all of that window's subscribers, so the
+    cost of a tick depends on the number of distinct windows, not viewers.
+
+    Messages (JSON text):
+      {"type": "snapshot", "seq": n, "offset": o, "entries": [Standing.to_dict...]}
+      {"type": "delta", "seq": n, "changed": [[user_id, rank, points], ...],
+       "added": [Standing.to_dict...], "removed": [user_id, ...]}
+
+    `seq` increases by one per delta within a window. A subscriber whose queue
+    fills up is resynchronised with a fresh snapshot instead of growing memory.
+    """
+
+    def __init__(self, board: Leaderboard, interval: float = 0.25, queue_size: int = 64) -> None:
+        self.board = board
+        self.interval = interval
+        self.queue_size = queue_size
+        self._windows: Dict[WindowKey, _Window] = {}
+        self.ticks = 0
+        self.sent = 0
+        board.track_changes()
+
+    def __len__(self) -> int:
+        return sum(len(w.subscribers) for w in self._windows.values())
+
+    def _read(self, window: _Window) -> Dict[str, Tuple[int, int]]:
+        # Standings are mutated in place, so keep copies of what was sent
+        window.entries = [s.to_dict(rank) for rank, s in self.board.page(window.offset, window.limit)]
+        return {e["user_id"]: (e["rank"], e["total_points"]) for e in window.entries}
+
+    def _snapshot(self, window: _Window) -> str:
+        # Built from the last-sent state, never a fresh read, so it agrees with the deltas
+        if window.snapshot is None:
+            window.snapshot = _dumps({
+                "type": "snapshot",
+                "seq": window.seq,
+                "offset": window.offset,
+                "entries": window.entries,
+            })
+        return window.snapshot
+
+    def subscribe(self, offset: int = 0, limit: int = 10) -> Tuple[WindowKey, asyncio.Queue]:
+        """Join a window; the returned queue starts with the current snapshot."""
+        key = (offset, limit)
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = _Window(offset, limit)
+            window.state = self._read(window)
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        queue.put_nowait(self._snapshot(window))
+        window.subscribers.add(queue)
+        return key, queue
+
+    def unsubscribe(self, key: WindowKey, queue: asyncio.Queue) -> None:
+        window = self._windows.get(key)
+        if window is None:
+            return
+        window.subscribers.discard(queue)
+        if not window.subscribers:
+            del self._windows[key]
+
+    def _delta(self, window: _Window) -> Optional[str]:
+        previous = window.state
+        state = self._read(window)
+        changed = [[uid, rank, points] for uid, (rank, points) in state.items()
+                   if uid in previous and previous[uid] != (rank, points)]
+        added = [e for e in window.entries if e["user_id"] not in previous]
+        removed = [uid for uid in previous if uid not in state]
+        window.state = state
+        if not (changed or added or removed):
+            return None
+        window.seq += 1
+        window.snapshot = None
+        return _dumps({"type": "delta", "seq": window.seq, "changed": changed, "added": added, "removed": removed})
+
+    def _send(self, window: _Window, message: str) -> None:
+        for queue in window.subscribers:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and start it over from a snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self._snapshot(window))
+            self.sent += 1
+
+    def tick(self) -> int:
+        """Fan out one round of deltas; returns the number of windows that changed."""
+        if not self.board.drain_changes() or not self._windows:
+            return 0
+        self.ticks += 1
+        updated = 0
+        for window in list(self._windows.values()):
+            message = self._delta(window)
+            if message is not None:
+                self._send(window, message)
+                updated += 1
+        return updated
+
+    async def run(self) -> None:
+        """Background loop on the event loop: one tick every `interval` seconds."""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.tick()
+            except Exception as e:  # pragma: no cover
+                logger.error("Leaderboard feed tick failed: %s", e)
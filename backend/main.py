@@ -1,21 +1,107 @@
-from fastapi import FastAPI, Header, HTTPException
+import time
+_import_started = time.perf_counter()  # first, so the startup report covers the whole import
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Awaitable, Callable, Tuple
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 import os
-import aiohttp
 import json
+from functools import lru_cache
 
 from config import settings
-from mlb_service import resolve_team_id, find_next_game, get_schedule, compare_teams, GameInfo
+from mlb_service import preload_teams, resolve_team_id, get_schedule, next_game_in, compare_teams
 from news_service import NewsService, NewsArticle
 from youtube_service import search_videos, VideoItem
-from sports_data_service import SportsDataService
+from sports_data_service import SportsDataService, TeamIntelligence
+from tracing import TracingMiddleware, aiohttp_trace_config, span
+from profiling import ProfilingMiddleware, SamplingProfiler, profile_for, profile_store
+from cassette import install_from_env
+from leaderboard import Leaderboard, LeaderboardStore, ScoreAccumulator, Standing, decode_cursor, encode_cursor
+from trivia_bank import Question, TriviaBank
+from prediction_store import PredictionStore
+from settlement import InvalidGame, SettlementEngine, attach_game
+from leaderboard_feed import LeaderboardFeed
+from profile_store import ProfileStore
+from fieldsets import selected, wants
+from serialization import Preencoded, Spliced, WireFormatRoute, fast_json, respond, response_format
+from cache import LRUCache
+from streaming import stream_format, stream_sections
+from pagination import ExpiredCursor, InvalidCursor, ResultPages
+from http_cache import HTTPCacheMiddleware, etag_matches, version_etag
+from startup import StartupReport, Warmup
+import snapshot
 
 # load_dotenv()  # Commented out to avoid .env file issues
-app = FastAPI(title="Hackathon AI Backend", version="0.1.0")
+# Record/replay upstream HTTP traffic when CASSETTE_MODE is set
+install_from_env()
+
+startup_report = StartupReport(_import_started)
+
+
+# First-use costs paid during startup instead of by the first requests. Readiness waits for
+# WARMUP_TASKS; the client libraries are imported in the background since few requests need them
+WARMUP_TASKS: Dict[str, Callable[[], Any]] = {
+    "teams": lambda: preload_teams(),  # statsapi team index behind every resolve_team_id
+}
+BACKGROUND_WARMUP_TASKS: Dict[str, Callable[[], Any]] = {
+    "llm_client": lambda: _trace_config(),  # imports aiohttp
+    "news_client": lambda: NewsService(),  # imports newsapi when a key is configured
+}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Caches saved by the previous worker; entries are unpickled as they are first looked up
+    with startup_report.phase("snapshot"):
+        snapshot.load(settings.CACHE_SNAPSHOT)
+    # Warmup runs on its own threads while local state loads below
+    warm = Warmup(WARMUP_TASKS, startup_report, BACKGROUND_WARMUP_TASKS) if settings.STARTUP_WARMUP else None
+    with startup_report.phase("trivia"):
+        initialize_trivia_questions()
+    with startup_report.phase("predictions"):
+        prediction_store.open()
+    with startup_report.phase("profiles"):
+        user_profiles.start()
+    with startup_report.phase("leaderboard"):
+        # Restore persisted leaderboard standings; seed the demo board on first run
+        store = LeaderboardStore(settings.LEADERBOARD_DB, flush_interval=settings.LEADERBOARD_FLUSH_SECONDS)
+        if leaderboard.attach(store) == 0:
+            initialize_leaderboard()
+        store.start()
+    score_accumulator.start()
+    # Settle predictions against final scores in the background
+    import asyncio
+    settlement_task = asyncio.create_task(settlement_engine.run())
+    feed_task = asyncio.create_task(leaderboard_feed.run())
+    if warm is not None:
+        with startup_report.phase("warmup"):
+            await warm.wait(settings.WARMUP_TIMEOUT_SECONDS)
+    startup_report.ready()
+    try:
+        yield
+    finally:
+        settlement_task.cancel()
+        feed_task.cancel()
+        try:
+            snapshot.save(settings.CACHE_SNAPSHOT)
+        except Exception as e:
+            print(f"Failed to save cache snapshot {settings.CACHE_SNAPSHOT}: {e}")
+        score_accumulator.close()
+        leaderboard.store = None
+        store.close()
+        prediction_store.close()
+        user_profiles.close()
+
+
+app = FastAPI(title="Hackathon AI Backend", version="0.1.0", lifespan=lifespan)
+# MessagePack request bodies and Accept negotiation on every route declared below
+app.router.route_class = WireFormatRoute
 
 # CORS for local dev (Next.js and Netlify dev)
 origins = [
@@ -34,12 +120,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(TracingMiddleware, enabled=settings.TRACE_REQUESTS)
 
 
 class CheckScheduleRequest(BaseModel):
     team: str = Field(..., description="Team name or alias, e.g., 'Yankees'")
     days: int = Field(14, ge=1, le=60, description="Days ahead to search for next game")
     from_iso: Optional[str] = Field(None, description="ISO datetime to start from; defaults to now")
+    cursor: Optional[str] = Field(None, description="next_cursor of the previous page")
+    limit: Optional[int] = Field(None, ge=1, le=100, description="Page size; results are paginated when this or cursor is set")
     tool_token: Optional[str] = None
 
 
@@ -47,6 +136,8 @@ class NewsRequest(BaseModel):
     team: str
     days_back: int = Field(7, ge=1, le=30)
     max_results: int = Field(10, ge=1, le=50)
+    cursor: Optional[str] = Field(None, description="next_cursor of the previous page")
+    limit: Optional[int] = Field(None, ge=1, le=100, description="Page size; results are paginated when this or cursor is set")
     tool_token: Optional[str] = None
 
 
@@ -54,6 +145,8 @@ class YouTubeRequest(BaseModel):
     query: Optional[str] = None
     team: Optional[str] = None
     max_results: int = Field(10, ge=1, le=50)
+    cursor: Optional[str] = Field(None, description="next_cursor of the previous page")
+    limit: Optional[int] = Field(None, ge=1, le=100, description="Page size; results are paginated when this or cursor is set")
     tool_token: Optional[str] = None
 
 
@@ -159,30 +252,32 @@ class UserProfile(BaseModel):
     preferences: Dict[str, Any]
     created_at: datetime
     last_updated: datetime
+    version: int = 1
 
 
-class GameOut(BaseModel):
-    game_pk: int
-    game_date: str
-    home_team: str
-    away_team: str
-    is_home: bool
-    opponent: str
-    venue: Optional[str] = None
-    status: str
-
-    @staticmethod
-    def from_game(g: GameInfo) -> "GameOut":
-        return GameOut(
-            game_pk=g.game_pk,
-            game_date=g.game_date.isoformat(),
-            home_team=g.home_team,
-            away_team=g.away_team,
-            is_home=g.is_home,
-            opponent=g.opponent,
-            venue=g.venue,
-            status=g.status,
-        )
+# Overridable so benchmarks and local runs can point at stand-in servers
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+MISTRAL_BASE_URL = os.getenv("MISTRAL_BASE_URL", "https://api.mistral.ai/v1").rstrip("/")
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+# aiohttp is only needed for LLM calls, so it is imported on first use (or by the startup warmup)
+@lru_cache(maxsize=1)
+def _trace_config() -> Any:
+    return aiohttp_trace_config()
+
+
+def _client_session(**kwargs: Any) -> "aiohttp.ClientSession":
+    """aiohttp session for LLM calls; requests are recorded as spans of the current trace."""
+    import aiohttp
+    return aiohttp.ClientSession(trace_configs=[_trace_config()], **kwargs)
+
+
+def _timeout(total: float) -> "aiohttp.ClientTimeout":
+    import aiohttp
+    return aiohttp.ClientTimeout(total=total)
 
 
 def _check_auth(header_token: Optional[str], body_token: Optional[str]) -> None:
@@ -195,22 +290,127 @@ def _check_auth(header_token: Optional[str], body_token: Optional[str]) -> None:
         raise HTTPException(status_code=401, detail="Invalid or missing tool token")
 
 
+def _token_ok(header_token: Optional[str]) -> bool:
+    try:
+        _check_auth(header_token, None)
+    except HTTPException:
+        return False
+    return True
+
+
+app.add_middleware(ProfilingMiddleware, authorize=_token_ok)
+
+# Read-only tool calls, whose responses can be revalidated with If-None-Match. Anything not
+# listed (including a tool added later) never gets an ETag or a 304.
+REVALIDATED_TOOLS = {
+    "/tools/echo", "/tools/check_schedule", "/tools/news", "/tools/youtube", "/tools/compare_stats",
+    "/tools/team_intelligence", "/tools/aggregate", "/tools/multi-sport", "/tools/nba", "/tools/nfl",
+    "/tools/pipeline", "/tools/sentiment", "/tools/predict", "/tools/visual-analytics",
+}
+
+
+def _revalidate(method: str, path: str) -> bool:
+    if method == "GET":
+        return path.startswith("/tools/user-profile/")
+    return method == "POST" and path in REVALIDATED_TOOLS
+
+
+# Outermost, so it sees the final body (after debug traces are added)
+app.add_middleware(HTTPCacheMiddleware, revalidate=_revalidate)
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
 
+def _profile_response(profiler: SamplingProfiler, fmt: str, name: str):
+    content, media_type = profiler.render(fmt, name)
+    ext = "speedscope.json" if fmt == "speedscope" else "collapsed.txt"
+    headers = {
+        "Content-Disposition": f'attachment; filename="{name}.{ext}"',
+        "X-Profile-Samples": str(profiler.sample_count),
+    }
+    if fmt == "speedscope":
+        return JSONResponse(content, headers=headers)
+    return PlainTextResponse(content, headers=headers)
+
+
+@app.get("/admin/startup")
+async def admin_startup(x_tool_token: Optional[str] = Header(None)):
+    """How long this worker took to import, run each startup phase and become ready."""
+    _check_auth(x_tool_token, None)
+    return startup_report.as_dict()
+
+
+@app.get("/admin/profile")
+async def admin_profile(
+    seconds: float = Query(10.0, gt=0, le=120, description="How long to sample"),
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+    interval_ms: float = Query(5.0, ge=1, le=100, description="Sampling interval"),
+    x_tool_token: Optional[str] = Header(None),
+):
+    """Sample every thread and pending event-loop task of this worker for `seconds`."""
+    _check_auth(x_tool_token, None)
+    profiler = await profile_for(seconds, interval=interval_ms / 1000.0)
+    name = f"profile-{os.getpid()}-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    return _profile_response(profiler, format, name)
+
+
+@app.get("/admin/profile/{profile_id}")
+async def admin_request_profile(
+    profile_id: str,
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+    x_tool_token: Optional[str] = Header(None),
+):
+    """Download the profile of a single /tools/* call made with `X-Profile: 1`."""
+    _check_auth(x_tool_token, None)
+    profiler = profile_store.get(profile_id)
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profile not found or expired")
+    return _profile_response(profiler, format, profile_id)
+
+
 # Placeholder and ping for tools
 @app.post("/tools/echo")
+@fast_json
 def tool_echo(payload: Dict[str, Any], x_tool_token: Optional[str] = Header(None)):
     _check_auth(x_tool_token, (payload or {}).get("tool_token"))
     return {"received": payload}
 
 
+# Paginated result sets, shared by check_schedule, news and youtube
+result_pages = ResultPages(settings.PAGE_CACHE_SIZE, settings.PAGE_CACHE_TTL_SECONDS)
+PAGE_PARAMS = {"cursor", "limit", "tool_token"}
+DEFAULT_PAGE_SIZE = 10
+
+
+async def _paged(req: BaseModel, field: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    """compute()'s response, or one page of its `field` list when the request has a cursor or limit.
+
+    The full response is computed once per query and later pages are sliced from
+    the cached copy (see pagination.ResultPages).
+    """
+    if req.cursor is None and req.limit is None:
+        return await compute()
+    # The fields selection decides what compute() fetches, so it is part of the query
+    key = (type(req).__name__, req.model_dump(exclude=PAGE_PARAMS), selected())
+    try:
+        return await result_pages.page(key, field, compute, req.cursor, req.limit or DEFAULT_PAGE_SIZE)
+    except ExpiredCursor as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.post("/tools/check_schedule")
+@fast_json
 async def tools_check_schedule(req: CheckScheduleRequest, x_tool_token: Optional[str] = Header(None)):
     _check_auth(x_tool_token, req.tool_token)
-    
+    return await _paged(req, "schedule", lambda: _check_schedule(req))
+
+
+async def _check_schedule(req: CheckScheduleRequest) -> Dict[str, Any]:
     # Try GPT-5 first
     openai_api_key = os.getenv("OPENAI_API_KEY")
     if openai_api_key:
@@ -230,24 +430,30 @@ async def tools_check_schedule(req: CheckScheduleRequest, x_tool_token: Optional
     # Normalize to timezone-aware (UTC) if input lacked tzinfo
     if from_dt.tzinfo is None:
         from_dt = from_dt.replace(tzinfo=timezone.utc)
-    next_game = find_next_game(team_id, from_dt=from_dt, search_days=req.days)
     end_date = from_dt.date() + timedelta(days=req.days)
-    sched = get_schedule(team_id, from_dt.date(), end_date)
+    # One fetch serves both fields (next_game is the first upcoming game of the same window),
+    # and none at all when the caller selected neither
+    sched = get_schedule(team_id, from_dt.date(), end_date) if wants("next_game", "schedule") else []
+    next_game = next_game_in(sched, from_dt)
     return {
         "team_id": team_id,
         "team_name": team_name,
         "from": from_dt.isoformat(),
         "to": end_date.isoformat(),
-        "next_game": GameOut.from_game(next_game).model_dump() if next_game else None,
-        "schedule": [GameOut.from_game(g).model_dump() for g in sched],
+        "next_game": next_game,
+        "schedule": sched,
         "source": "MLB API"
     }
 
 
 @app.post("/tools/news")
+@fast_json
 async def tools_news(req: NewsRequest, x_tool_token: Optional[str] = Header(None)):
     _check_auth(x_tool_token, req.tool_token)
-    
+    return await _paged(req, "articles", lambda: _news(req))
+
+
+async def _news(req: NewsRequest) -> Dict[str, Any]:
     # Try GPT-5 first
     openai_api_key = os.getenv("OPENAI_API_KEY")
     if openai_api_key:
@@ -267,22 +473,17 @@ async def tools_news(req: NewsRequest, x_tool_token: Optional[str] = Header(None
     # Fallback to NewsAPI
     service = NewsService()
     articles = service.search_team_news(req.team, req.days_back, req.max_results)
-    def article_to_dict(a: NewsArticle) -> Dict[str, Any]:
-        return {
-            "title": a.title,
-            "description": a.description,
-            "url": a.url,
-            "source": a.source,
-            "published_at": a.published_at.isoformat(),
-            "url_to_image": a.url_to_image,
-        }
-    return {"team": req.team, "articles": [article_to_dict(a) for a in articles], "source": "NewsAPI"}
+    return {"team": req.team, "articles": articles, "source": "NewsAPI"}
 
 
 @app.post("/tools/youtube")
+@fast_json
 async def tools_youtube(req: YouTubeRequest, x_tool_token: Optional[str] = Header(None)):
     _check_auth(x_tool_token, req.tool_token)
-    
+    return await _paged(req, "results", lambda: _youtube(req))
+
+
+async def _youtube(req: YouTubeRequest) -> Dict[str, Any]:
     # Try GPT-5 first
     openai_api_key = os.getenv("OPENAI_API_KEY")
     if openai_api_key and req.team:
@@ -300,18 +501,11 @@ async def tools_youtube(req: YouTubeRequest, x_tool_token: Optional[str] = Heade
     if not query:
         raise HTTPException(status_code=400, detail="Provide 'query' or 'team'")
     items = search_videos(query, max_results=req.max_results)
-    def video_to_dict(v: VideoItem) -> Dict[str, Any]:
-        return {
-            "video_id": v.video_id,
-            "title": v.title,
-            "url": v.url,
-            "channel": v.channel,
-            "view_count": v.view_count,
-        }
-    return {"query": query, "results": [video_to_dict(v) for v in items], "source": "YouTube API"}
+    return {"query": query, "results": items, "source": "YouTube API"}
 
 
 @app.post("/tools/compare_stats")
+@fast_json
 def tools_compare_stats(req: CompareStatsRequest, x_tool_token: Optional[str] = Header(None)):
     _check_auth(x_tool_token, req.tool_token)
     r1 = resolve_team_id(req.team1)
@@ -329,137 +523,157 @@ def tools_compare_stats(req: CompareStatsRequest, x_tool_token: Optional[str] =
 
 
 @app.post("/tools/team_intelligence")
-def tools_team_intel(req: TeamIntelRequest, x_tool_token: Optional[str] = Header(None)):
+@fast_json
+def tools_team_intel(req: TeamIntelRequest, request: Request, x_tool_token: Optional[str] = Header(None)):
     _check_auth(x_tool_token, req.tool_token)
     svc = SportsDataService()
+    media_type = stream_format(request)
+    if media_type:
+        # News and videos are fetched concurrently and each is sent as soon as it arrives
+        team = svc.primary_term(req.team)
+        generated_at = datetime.now()
+        sections: Dict[str, Callable[[], Any]] = {}
+        if wants("news"):
+            sections["news"] = lambda: svc.team_news(team, req.days_back, req.max_news)
+        if wants("youtube"):
+            sections["youtube"] = lambda: svc.team_videos(team, req.max_videos)
+
+        def finish(results: Dict[str, Any]) -> Dict[str, Any]:
+            intel = TeamIntelligence(team, results.get("news", []), results.get("youtube", []), generated_at)
+            return {
+                "team": team,
+                "generated_at": generated_at.isoformat(),
+                "summary": svc.generate_intelligence_summary(intel),
+            }
+
+        return stream_sections(sections, finish, media_type)
+
     intel = svc.get_team_intelligence(req.team, req.days_back, req.max_news, req.max_videos)
     return {
         "team": intel.team_name,
         "generated_at": intel.generated_at.isoformat(),
-        "news": [
-            {
-                "title": n.title,
-                "description": n.description,
-                "url": n.url,
-                "source": n.source,
-                "published_at": n.published_at.isoformat(),
-                "url_to_image": n.url_to_image,
-            }
-            for n in intel.news_articles
-        ],
-        "youtube": [
-            {
-                "video_id": v.video_id,
-                "title": v.title,
-                "url": v.url,
-                "channel": v.channel,
-                "view_count": v.view_count,
-            }
-            for v in intel.youtube_videos
-        ],
+        "news": intel.news_articles,
+        "youtube": intel.youtube_videos,
     }
 
 
-@app.post("/tools/aggregate")
-def tools_aggregate(req: AggregateRequest, x_tool_token: Optional[str] = Header(None)):
-    """Aggregator that orchestrates multiple underlying tools and returns a combined summary.
-
-    This endpoint intentionally uses the same internal services as the other tools so it remains
-    a thin orchestrator suitable for Coral Protocol multi-agent scenarios.
-    """
-    _check_auth(x_tool_token, req.tool_token)
+def _aggregate_schedule(req: AggregateRequest) -> Optional[Dict[str, Any]]:
+    with span("aggregate.schedule"):
+        resolved = resolve_team_id(req.team)
+        if not resolved:
+            return None
+        team_id, team_full = resolved
+        from_dt = datetime.now(timezone.utc)
+        end_date = from_dt.date() + timedelta(days=req.days)
+        sched = get_schedule(team_id, from_dt.date(), end_date)
+        return {
+            "team_id": team_id,
+            "team_name": team_full,
+            "from": from_dt.isoformat(),
+            "to": end_date.isoformat(),
+            "next_game": next_game_in(sched, from_dt),
+            "schedule": sched,
+        }
 
-    team_name = req.team
-    results: Dict[str, Any] = {"summary": "", "data": {}}
-
-    # Schedule
-    if req.include_schedule and team_name:
-        resolved = resolve_team_id(team_name)
-        if resolved:
-            team_id, team_full = resolved
-            from_dt = datetime.now(timezone.utc)
-            next_game = find_next_game(team_id, from_dt=from_dt, search_days=req.days)
-            end_date = from_dt.date() + timedelta(days=req.days)
-            sched = get_schedule(team_id, from_dt.date(), end_date)
-            results["data"]["schedule"] = {
-                "team_id": team_id,
-                "team_name": team_full,
-                "from": from_dt.isoformat(),
-                "to": end_date.isoformat(),
-                "next_game": GameOut.from_game(next_game).model_dump() if next_game else None,
-                "schedule": [GameOut.from_game(g).model_dump() for g in sched],
-            }
 
-    # Compare
-    if req.include_compare and req.team1 and req.team2:
+def _aggregate_compare(req: AggregateRequest) -> Optional[Dict[str, Any]]:
+    with span("aggregate.compare"):
         r1 = resolve_team_id(req.team1)
         r2 = resolve_team_id(req.team2)
-        if r1 and r2:
-            team1_id, team1_name = r1
-            team2_id, team2_name = r2
-            cmp = compare_teams(team1_id, team2_id, season=req.season)
-            results["data"]["compare_stats"] = {
-                "team1": {"id": team1_id, "name": team1_name},
-                "team2": {"id": team2_id, "name": team2_name},
-                "comparison": cmp,
-            }
+        if not (r1 and r2):
+            return None
+        team1_id, team1_name = r1
+        team2_id, team2_name = r2
+        cmp = compare_teams(team1_id, team2_id, season=req.season)
+        return {
+            "team1": {"id": team1_id, "name": team1_name},
+            "team2": {"id": team2_id, "name": team2_name},
+            "comparison": cmp,
+        }
 
-    # News
-    if req.include_news and team_name:
-        news_svc = NewsService()
-        articles = news_svc.search_team_news(team_name, req.days_back, req.max_news)
-        results["data"]["news"] = [
-            {
-                "title": a.title,
-                "description": a.description,
-                "url": a.url,
-                "source": a.source,
-                "published_at": a.published_at.isoformat(),
-                "url_to_image": a.url_to_image,
-            }
-            for a in articles
-        ]
 
-    # YouTube
-    if req.include_youtube and team_name:
-        vids = search_videos(f"{team_name} MLB highlights analysis", max_results=req.max_videos)
-        results["data"]["youtube"] = [
-            {
-                "video_id": v.video_id,
-                "title": v.title,
-                "url": v.url,
-                "channel": v.channel,
-                "view_count": v.view_count,
-            }
-            for v in vids
-        ]
+def _aggregate_news(req: AggregateRequest) -> List[NewsArticle]:
+    with span("aggregate.news"):
+        return NewsService().search_team_news(req.team, req.days_back, req.max_news)
+
+
+def _aggregate_youtube(req: AggregateRequest) -> List[VideoItem]:
+    with span("aggregate.youtube"):
+        return search_videos(f"{req.team} MLB highlights analysis", max_results=req.max_videos)
+
+
+def _aggregate_sections(req: AggregateRequest) -> Dict[str, Callable[[], Any]]:
+    """Fetcher per section the request includes.
 
-    # Lightweight summary
+    Sections the `fields` selector leaves out are not fetched; the summary
+    describes every section, so selecting it keeps them all.
+    """
+    sections: Dict[str, Callable[[], Any]] = {}
+    if req.include_schedule and req.team and wants("data.schedule", "summary"):
+        sections["schedule"] = lambda: _aggregate_schedule(req)
+    if req.include_compare and req.team1 and req.team2 and wants("data.compare_stats", "summary"):
+        sections["compare_stats"] = lambda: _aggregate_compare(req)
+    if req.include_news and req.team and wants("data.news", "summary"):
+        sections["news"] = lambda: _aggregate_news(req)
+    if req.include_youtube and req.team and wants("data.youtube", "summary"):
+        sections["youtube"] = lambda: _aggregate_youtube(req)
+    return sections
+
+
+def _aggregate_summary(data: Dict[str, Any]) -> str:
+    """Lightweight summary of the sections in `data`"""
     parts: List[str] = []
-    if "schedule" in results["data"]:
-        sched = results["data"]["schedule"]
-        next_game = sched.get("next_game")
+    if "schedule" in data:
+        next_game = data["schedule"].get("next_game")
         if next_game:
             parts.append(
-                f"Next game: {next_game['away_team']} at {next_game['home_team']} — {next_game['status']}"
+                f"Next game: {next_game.away_team} at {next_game.home_team} — {next_game.status}"
             )
-    if "compare_stats" in results["data"]:
+    if "compare_stats" in data:
         parts.append("Comparison data available.")
-    if "news" in results["data"]:
-        n = len(results["data"]["news"]) or 0
+    if "news" in data:
+        n = len(data["news"]) or 0
         parts.append(f"News: {n} recent articles.")
-    if "youtube" in results["data"]:
-        y = len(results["data"]["youtube"]) or 0
+    if "youtube" in data:
+        y = len(data["youtube"]) or 0
         parts.append(f"YouTube: {y} videos.")
-    results["summary"] = " ".join(parts) or "No data available for the current selection."
+    return " ".join(parts) or "No data available for the current selection."
 
-    return results
+
+@app.post("/tools/aggregate")
+@fast_json
+def tools_aggregate(req: AggregateRequest, request: Request, x_tool_token: Optional[str] = Header(None)):
+    """Aggregator that orchestrates multiple underlying tools and returns a combined summary.
+
+    This endpoint intentionally uses the same internal services as the other tools so it remains
+    a thin orchestrator suitable for Coral Protocol multi-agent scenarios. With `?stream=ndjson`
+    or `?stream=sse` (or that Accept type) the sections run concurrently and each is sent as soon
+    as it is ready, followed by the summary.
+    """
+    _check_auth(x_tool_token, req.tool_token)
+
+    sections = _aggregate_sections(req)
+    media_type = stream_format(request)
+    if media_type:
+        return stream_sections(
+            sections,
+            lambda data: {"summary": _aggregate_summary(data)},
+            media_type,
+            prefix="data.",
+        )
+
+    data: Dict[str, Any] = {}
+    for name, fetch in sections.items():
+        value = fetch()
+        if value is not None:
+            data[name] = value
+    return {"summary": _aggregate_summary(data), "data": data}
 
 
 async def generate_gpt_news(team: str, api_key: str):
     """Generate news using GPT-5"""
     try:
-        async with aiohttp.ClientSession() as session:
+        async with _client_session() as session:
             headers = {
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json"
@@ -481,7 +695,7 @@ async def generate_gpt_news(team: str, api_key: str):
                 "max_tokens": 1500
             }
             
-            async with session.post("https://api.openai.com/v1/chat/completions", headers=headers, json=data) as response:
+            async with session.post(f"{OPENAI_BASE_URL}/chat/completions", headers=headers, json=data) as response:
                 if response.status == 200:
                     result = await response.json()
                     content = result["choices"][0]["message"]["content"]
@@ -511,7 +725,7 @@ async def generate_gpt_news(team: str, api_key: str):
 async def generate_gpt_youtube(team: str, api_key: str):
     """Generate YouTube video suggestions using GPT-5"""
     try:
-        async with aiohttp.ClientSession() as session:
+        async with _client_session() as session:
             headers = {
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json"
@@ -533,7 +747,7 @@ async def generate_gpt_youtube(team: str, api_key: str):
                 "max_tokens": 1500
             }
             
-            async with session.post("https://api.openai.com/v1/chat/completions", headers=headers, json=data) as response:
+            async with session.post(f"{OPENAI_BASE_URL}/chat/completions", headers=headers, json=data) as response:
                 if response.status == 200:
                     result = await response.json()
                     content = result["choices"][0]["message"]["content"]
@@ -562,7 +776,7 @@ async def generate_gpt_youtube(team: str, api_key: str):
 async def generate_gpt_schedule(team: str, api_key: str):
     """Generate schedule using GPT-5"""
     try:
-        async with aiohttp.ClientSession() as session:
+        async with _client_session() as session:
             headers = {
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json"
@@ -584,7 +798,7 @@ async def generate_gpt_schedule(team: str, api_key: str):
                 "max_tokens": 1000
             }
             
-            async with session.post("https://api.openai.com/v1/chat/completions", headers=headers, json=data) as response:
+            async with session.post(f"{OPENAI_BASE_URL}/chat/completions", headers=headers, json=data) as response:
                 if response.status == 200:
                     result = await response.json()
                     content = result["choices"][0]["message"]["content"]
@@ -651,7 +865,7 @@ async def generate_real_sports_data(sport: str, team: str, action: str, api_key:
         
         prompt = prompts.get(sport, {}).get(action, f"Generate {action} data for {team} in {sport}")
         
-        async with aiohttp.ClientSession() as session:
+        async with _client_session() as session:
             headers = {
                 "Authorization": f"Bearer {api_key}",
                 "Content-Type": "application/json"
@@ -673,7 +887,7 @@ async def generate_real_sports_data(sport: str, team: str, action: str, api_key:
                 "max_tokens": 1000
             }
             
-            async with session.post("https://api.openai.com/v1/chat/completions", headers=headers, json=data) as response:
+            async with session.post(f"{OPENAI_BASE_URL}/chat/completions", headers=headers, json=data) as response:
                 if response.status == 200:
                     result = await response.json()
                     content = result["choices"][0]["message"]["content"]
@@ -713,9 +927,9 @@ async def generate_real_nba_data(api_key: str, team: str, action: str):
         
         prompt = prompts.get(action, prompts["stats"])
         
-        async with aiohttp.ClientSession() as session:
+        async with _client_session() as session:
             async with session.post(
-                "https://api.openai.com/v1/chat/completions",
+                f"{OPENAI_BASE_URL}/chat/completions",
                 headers={
                     "Authorization": f"Bearer {api_key}",
                     "Content-Type": "application/json"
@@ -729,7 +943,7 @@ async def generate_real_nba_data(api_key: str, team: str, action: str):
                     "max_tokens": 1000,
                     "temperature": 0.7
                 },
-                timeout=aiohttp.ClientTimeout(total=5)
+                timeout=_timeout(5)
             ) as response:
                 if response.status == 200:
                     data = await response.json()
@@ -765,9 +979,9 @@ async def generate_real_nfl_data(api_key: str, team: str, action: str):
         
         prompt = prompts.get(action, prompts["stats"])
         
-        async with aiohttp.ClientSession() as session:
+        async with _client_session() as session:
             async with session.post(
-                "https://api.openai.com/v1/chat/completions",
+                f"{OPENAI_BASE_URL}/chat/completions",
                 headers={
                     "Authorization": f"Bearer {api_key}",
                     "Content-Type": "application/json"
@@ -781,7 +995,7 @@ async def generate_real_nfl_data(api_key: str, team: str, action: str):
                     "max_tokens": 1000,
                     "temperature": 0.7
                 },
-                timeout=aiohttp.ClientTimeout(total=5)
+                timeout=_timeout(5)
             ) as response:
                 if response.status == 200:
                     data = await response.json()
@@ -833,9 +1047,9 @@ async def generate_mistral_sports_data(api_key: str, sport: str, team: str, acti
         sport_prompts = prompts.get(sport, prompts["mlb"])
         prompt = sport_prompts.get(action, sport_prompts["stats"])
         
-        async with aiohttp.ClientSession() as session:
+        async with _client_session() as session:
             async with session.post(
-                "https://api.mistral.ai/v1/chat/completions",
+                f"{MISTRAL_BASE_URL}/chat/completions",
                 headers={
                     "Authorization": f"Bearer {api_key}",
                     "Content-Type": "application/json"
@@ -849,7 +1063,7 @@ async def generate_mistral_sports_data(api_key: str, sport: str, team: str, acti
                     "max_tokens": 1000,
                     "temperature": 0.7
                 },
-                timeout=aiohttp.ClientTimeout(total=8)
+                timeout=_timeout(8)
             ) as response:
                 if response.status == 200:
                     data = await response.json()
@@ -873,6 +1087,7 @@ async def generate_mistral_sports_data(api_key: str, sport: str, team: str, acti
 
 
 @app.post("/tools/multi-sport")
+@fast_json
 async def multi_sport_agent(request: MultiSportRequest):
     """
     Multi-sport agent that handles different sports with unified interface
@@ -1030,6 +1245,7 @@ async def multi_sport_agent(request: MultiSportRequest):
         }
 
 @app.post("/tools/nba")
+@fast_json
 async def nba_stats_agent(request: NBAStatsRequest):
     """
     NBA-specific stats agent for basketball teams
@@ -1160,6 +1376,7 @@ async def nba_stats_agent(request: NBAStatsRequest):
         }
 
 @app.post("/tools/nfl")
+@fast_json
 async def nfl_stats_agent(request: NFLStatsRequest):
     """
     NFL-specific stats agent for American football teams
@@ -1292,6 +1509,7 @@ async def nfl_stats_agent(request: NFLStatsRequest):
         }
 
 @app.post("/tools/pipeline")
+@fast_json
 async def pipeline_agent(request: PipelineRequest):
     """
     Multi-agent pipeline that chains stats → voice → scouting agents
@@ -1318,24 +1536,28 @@ async def pipeline_agent(request: PipelineRequest):
     try:
         # Step 1: Stats Agent (Get comprehensive team statistics)
         print(f"Pipeline: Step 1 - Stats Agent for {team}")
-        stats_data = await get_agent_stats(team, sport)
+        with span("pipeline.stats"):
+            stats_data = await get_agent_stats(team, sport)
         pipeline_results["agents_executed"].append("stats-agent")
         pipeline_results["results"]["stats"] = stats_data
         
         # Step 2: Voice Agent (Generate voice-ready summary from stats)
         print(f"Pipeline: Step 2 - Voice Agent for {team}")
-        voice_data = await get_agent_voice(team, sport, stats_data)
+        with span("pipeline.voice"):
+            voice_data = await get_agent_voice(team, sport, stats_data)
         pipeline_results["agents_executed"].append("voice-agent")
         pipeline_results["results"]["voice"] = voice_data
         
         # Step 3: Scouting Agent (Advanced analysis and insights)
         print(f"Pipeline: Step 3 - Scouting Agent for {team}")
-        scouting_data = await get_agent_scouting(team, sport, stats_data, voice_data)
+        with span("pipeline.scouting"):
+            scouting_data = await get_agent_scouting(team, sport, stats_data, voice_data)
         pipeline_results["agents_executed"].append("scouting-agent")
         pipeline_results["results"]["scouting"] = scouting_data
         
         # Generate final pipeline summary
-        pipeline_summary = await generate_pipeline_summary(team, sport, pipeline_results["results"])
+        with span("pipeline.summary"):
+            pipeline_summary = await generate_pipeline_summary(team, sport, pipeline_results["results"])
         pipeline_results["summary"] = pipeline_summary
         
         # Calculate execution time
@@ -1351,6 +1573,7 @@ async def pipeline_agent(request: PipelineRequest):
         return pipeline_results
 
 @app.post("/tools/sentiment")
+@fast_json
 async def sentiment_agent(request: SentimentRequest):
     """
     Fan Sentiment Analysis Agent - Analyzes social media sentiment for teams
@@ -1361,10 +1584,10 @@ async def sentiment_agent(request: SentimentRequest):
     days_back = request.days_back
     
     try:
-        # Try to use Mistral AI for sentiment analysis first
+        # Try to use Mistral AI for sentiment analysis first (unless `fields` leaves out everything it produces)
         mistral_api_key = os.getenv("MISTRAL_API_KEY")
         
-        if mistral_api_key:
+        if mistral_api_key and wants("data", "summary", "source"):
             try:
                 sentiment_data = await analyze_sentiment_with_mistral(mistral_api_key, team, sport, platform, days_back)
                 if sentiment_data:
@@ -1409,7 +1632,7 @@ async def sentiment_agent(request: SentimentRequest):
 async def analyze_sentiment_with_mistral(api_key: str, team: str, sport: str, platform: str, days_back: int):
     """Analyze sentiment using Mistral AI"""
     try:
-        async with aiohttp.ClientSession() as session:
+        async with _client_session() as session:
             prompt = f"""
             Analyze fan sentiment for {team} in {sport.upper()} from {platform} over the last {days_back} days.
             
@@ -1441,10 +1664,10 @@ async def analyze_sentiment_with_mistral(api_key: str, team: str, sport: str, pl
             }
             
             async with session.post(
-                "https://api.mistral.ai/v1/chat/completions",
+                f"{MISTRAL_BASE_URL}/chat/completions",
                 headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
                 json=payload,
-                timeout=aiohttp.ClientTimeout(total=30)
+                timeout=_timeout(30)
             ) as response:
                 if response.status == 200:
                     result = await response.json()
@@ -1522,6 +1745,7 @@ def generate_mock_sentiment_data(team: str, sport: str, platform: str):
     }
 
 @app.post("/tools/predict")
+@fast_json
 async def predict_agent(request: PredictRequest):
     """
     Prediction Agent - Generates win probabilities, score predictions, and season outlooks
@@ -1533,10 +1757,10 @@ async def predict_agent(request: PredictRequest):
     context = request.context or f"Prediction analysis for {team} vs {opponent}"
     
     try:
-        # Try to use Mistral AI for predictions first
+        # Try to use Mistral AI for predictions first (unless `fields` leaves out everything it produces)
         mistral_api_key = os.getenv("MISTRAL_API_KEY")
         
-        if mistral_api_key:
+        if mistral_api_key and wants("data", "summary", "source"):
             try:
                 prediction_data = await generate_predictions_with_mistral(mistral_api_key, team, opponent, sport, prediction_type)
                 if prediction_data:
@@ -1583,7 +1807,7 @@ async def predict_agent(request: PredictRequest):
 async def generate_predictions_with_mistral(api_key: str, team: str, opponent: str, sport: str, prediction_type: str):
     """Generate predictions using Mistral AI"""
     try:
-        async with aiohttp.ClientSession() as session:
+        async with _client_session() as session:
             prompt = f"""
             Generate comprehensive sports predictions for {team} vs {opponent} in {sport.upper()}.
             
@@ -1618,10 +1842,10 @@ async def generate_predictions_with_mistral(api_key: str, team: str, opponent: s
             }
             
             async with session.post(
-                "https://api.mistral.ai/v1/chat/completions",
+                f"{MISTRAL_BASE_URL}/chat/completions",
                 headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
                 json=payload,
-                timeout=aiohttp.ClientTimeout(total=30)
+                timeout=_timeout(30)
             ) as response:
                 if response.status == 200:
                     result = await response.json()
@@ -1747,6 +1971,7 @@ def generate_mock_predictions(team: str, opponent: str, sport: str, prediction_t
     }
 
 @app.post("/tools/visual-analytics")
+@fast_json
 async def visual_analytics_agent(request: VisualAnalyticsRequest):
     """
     Visual Analytics Agent - Generates chart data for heatmaps, spray charts, and performance visualizations
@@ -1759,10 +1984,10 @@ async def visual_analytics_agent(request: VisualAnalyticsRequest):
     context = request.context or f"Visual analytics for {team} - {chart_type}"
     
     try:
-        # Try to use Mistral AI for visual analytics first
+        # Try to use Mistral AI for visual analytics first (unless `fields` leaves out everything it produces)
         mistral_api_key = os.getenv("MISTRAL_API_KEY")
         
-        if mistral_api_key:
+        if mistral_api_key and wants("data", "summary", "source"):
             try:
                 visual_data = await generate_visual_analytics_with_mistral(mistral_api_key, team, sport, chart_type, data_period, metrics)
                 if visual_data:
@@ -1811,7 +2036,7 @@ async def visual_analytics_agent(request: VisualAnalyticsRequest):
 async def generate_visual_analytics_with_mistral(api_key: str, team: str, sport: str, chart_type: str, data_period: str, metrics: List[str]):
     """Generate visual analytics data using Mistral AI"""
     try:
-        async with aiohttp.ClientSession() as session:
+        async with _client_session() as session:
             prompt = f"""
             Generate comprehensive visual analytics data for {team} in {sport.upper()}.
             
@@ -1849,10 +2074,10 @@ async def generate_visual_analytics_with_mistral(api_key: str, team: str, sport:
             }
             
             async with session.post(
-                "https://api.mistral.ai/v1/chat/completions",
+                f"{MISTRAL_BASE_URL}/chat/completions",
                 headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
                 json=payload,
-                timeout=aiohttp.ClientTimeout(total=30)
+                timeout=_timeout(30)
             ) as response:
                 if response.status == 200:
                     result = await response.json()
@@ -1987,10 +2212,67 @@ def generate_mock_visual_data(team: str, sport: str, chart_type: str, data_perio
             ]
         }
 
-# In-memory storage for user profiles (in production, use a database)
-user_profiles: Dict[str, UserProfile] = {}
+# User profiles: SQLite behind an LRU cache, written behind
+user_profiles = ProfileStore(settings.PROFILES_DB, UserProfile, ttl=settings.PROFILE_CACHE_TTL_SECONDS)
+
+# (user_id, profile version, agent_type) -> (config JSON, runtime manifest JSON).
+# Any profile change bumps its version, so stale entries are simply never hit again.
+agent_memo: LRUCache = LRUCache(maxsize=50_000)
+# Mock configs served because Mistral failed are only reused briefly (and never snapshotted),
+# so the profile gets a real config once Mistral recovers
+agent_fallback_memo: LRUCache = LRUCache(maxsize=10_000, ttl=settings.AGENT_FALLBACK_TTL_SECONDS)
+_agent_inflight: Dict[Tuple[str, int, str], Any] = {}
+# Snapshotted configs last a week from their last use; ones for old profile versions are never hit
+# again, so they age out instead of being carried from snapshot to snapshot
+AGENT_SNAPSHOT_TTL = 7 * 24 * 3600.0
+snapshot.register(
+    "agent_memo",
+    lambda: [(key, payload, snapshot.expires_at(stored, AGENT_SNAPSHOT_TTL)) for key, payload, stored in agent_memo.items()],
+    limit=agent_memo.maxsize,
+)
+
+
+async def personalized_agent_payload(user_profile: UserProfile, agent_type: str) -> Tuple[Preencoded, Preencoded]:
+    """Agent config and runtime manifest for this profile version, generated once and encoded once per format.
+
+    Concurrent requests for the same key share a single generation (one Mistral call).
+    """
+    import asyncio
+
+    key = (user_profile.user_id, user_profile.version, agent_type)
+    payload = agent_memo.get(key)
+    if payload is None:
+        restored = snapshot.lookup("agent_memo", key)
+        if restored is not None:
+            payload = restored[0]
+            agent_memo.put(key, payload)
+    if payload is None:
+        payload = agent_fallback_memo.get(key)
+    if payload is not None:
+        return payload
+    pending = _agent_inflight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+    future = asyncio.get_running_loop().create_future()
+    _agent_inflight[key] = future
+    try:
+        config, fell_back = await generate_personalized_agent_config(user_profile, agent_type)
+        manifest = generate_runtime_manifest(user_profile, config)
+        payload = (Preencoded(config), Preencoded(manifest))
+        (agent_fallback_memo if fell_back else agent_memo).put(key, payload)
+        future.set_result(payload)
+        return payload
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # waiters re-raise it; don't warn when there are none
+        raise
+    finally:
+        _agent_inflight.pop(key, None)
+        if not future.done():
+            future.cancel()
 
 @app.post("/tools/personalized-agent")
+@fast_json
 async def personalized_agent(request: PersonalizedAgentRequest):
     """
     Personalized Agent - Creates user-specific agents based on favorite team and preferences
@@ -2004,32 +2286,21 @@ async def personalized_agent(request: PersonalizedAgentRequest):
     
     try:
         # Create or update user profile
-        user_profile = UserProfile(
-            user_id=user_id,
-            favorite_team=favorite_team,
-            sport=sport,
-            preferences=preferences,
-            created_at=datetime.now(),
-            last_updated=datetime.now()
-        )
-        user_profiles[user_id] = user_profile
+        user_profile = user_profiles.upsert(user_id, favorite_team, sport, preferences)
         
-        # Generate personalized agent configuration
-        personalized_config = await generate_personalized_agent_config(user_profile, agent_type)
-        
-        return {
+        # Config and manifest are memoized per profile version and spliced in pre-serialized (JSON or MessagePack)
+        config, manifest = await personalized_agent_payload(user_profile, agent_type)
+        return Spliced({
             "agent": "personalized-agent",
             "user_id": user_id,
             "favorite_team": favorite_team,
             "sport": sport.upper(),
             "agent_type": agent_type,
-            "personalized_config": personalized_config,
-            "runtime_manifest": generate_runtime_manifest(user_profile, personalized_config),
             "context": context,
             "source": "Personalized Agent System",
             "status": "success",
             "summary": f"Personalized {agent_type} created for {favorite_team} fan with custom configuration"
-        }
+        }, {"personalized_config": config, "runtime_manifest": manifest})
         
     except Exception as e:
         print(f"Personalized agent error: {e}")
@@ -2041,25 +2312,35 @@ async def personalized_agent(request: PersonalizedAgentRequest):
         }
 
 @app.get("/tools/user-profile/{user_id}")
-async def get_user_profile(user_id: str):
+@fast_json
+async def get_user_profile(user_id: str, if_none_match: Optional[str] = Header(None)):
     """Get user profile by ID"""
-    if user_id in user_profiles:
-        return user_profiles[user_id]
+    profile = user_profiles.get(user_id)
+    if profile is not None:
+        # Tagged by profile version, so a revalidation is answered without serializing the profile
+        etag = version_etag("user-profile", user_id, profile.version, response_format(), selected())
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept"})
+        return respond(profile, headers={"ETag": etag})
     else:
         raise HTTPException(status_code=404, detail="User profile not found")
 
 @app.post("/tools/update-preferences")
+@fast_json
 async def update_user_preferences(user_id: str, preferences: Dict[str, Any]):
     """Update user preferences"""
-    if user_id in user_profiles:
-        user_profiles[user_id].preferences.update(preferences)
-        user_profiles[user_id].last_updated = datetime.now()
-        return {"status": "success", "message": "Preferences updated"}
+    profile = user_profiles.update_preferences(user_id, preferences)
+    if profile is not None:
+        return {"status": "success", "message": "Preferences updated", "version": profile.version}
     else:
         raise HTTPException(status_code=404, detail="User profile not found")
 
-async def generate_personalized_agent_config(user_profile: UserProfile, agent_type: str):
-    """Generate personalized agent configuration using AI"""
+async def generate_personalized_agent_config(user_profile: UserProfile, agent_type: str) -> Tuple[Dict[str, Any], bool]:
+    """Generate personalized agent configuration using AI.
+
+    Returns (config, fell_back): fell_back is True when the Mistral call failed and
+    the mock config stands in for it (not when no Mistral key is configured).
+    """
     
     team = user_profile.favorite_team
     sport = user_profile.sport
@@ -2072,13 +2353,16 @@ async def generate_personalized_agent_config(user_profile: UserProfile, agent_ty
         try:
             # Generate real personalized agent using Mistral AI
             real_config = await generate_real_personalized_agent(mistral_api_key, team, sport, agent_type, preferences)
-            return real_config
+            return real_config, False
         except Exception as e:
             print(f"Real personalized agent generation failed: {e}")
             # Fall back to mock data
             pass
-    
-    # Mock data fallback
+    return mock_personalized_agent_config(team, sport, agent_type, preferences), bool(mistral_api_key)
+
+
+def mock_personalized_agent_config(team: str, sport: str, agent_type: str, preferences: Dict[str, Any]) -> Dict[str, Any]:
+    """Template agent configuration, used without Mistral or when it fails"""
     if agent_type == "team_agent":
         return {
             "agent_name": f"{team} Team Agent",
@@ -2202,7 +2486,7 @@ async def generate_real_personalized_agent(api_key: str, team: str, sport: str,
     """
     
     try:
-        async with aiohttp.ClientSession() as session:
+        async with _client_session() as session:
             payload = {
                 "model": "mistral-large-latest",
                 "messages": [
@@ -2221,10 +2505,10 @@ async def generate_real_personalized_agent(api_key: str, team: str, sport: str,
             }
             
             async with session.post(
-                "https://api.mistral.ai/v1/chat/completions",
+                f"{MISTRAL_BASE_URL}/chat/completions",
                 json=payload,
                 headers=headers,
-                timeout=aiohttp.ClientTimeout(total=15)
+                timeout=_timeout(15)
             ) as response:
                 
                 if response.status == 200:
@@ -2389,9 +2673,9 @@ async def get_agent_voice(team: str, sport: str, stats_data: dict):
                 
                 Make it engaging and suitable for voice narration."""
                 
-                async with aiohttp.ClientSession() as session:
+                async with _client_session() as session:
                     async with session.post(
-                        "https://api.mistral.ai/v1/chat/completions",
+                        f"{MISTRAL_BASE_URL}/chat/completions",
                         headers={
                             "Authorization": f"Bearer {mistral_api_key}",
                             "Content-Type": "application/json"
@@ -2405,7 +2689,7 @@ async def get_agent_voice(team: str, sport: str, stats_data: dict):
                             "max_tokens": 500,
                             "temperature": 0.8
                         },
-                        timeout=aiohttp.ClientTimeout(total=8)
+                        timeout=_timeout(8)
                     ) as response:
                         if response.status == 200:
                             data = await response.json()
@@ -2465,9 +2749,9 @@ async def get_agent_scouting(team: str, sport: str, stats_data: dict, voice_data
                 
                 Provide actionable insights for coaches and analysts."""
                 
-                async with aiohttp.ClientSession() as session:
+                async with _client_session() as session:
                     async with session.post(
-                        "https://api.mistral.ai/v1/chat/completions",
+                        f"{MISTRAL_BASE_URL}/chat/completions",
                         headers={
                             "Authorization": f"Bearer {mistral_api_key}",
                             "Content-Type": "application/json"
@@ -2481,7 +2765,7 @@ async def get_agent_scouting(team: str, sport: str, stats_data: dict, voice_data
                             "max_tokens": 800,
                             "temperature": 0.7
                         },
-                        timeout=aiohttp.ClientTimeout(total=8)
+                        timeout=_timeout(8)
                     ) as response:
                         if response.status == 200:
                             data = await response.json()
@@ -2540,9 +2824,9 @@ async def generate_pipeline_summary(team: str, sport: str, results: dict):
                 
                 Generate a concise but complete summary that combines all perspectives into actionable insights."""
                 
-                async with aiohttp.ClientSession() as session:
+                async with _client_session() as session:
                     async with session.post(
-                        "https://api.mistral.ai/v1/chat/completions",
+                        f"{MISTRAL_BASE_URL}/chat/completions",
                         headers={
                             "Authorization": f"Bearer {mistral_api_key}",
                             "Content-Type": "application/json"
@@ -2556,7 +2840,7 @@ async def generate_pipeline_summary(team: str, sport: str, results: dict):
                             "max_tokens": 400,
                             "temperature": 0.6
                         },
-                        timeout=aiohttp.ClientTimeout(total=8)
+                        timeout=_timeout(8)
                     ) as response:
                         if response.status == 200:
                             data = await response.json()
@@ -2572,49 +2856,48 @@ async def generate_pipeline_summary(team: str, sport: str, results: dict):
 
 
 # Gamification Models
-class TriviaQuestion(BaseModel):
-    question_id: str
-    question: str
-    options: List[str]
-    correct_answer: int
-    sport: str
-    difficulty: str
-    points: int
-
-class UserPrediction(BaseModel):
-    user_id: str
-    prediction_type: str
-    prediction_data: Dict[str, Any]
-    timestamp: datetime
-
-class LeaderboardEntry(BaseModel):
-    rank: int
-    user_id: str
-    username: str
-    total_points: int
-    trivia_points: int
-    prediction_points: int
-    games_played: int
-    accuracy: float
-
 class GamificationRequest(BaseModel):
     user_id: str
     action: str
     question_id: Optional[str] = None
     answer: Optional[int] = None
     prediction_data: Optional[Dict[str, Any]] = None
+    # get_trivia filters
+    sport: Optional[str] = None
+    difficulty: Optional[str] = None
+    # get_leaderboard paging: `limit` rows after `cursor`, or `window` ranks either side of user_id
+    limit: Optional[int] = Field(None, ge=1, le=500)
+    cursor: Optional[str] = None
+    window: Optional[int] = Field(None, ge=0, le=100)
 
 # In-memory storage for gamification
-trivia_questions: List[TriviaQuestion] = []
-user_predictions: List[UserPrediction] = []
-leaderboard: List[LeaderboardEntry] = []
-user_scores: Dict[str, Dict[str, int]] = {}
+trivia_bank = TriviaBank()
+prediction_store = PredictionStore(settings.PREDICTIONS_LOG)
+leaderboard = Leaderboard()
+# Answers and predictions buffer score changes here; folded into the ranking in micro-batches
+score_accumulator = ScoreAccumulator(leaderboard, interval=settings.LEADERBOARD_FOLD_SECONDS)
+# Live leaderboard deltas for /ws/leaderboard and /tools/leaderboard/stream, one tick per fold
+leaderboard_feed = LeaderboardFeed(leaderboard, interval=settings.LEADERBOARD_FOLD_SECONDS)
+LEADERBOARD_SIZE = 100
+# Bonus for a correct game_outcome prediction once the game is final
+PREDICTION_WIN_POINTS = 10
+settlement_engine = SettlementEngine(
+    prediction_store,
+    leaderboard,
+    points=PREDICTION_WIN_POINTS,
+    interval=settings.SETTLEMENT_INTERVAL_SECONDS
+)
 
 def initialize_trivia_questions():
-    """Initialize sample trivia questions"""
-    global trivia_questions
-    trivia_questions = [
-        TriviaQuestion(
+    """Load the trivia bank from settings.TRIVIA_BANK, falling back to sample questions"""
+    if os.path.exists(settings.TRIVIA_BANK):
+        try:
+            if trivia_bank.load(settings.TRIVIA_BANK):
+                return
+        except Exception as e:
+            print(f"Failed to load trivia bank {settings.TRIVIA_BANK}: {e}")
+    trivia_bank.add([
+        Question(
             question_id="q1",
             question="Which team has won the most World Series championships?",
             options=["Yankees", "Red Sox", "Dodgers", "Giants"],
@@ -2623,7 +2906,7 @@ def initialize_trivia_questions():
             difficulty="medium",
             points=10
         ),
-        TriviaQuestion(
+        Question(
             question_id="q2",
             question="Who holds the record for most home runs in a single season?",
             options=["Barry Bonds", "Mark McGwire", "Sammy Sosa", "Babe Ruth"],
@@ -2632,7 +2915,7 @@ def initialize_trivia_questions():
             difficulty="hard",
             points=15
         ),
-        TriviaQuestion(
+        Question(
             question_id="q3",
             question="Which NBA team has the most championships?",
             options=["Lakers", "Celtics", "Warriors", "Bulls"],
@@ -2641,7 +2924,7 @@ def initialize_trivia_questions():
             difficulty="medium",
             points=10
         ),
-        TriviaQuestion(
+        Question(
             question_id="q4",
             question="Who is the all-time leading scorer in NBA history?",
             options=["LeBron James", "Kareem Abdul-Jabbar", "Michael Jordan", "Kobe Bryant"],
@@ -2650,7 +2933,7 @@ def initialize_trivia_questions():
             difficulty="hard",
             points=15
         ),
-        TriviaQuestion(
+        Question(
             question_id="q5",
             question="Which NFL team has won the most Super Bowls?",
             options=["Patriots", "Steelers", "Cowboys", "Packers"],
@@ -2659,100 +2942,90 @@ def initialize_trivia_questions():
             difficulty="medium",
             points=10
         )
-    ]
+    ])
 
 def initialize_leaderboard():
     """Initialize sample leaderboard"""
-    global leaderboard
-    leaderboard = [
-        LeaderboardEntry(
-            rank=1,
+    leaderboard.seed([
+        Standing(
             user_id="user_demo_1",
             username="SportsFan_2024",
-            total_points=150,
             trivia_points=120,
             prediction_points=30,
             games_played=15,
+            answered=15,
             accuracy=0.85
         ),
-        LeaderboardEntry(
-            rank=2,
+        Standing(
             user_id="user_demo_2",
             username="MLB_Expert",
-            total_points=135,
             trivia_points=100,
             prediction_points=35,
             games_played=12,
+            answered=12,
             accuracy=0.78
         ),
-        LeaderboardEntry(
-            rank=3,
+        Standing(
             user_id="user_demo_3",
             username="NBA_Analyst",
-            total_points=120,
             trivia_points=90,
             prediction_points=30,
             games_played=10,
+            answered=10,
             accuracy=0.82
         ),
-        LeaderboardEntry(
-            rank=4,
+        Standing(
             user_id="user_demo_4",
             username="Trivia_Master",
-            total_points=110,
             trivia_points=110,
             prediction_points=0,
             games_played=8,
+            answered=8,
             accuracy=0.90
         ),
-        LeaderboardEntry(
-            rank=5,
+        Standing(
             user_id="user_demo_5",
             username="Prediction_Pro",
-            total_points=95,
             trivia_points=45,
             prediction_points=50,
             games_played=7,
+            answered=7,
             accuracy=0.75
         )
-    ]
-
-def update_leaderboard():
-    """Update leaderboard rankings"""
-    global leaderboard
-    leaderboard.sort(key=lambda x: x.total_points, reverse=True)
-    for i, entry in enumerate(leaderboard):
-        entry.rank = i + 1
+    ])
+
+def user_stats(user_id: str) -> Dict[str, int]:
+    standing = leaderboard.get(user_id)
+    stats = standing.stats() if standing is not None else {"trivia_points": 0, "prediction_points": 0, "total_points": 0}
+    # Include this user's own changes that have not been folded into the ranking yet
+    pending = score_accumulator.pending(user_id)
+    if pending is not None:
+        stats["trivia_points"] += pending.trivia
+        stats["prediction_points"] += pending.prediction
+        stats["total_points"] += pending.trivia + pending.prediction
+    return stats
 
 # Initialize gamification data
-initialize_trivia_questions()
-initialize_leaderboard()
 
 @app.post("/tools/gamification-agent")
+@fast_json
 async def gamification_agent(request: GamificationRequest):
     """Gamification agent for trivia, predictions, and leaderboard"""
     try:
         user_id = request.user_id
         action = request.action
         
-        # Initialize user score if not exists
-        if user_id not in user_scores:
-            user_scores[user_id] = {
-                "trivia_points": 0,
-                "prediction_points": 0,
-                "total_points": 0
-            }
-        
         if action == "get_trivia":
-            # Get random trivia question
-            import random
-            question = random.choice(trivia_questions)
+            # Get a random trivia question this user has not seen yet
+            question = trivia_bank.sample(user_id, sport=request.sport, difficulty=request.difficulty)
+            if not question:
+                raise HTTPException(status_code=404, detail="No trivia questions match the filters")
             
             return {
                 "agent": "gamification-agent",
                 "action": "get_trivia",
-                "question": question.dict(),
-                "user_stats": user_scores[user_id],
+                "question": question.to_dict(),
+                "user_stats": user_stats(user_id),
                 "status": "success",
                 "summary": f"Trivia question loaded: {question.question}"
             }
@@ -2766,11 +3039,7 @@ async def gamification_agent(request: GamificationRequest):
                 raise HTTPException(status_code=400, detail="Missing question_id or answer")
             
             # Find the question
-            question = None
-            for q in trivia_questions:
-                if q.question_id == question_id:
-                    question = q
-                    break
+            question = trivia_bank.get(question_id)
             
             if not question:
                 raise HTTPException(status_code=404, detail="Question not found")
@@ -2779,12 +3048,8 @@ async def gamification_agent(request: GamificationRequest):
             is_correct = answer == question.correct_answer
             points_awarded = question.points if is_correct else 0
             
-            # Update user score
-            user_scores[user_id]["trivia_points"] += points_awarded
-            user_scores[user_id]["total_points"] += points_awarded
-            
-            # Update leaderboard
-            update_leaderboard()
+            # Buffer the score change; the ranking picks it up on the next fold
+            score_accumulator.add_points(user_id, trivia=points_awarded, correct=is_correct)
             
             return {
                 "agent": "gamification-agent",
@@ -2795,7 +3060,7 @@ async def gamification_agent(request: GamificationRequest):
                     "correct_answer": question.correct_answer,
                     "explanation": f"The correct answer is: {question.options[question.correct_answer]}"
                 },
-                "user_stats": user_scores[user_id],
+                "user_stats": user_stats(user_id),
                 "status": "success",
                 "summary": f"Answer {'correct' if is_correct else 'incorrect'}! {'+' + str(points_awarded) + ' points' if points_awarded > 0 else 'No points awarded'}"
             }
@@ -2806,45 +3071,81 @@ async def gamification_agent(request: GamificationRequest):
             if not prediction_data:
                 raise HTTPException(status_code=400, detail="Missing prediction data")
             
-            # Store prediction
-            prediction = UserPrediction(
-                user_id=user_id,
-                prediction_type=prediction_data.get("type", "game_outcome"),
-                prediction_data=prediction_data,
-                timestamp=datetime.now()
-            )
-            user_predictions.append(prediction)
-            
-            # Award points for making prediction
+            # Award points for making prediction and store it; game outcomes are
+            # tied to a game so the settlement engine can score them once it is final
             points_awarded = 5
-            user_scores[user_id]["prediction_points"] += points_awarded
-            user_scores[user_id]["total_points"] += points_awarded
-            
-            # Update leaderboard
-            update_leaderboard()
+            prediction_type = prediction_data.get("type", "game_outcome")
+            game = None
+            if prediction_type == "game_outcome":
+                try:
+                    game = await run_in_threadpool(attach_game, prediction_data)
+                except InvalidGame as e:
+                    raise HTTPException(status_code=400, detail=str(e))
+                except Exception as e:
+                    print(f"Could not attach game to prediction: {e}")
+            prediction = prediction_store.add(
+                user_id,
+                prediction_type,
+                prediction_data,
+                points_awarded=points_awarded,
+                game=game
+            )
+            score_accumulator.add_points(user_id, prediction=points_awarded)
             
             return {
                 "agent": "gamification-agent",
                 "action": "make_prediction",
                 "result": {
-                    "prediction_id": f"pred_{len(user_predictions)}",
+                    "prediction_id": prediction.prediction_id,
                     "points_awarded": points_awarded,
+                    "game_pk": prediction.game_pk,
+                    "settles_for": PREDICTION_WIN_POINTS if prediction.game_pk else 0,
                     "prediction_data": prediction_data
                 },
-                "user_stats": user_scores[user_id],
+                "user_stats": user_stats(user_id),
                 "status": "success",
                 "summary": f"Prediction made successfully! +{points_awarded} points"
             }
         
+        elif action == "get_predictions":
+            # User's prediction history, newest first
+            predictions = prediction_store.for_user(user_id, limit=request.limit or 20)
+            return {
+                "agent": "gamification-agent",
+                "action": "get_predictions",
+                "predictions": [p.to_dict() for p in predictions],
+                "total": prediction_store.count_for_user(user_id),
+                "user_stats": user_stats(user_id),
+                "status": "success",
+                "summary": f"Loaded {len(predictions)} predictions"
+            }
+        
         elif action == "get_leaderboard":
-            # Get leaderboard
+            # Get leaderboard: top page, next page after a cursor, or the window around the user
+            limit = request.limit or LEADERBOARD_SIZE
+            next_cursor = None
+            if request.window is not None:
+                rows = leaderboard.around(user_id, request.window)
+            else:
+                if request.cursor:
+                    try:
+                        rows = leaderboard.page_after(decode_cursor(request.cursor), limit)
+                    except ValueError as e:
+                        raise HTTPException(status_code=400, detail=str(e))
+                else:
+                    rows = leaderboard.top(limit)
+                if len(rows) == limit:
+                    next_cursor = encode_cursor(rows[-1][1])
+            entries = [standing.to_dict(rank) for rank, standing in rows]
             return {
                 "agent": "gamification-agent",
                 "action": "get_leaderboard",
-                "leaderboard": [entry.dict() for entry in leaderboard],
-                "user_stats": user_scores[user_id],
+                "leaderboard": entries,
+                "next_cursor": next_cursor,
+                "user_rank": leaderboard.rank(user_id),
+                "user_stats": user_stats(user_id),
                 "status": "success",
-                "summary": f"Leaderboard loaded with {len(leaderboard)} entries"
+                "summary": f"Leaderboard loaded with {len(entries)} entries"
             }
         
         else:
@@ -2861,6 +3162,85 @@ async def gamification_agent(request: GamificationRequest):
             "summary": f"Gamification error: {str(e)}"
         }
 
+# Deepest rank a live leaderboard window may start at; every distinct window is re-read each tick
+LEADERBOARD_STREAM_MAX_OFFSET = 1000
+
+def _stream_window(offset: int, limit: int) -> Tuple[int, int]:
+    """Clamp a live window to the ranking's size so clients cannot open arbitrarily many distinct windows"""
+    offset = min(max(offset, 0), len(leaderboard), LEADERBOARD_STREAM_MAX_OFFSET)
+    return offset, min(max(limit, 1), LEADERBOARD_SIZE)
+
+@app.websocket("/ws/leaderboard")
+async def leaderboard_socket(
+    websocket: WebSocket,
+    offset: int = 0,
+    limit: int = 10,
+    tool_token: Optional[str] = None,
+    x_tool_token: Optional[str] = Header(None),
+):
+    """Live leaderboard window: a snapshot message, then one delta message per change tick.
+
+    Browsers cannot set headers on a WebSocket, so the token may also come as `?tool_token=`.
+    """
+    import asyncio
+
+    if not _token_ok(tool_token or x_tool_token):
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    key, queue = leaderboard_feed.subscribe(*_stream_window(offset, limit))
+
+    async def pump():
+        while True:
+            await websocket.send_text(await queue.get())
+
+    sender = asyncio.create_task(pump())
+    try:
+        while True:
+            await websocket.receive_text()  # nothing expected; returns control on disconnect
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        leaderboard_feed.unsubscribe(key, queue)
+
+@app.get("/tools/leaderboard/stream")
+async def leaderboard_stream(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=LEADERBOARD_SIZE),
+    tool_token: Optional[str] = None,
+    x_tool_token: Optional[str] = Header(None),
+):
+    """Server-Sent Events version of /ws/leaderboard, for clients without WebSockets"""
+    import asyncio
+
+    # EventSource cannot set headers either
+    _check_auth(x_tool_token, tool_token)
+    offset, limit = _stream_window(offset, limit)
+
+    async def events():
+        # Subscribe only once the client is reading, so an abandoned response leaks nothing
+        key, queue = leaderboard_feed.subscribe(offset, limit)
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {message}\n\n"
+        finally:
+            leaderboard_feed.unsubscribe(key, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+
+
+startup_report.record("import", time.perf_counter() - _import_started)
@@ -1,23 +1,41 @@
 from __future__ import annotations
 
 import logging
+import os
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import Future
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Collection, Dict, List, Optional, Tuple
 
 import requests
 
+import snapshot
+from cache import LRUCache
 from news_service import get_team_search_terms
+from statsapi_decode import ScheduleRow, StatGroup, decode_schedule, decode_team_stats, schedule_rows
+from tracing import requests_hook, span
 
 logger = logging.getLogger(__name__)
 
-STATS_API = "https://statsapi.mlb.com/api/v1"
+STATS_API = os.getenv("STATS_API", "https://statsapi.mlb.com/api/v1").rstrip("/")
 
 _session = requests.Session()
+_session.hooks["response"].append(requests_hook("statsapi"))
 _team_cache: List[dict] | None = None
+# The team index is kept for the life of a process; a snapshot of it is trusted for a day after
+# the fetch, however many workers adopt and re-save it
+_TEAMS_SNAPSHOT_TTL = 24 * 3600.0
+_team_expires_at: float = 0.0  # wall clock
 
+FINAL_STATES = {"final", "game over", "completed early"}
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class GameInfo:
     game_pk: int
     game_date: datetime
@@ -27,18 +45,52 @@ class GameInfo:
     opponent: str
     venue: Optional[str]
     status: str
+    home_score: Optional[int] = None
+    away_score: Optional[int] = None
+
+    @property
+    def is_final(self) -> bool:
+        return self.status.lower() in FINAL_STATES
+
+    @property
+    def winner(self) -> Optional[str]:
+        """Winning team name for a final game with scores, else None (ties, no scores)."""
+        if not self.is_final or self.home_score is None or self.away_score is None:
+            return None
+        if self.home_score == self.away_score:
+            return None
+        return self.home_team if self.home_score > self.away_score else self.away_team
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    # Team, venue and status names repeat across every game; keep one copy of each
+    return sys.intern(value) if value else value
 
 
 def _load_teams() -> List[dict]:
-    global _team_cache
-    if _team_cache is not None:
+    global _team_cache, _team_expires_at
+    with span("cache.teams") as sp:
+        if _team_cache is not None:
+            sp.cache = "hit"
+            return _team_cache
+        restored = snapshot.lookup("teams", "mlb")
+        if restored is not None:
+            sp.cache = "snapshot"
+            _team_cache, _team_expires_at = restored
+            return _team_cache
+        sp.cache = "miss"
+        params = {"sportId": 1, "activeStatus": "Yes"}
+        resp = _session.get(f"{STATS_API}/teams", params=params, timeout=20)
+        resp.raise_for_status()
+        data = resp.json() or {}
+        _team_cache = data.get("teams", [])
+        _team_expires_at = time.time() + _TEAMS_SNAPSHOT_TTL
         return _team_cache
-    params = {"sportId": 1, "activeStatus": "Yes"}
-    resp = _session.get(f"{STATS_API}/teams", params=params, timeout=20)
-    resp.raise_for_status()
-    data = resp.json() or {}
-    _team_cache = data.get("teams", [])
-    return _team_cache
+
+
+def preload_teams() -> int:
+    """Fetch the team index now (e.g. at startup) so the first lookup does not pay for it; returns its size."""
+    return len(_load_teams())
 
 
 def resolve_team_id(team_input: str) -> Tuple[int, str] | None:
@@ -83,35 +135,30 @@ def get_schedule(team_id: int, start: date, end: date) -> List[GameInfo]:
     }
     resp = _session.get(f"{STATS_API}/schedule", params=params, timeout=20)
     resp.raise_for_status()
-    data = resp.json() or {}
     games: List[GameInfo] = []
 
-    for d in (data.get("dates") or []):
-        for g in (d.get("games") or []):
-            game_pk = g.get("gamePk")
-            status = (g.get("status") or {}).get("detailedState") or (g.get("status") or {}).get("abstractGameState")
-            game_date = g.get("gameDate")
-            dt = datetime.fromisoformat(game_date.replace("Z", "+00:00")) if game_date else datetime.now(timezone.utc)
-            teams = g.get("teams", {})
-            home_name = (teams.get("home") or {}).get("team", {}).get("name")
-            away_name = (teams.get("away") or {}).get("team", {}).get("name")
-            is_home = (teams.get("home") or {}).get("team", {}).get("id") == team_id
-            opponent = away_name if is_home else home_name
-            venue = (g.get("venue") or {}).get("name")
-
-            if game_pk and home_name and away_name and opponent:
-                games.append(
-                    GameInfo(
-                        game_pk=game_pk,
-                        game_date=dt,
-                        home_team=home_name,
-                        away_team=away_name,
-                        is_home=is_home,
-                        opponent=opponent,
-                        venue=venue,
-                        status=status or ""
-                    )
+    for row in decode_schedule(resp.content):
+        dt = datetime.fromisoformat(row.game_date.replace("Z", "+00:00")) if row.game_date else datetime.now(timezone.utc)
+        home_name = _intern(row.home_name)
+        away_name = _intern(row.away_name)
+        is_home = row.home_id == team_id
+        opponent = away_name if is_home else home_name
+
+        if row.game_pk and home_name and away_name and opponent:
+            games.append(
+                GameInfo(
+                    game_pk=row.game_pk,
+                    game_date=dt,
+                    home_team=home_name,
+                    away_team=away_name,
+                    is_home=is_home,
+                    opponent=opponent,
+                    venue=_intern(row.venue),
+                    status=_intern(row.status) or "",
+                    home_score=row.home_score,
+                    away_score=row.away_score
                 )
+            )
     return games
 
 
@@ -119,20 +166,243 @@ def find_next_game(team_id: int, from_dt: datetime | None = None, search_days: i
     from_dt = from_dt or datetime.now(timezone.utc)
     start = from_dt.date()
     end = start + timedelta(days=search_days)
-    games = get_schedule(team_id, start, end)
-    games.sort(key=lambda g: g.game_date)
-    for g in games:
-        if g.game_date >= from_dt and g.status.lower() not in {"final", "game over"}:
+    return next_game_in(get_schedule(team_id, start, end), from_dt)
+
+
+def next_game_in(games: List[GameInfo], from_dt: datetime) -> Optional[GameInfo]:
+    """First game in `games` starting at or after `from_dt` that is not final."""
+    for g in sorted(games, key=lambda g: g.game_date):
+        if g.game_date >= from_dt and not g.is_final:
             return g
     return None
 
 
+class ScheduleBatch:
+    """Columnar schedule for many teams: one row per game across parallel arrays.
+
+    Team, venue and status names live once in lookup tables and rows refer to
+    them by index, so a full league season costs a few dozen bytes per game
+    rather than a GameInfo object each. Rows are ordered by start time, so date
+    ranges are found by bisection; `for_team` materializes GameInfo records only
+    for the rows asked for.
+    """
+
+    def __init__(self) -> None:
+        self.game_pk = array("q")
+        self.start = array("d")  # UTC epoch seconds
+        self.home = array("H")  # indices into team_ids / team_names
+        self.away = array("H")
+        self.venue = array("H")  # index into venues
+        self.status = array("H")  # index into statuses
+        self.home_score = array("h")  # -1 when unknown
+        self.away_score = array("h")
+        self.team_ids: List[int] = []
+        self.team_names: List[str] = []
+        self.venues: List[Optional[str]] = []
+        self.statuses: List[str] = []
+        self._team_index: Dict[int, int] = {}
+        self._venue_index: Dict[Optional[str], int] = {}
+        self._status_index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.game_pk)
+
+    def _team(self, team_id: int, name: str) -> int:
+        idx = self._team_index.get(team_id)
+        if idx is None:
+            idx = self._team_index[team_id] = len(self.team_ids)
+            self.team_ids.append(team_id)
+            self.team_names.append(sys.intern(name))
+        return idx
+
+    @staticmethod
+    def _code(table: List[Any], index: Dict[Any, int], value: Any) -> int:
+        idx = index.get(value)
+        if idx is None:
+            idx = index[value] = len(table)
+            table.append(value)
+        return idx
+
+    @classmethod
+    def from_payload(cls, data: Dict[str, Any]) -> "ScheduleBatch":
+        """Build from a parsed statsapi /schedule response (any number of teams)."""
+        return cls.from_rows(schedule_rows(data))
+
+    @classmethod
+    def from_json(cls, raw: bytes) -> "ScheduleBatch":
+        """Build straight from a raw /schedule response body."""
+        return cls.from_rows(decode_schedule(raw))
+
+    @classmethod
+    def from_rows(cls, schedule: List[ScheduleRow]) -> "ScheduleBatch":
+        rows = []
+        for r in schedule:
+            if not (r.game_pk and r.home_id and r.away_id and r.home_name and r.away_name):
+                continue
+            dt = datetime.fromisoformat(r.game_date.replace("Z", "+00:00")) if r.game_date else datetime.now(timezone.utc)
+            rows.append((
+                dt.timestamp(), r.game_pk, r.home_id, r.home_name, r.away_id, r.away_name,
+                r.venue, r.status or "", r.home_score, r.away_score,
+            ))
+        rows.sort(key=lambda r: (r[0], r[1]))
+        batch = cls()
+        for ts, pk, home_id, home_name, away_id, away_name, venue, status, home_score, away_score in rows:
+            batch.game_pk.append(pk)
+            batch.start.append(ts)
+            batch.home.append(batch._team(home_id, home_name))
+            batch.away.append(batch._team(away_id, away_name))
+            batch.venue.append(cls._code(batch.venues, batch._venue_index, _intern(venue)))
+            batch.status.append(cls._code(batch.statuses, batch._status_index, _intern(status)))
+            batch.home_score.append(-1 if home_score is None else home_score)
+            batch.away_score.append(-1 if away_score is None else away_score)
+        return batch
+
+    def rows_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> range:
+        """Row indices with start time in [start, end]."""
+        lo = bisect_left(self.start, start.timestamp()) if start else 0
+        hi = bisect_right(self.start, end.timestamp()) if end else len(self.start)
+        return range(lo, hi)
+
+    def rows_for_team(self, team_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[int]:
+        idx = self._team_index.get(team_id)
+        if idx is None:
+            return []
+        home, away = self.home, self.away
+        return [i for i in self.rows_between(start, end) if home[i] == idx or away[i] == idx]
+
+    def game(self, row: int, team_id: int) -> GameInfo:
+        """Row `row` as a GameInfo seen from `team_id`'s side."""
+        home_name = self.team_names[self.home[row]]
+        away_name = self.team_names[self.away[row]]
+        is_home = self.team_ids[self.home[row]] == team_id
+        home_score, away_score = self.home_score[row], self.away_score[row]
+        return GameInfo(
+            game_pk=self.game_pk[row],
+            game_date=datetime.fromtimestamp(self.start[row], tz=timezone.utc),
+            home_team=home_name,
+            away_team=away_name,
+            is_home=is_home,
+            opponent=away_name if is_home else home_name,
+            venue=self.venues[self.venue[row]],
+            status=self.statuses[self.status[row]],
+            home_score=None if home_score < 0 else home_score,
+            away_score=None if away_score < 0 else away_score,
+        )
+
+    def for_team(self, team_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[GameInfo]:
+        return [self.game(i, team_id) for i in self.rows_for_team(team_id, start, end)]
+
+    def for_games(self, game_pks: Collection[int]) -> List[GameInfo]:
+        """GameInfo (from the home side) for the rows whose game_pk is in `game_pks`."""
+        return [self.game(i, self.team_ids[self.home[i]]) for i, pk in enumerate(self.game_pk) if pk in game_pks]
+
+    def nbytes(self) -> int:
+        """Bytes held by the row arrays (lookup tables excluded)."""
+        columns = (self.game_pk, self.start, self.home, self.away, self.venue, self.status, self.home_score, self.away_score)
+        return sum(c.itemsize * len(c) for c in columns)
+
+
+_LEAGUE_TTL = 300.0
+_league_cache: LRUCache[ScheduleBatch] = LRUCache(maxsize=32, ttl=_LEAGUE_TTL)
+_league_inflight: Dict[Tuple[date, date], "Future[ScheduleBatch]"] = {}
+_league_lock = threading.Lock()
+
+
+def get_league_schedule(start: date, end: date) -> ScheduleBatch:
+    """Every MLB game between `start` and `end` in one call, cached for a few minutes.
+
+    Meant for fixed windows shared by many callers (settlement asks for one or
+    two days at a time); per-team lookups go through `get_schedule`. Threads
+    missing the same window at once share one fetch.
+    """
+    key = (start, end)
+    with span("cache.league_schedule") as sp:
+        batch = _league_cache.get(key)
+        if batch is not None:
+            sp.cache = "hit"
+            return batch
+        restored = snapshot.lookup("league_schedule", key)
+        if restored is not None:
+            sp.cache = "snapshot"
+            batch, expiry = restored
+            _league_cache.put(key, batch, stored_at=snapshot.stored_at(expiry, _LEAGUE_TTL))
+            return batch
+        with _league_lock:
+            # A fetch that finished since the lookup above has already filled the cache
+            batch = _league_cache.get(key)
+            pending = _league_inflight.get(key)
+            owner = batch is None and pending is None
+            if owner:
+                pending = _league_inflight[key] = Future()
+        if batch is not None:
+            sp.cache = "hit"
+            return batch
+        if not owner:
+            sp.cache = "shared"
+            return pending.result()
+        sp.cache = "miss"
+        try:
+            params = {"sportId": 1, "startDate": start.isoformat(), "endDate": end.isoformat()}
+            resp = _session.get(f"{STATS_API}/schedule", params=params, timeout=30)
+            resp.raise_for_status()
+            batch = ScheduleBatch.from_json(resp.content)
+            _league_cache.put(key, batch)
+            pending.set_result(batch)
+            return batch
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with _league_lock:
+                _league_inflight.pop(key, None)
+
+
+_league_stats_cache: Dict[int, Tuple[float, List[StatGroup]]] = {}
+
+
+def get_league_stats(season: int) -> List[StatGroup]:
+    """Season hitting/pitching stat groups for every team (`GET /teams/stats`), cached for a few minutes.
+
+    One call serves both sides of a comparison and every team after it.
+    """
+    now = time.monotonic()
+    with span("cache.league_stats") as sp:
+        with _league_lock:
+            cached = _league_stats_cache.get(season)
+        if cached is not None and now - cached[0] < _LEAGUE_TTL:
+            sp.cache = "hit"
+            return cached[1]
+        restored = snapshot.lookup("league_stats", season)
+        if restored is not None:
+            sp.cache = "snapshot"
+            groups, expiry = restored
+            with _league_lock:
+                _league_stats_cache[season] = (snapshot.stored_at(expiry, _LEAGUE_TTL), groups)
+            return groups
+        sp.cache = "miss"
+        params_list = [
+            ("group", "hitting"),
+            ("group", "pitching"),
+            ("stats", "season"),
+            ("season", season),
+            ("sportId", 1),
+        ]
+        resp = _session.get(f"{STATS_API}/teams/stats", params=params_list, timeout=20)
+        resp.raise_for_status()
+        groups = decode_team_stats(resp.content)
+        with _league_lock:
+            _league_stats_cache[season] = (now, groups)
+        return groups
+
+
 def get_team_stats(team_id: int, season: int | None = None) -> dict:
     """Return aggregated team stats for hitting and pitching.
 
     Primary source: `GET /teams/stats` with groups [hitting, pitching]. This endpoint
-    returns league-wide splits; we filter by the provided `team_id`.
-    Fallbacks: `/teams/{teamId}/stats` and a hydrate call via `/teams`.
+    returns league-wide splits (cached, see `get_league_stats`); we filter by the provided `team_id`.
+    Fallbacks: `/teams/{teamId}/stats` and a hydrate call via `/teams`. The stats
+    endpoints are decoded straight to the fields compare_teams reads
+    (`statsapi_decode.STAT_FIELDS`).
     """
     if season is None:
         season = datetime.now().year
@@ -147,22 +417,11 @@ def get_team_stats(team_id: int, season: int | None = None) -> dict:
 
     # Primary: league endpoint; filter to our team
     try:
-        resp = _session.get(f"{STATS_API}/teams/stats", params=params_list, timeout=20)
-        resp.raise_for_status()
-        data = resp.json() or {}
-        results = (data.get("stats") or [])
-        for r in results:
-            group = (r.get("group") or {}).get("displayName")
+        for group, splits in get_league_stats(season):
             if not group:
                 continue
-            splits = r.get("splits") or []
             # Find the split for our team
-            team_stat: dict = {}
-            for sp in splits:
-                team_obj = (sp.get("team") or {})
-                if team_obj.get("id") == team_id:
-                    team_stat = (sp.get("stat") or {})
-                    break
+            team_stat = next((stat for split_team, stat in splits if split_team == team_id), {})
             if team_stat:
                 out[group.lower()] = team_stat
         if out.get("hitting") or out.get("pitching"):
@@ -174,17 +433,8 @@ def get_team_stats(team_id: int, season: int | None = None) -> dict:
     try:
         resp = _session.get(f"{STATS_API}/teams/{team_id}/stats", params=params_list, timeout=20)
         resp.raise_for_status()
-        data = resp.json() or {}
-        results = (data.get("stats") or [])
-        for r in results:
-            group = (r.get("group") or {}).get("displayName")
-            splits = r.get("splits") or []
-            totals: dict = {}
-            for s in splits:
-                st = (s or {}).get("stat") or {}
-                if st:
-                    totals = st
-                    break
+        for group, splits in decode_team_stats(resp.content):
+            totals = next((stat for _, stat in splits if stat), {})
             if group:
                 out[group.lower()] = totals
         if out.get("hitting") or out.get("pitching"):
@@ -256,3 +506,23 @@ def compare_teams(team1_id: int, team2_id: int, season: int | None = None) -> di
         },
     }
     return comparison
+
+
+def _team_entries() -> List[snapshot.Entry]:
+    if _team_cache is None or _team_expires_at <= time.time():
+        return []
+    return [("mlb", _team_cache, _team_expires_at)]
+
+
+def _league_entries(cache: Dict[Any, Tuple[float, Any]]) -> List[snapshot.Entry]:
+    with _league_lock:
+        items = list(cache.items())
+    now = time.monotonic()
+    return [(key, value, snapshot.expires_at(stored, _LEAGUE_TTL)) for key, (stored, value) in items if now - stored < _LEAGUE_TTL]
+
+
+snapshot.register("teams", _team_entries)
+snapshot.register("league_schedule", lambda: [
+    (key, batch, snapshot.expires_at(stored, _LEAGUE_TTL)) for key, batch, stored in _league_cache.items()
+], limit=_league_cache.maxsize)
+snapshot.register("league_stats", lambda: _league_entries(_league_stats_cache))
@@ -1,18 +1,37 @@
 from __future__ import annotations
 
 import logging
+import os
+import sys
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import List, Optional
 
-from newsapi import NewsApiClient
+import requests
 
 from config import settings
+from tracing import requests_hook
 
 logger = logging.getLogger(__name__)
 
+_NEWS_API_DEFAULT = "https://newsapi.org/v2"
+NEWS_API_URL = os.getenv("NEWS_API_URL", _NEWS_API_DEFAULT).rstrip("/")
 
-@dataclass
+
+class _NewsSession(requests.Session):
+    """Session handed to NewsApiClient; rebases its fixed URLs onto NEWS_API_URL."""
+
+    def request(self, method, url, *args, **kwargs):  # type: ignore[override]
+        if NEWS_API_URL != _NEWS_API_DEFAULT and isinstance(url, str) and url.startswith(_NEWS_API_DEFAULT):
+            url = NEWS_API_URL + url[len(_NEWS_API_DEFAULT):]
+        return super().request(method, url, *args, **kwargs)
+
+
+_session = _NewsSession()
+_session.hooks["response"].append(requests_hook("newsapi"))
+
+
+@dataclass(frozen=True, slots=True)
 class NewsArticle:
     title: str
     description: str
@@ -35,7 +54,10 @@ class NewsService:
             logger.warning("NEWS_API_KEY not found in environment variables")
             self.client = None
         else:
-            self.client = NewsApiClient(api_key=self.api_key)
+            # Imported on first use: newsapi is only needed once a key is configured
+            from newsapi import NewsApiClient
+
+            self.client = NewsApiClient(api_key=self.api_key, session=_session)
 
     def search_team_news(
         self,
@@ -75,7 +97,7 @@ class NewsService:
                             title=article_data.get('title') or '',
                             description=article_data.get('description') or '',
                             url=article_data.get('url') or '',
-                            source=(article_data.get('source') or {}).get('name') or 'Unknown',
+                            source=sys.intern((article_data.get('source') or {}).get('name') or 'Unknown'),
                             published_at=dt,
                             url_to_image=article_data.get('urlToImage'),
                         )
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidCursor(ValueError):
+    """The cursor is malformed or belongs to a different query."""
+
+
+class ExpiredCursor(InvalidCursor):
+    """The result set the cursor walks has expired (or was rebuilt); start again from the first page."""
+
+
+@dataclass
+class ResultSet:
+    generation: int
+    response: Dict[str, Any]
+
+
+def _set_id(key: Any) -> str:
+    return hashlib.blake2b(repr(key).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _generation(response: Dict[str, Any]) -> int:
+    """Content hash of a computed response, so equal sets agree on it in every worker and others never do."""
+    raw = json.dumps(response, sort_keys=True, default=str, separators=(",", ":")).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "big")
+
+
+def encode_cursor(set_id: str, generation: int, offset: int) -> str:
+    raw = f"{set_id}.{generation}.{offset}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int, int]:
+    """(set id, generation, offset) of a cursor from `encode_cursor`."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        set_id, generation, offset = raw.split(".")
+        return set_id, int(generation), int(offset)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"Malformed cursor: {cursor!r}") from e
+
+
+class ResultPages:
+    """Opaque-cursor pagination over cached result sets.
+
+    The first page of a query computes its full response once and caches it
+    (for `ttl` seconds, at most `maxsize` sets); that page and every later one
+    are slices of the cached list, so walking deeper never refetches. A cursor
+    names the set, a hash of the set's content and an offset. Once the set
+    expires, or this worker (or another one behind the same load balancer)
+    holds different content for it, its cursors raise ExpiredCursor. Concurrent
+    first pages of the same query share one compute.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = 300.0) -> None:
+        self.sets: LRUCache[ResultSet] = LRUCache(maxsize, ttl)
+        self._inflight: Dict[str, "asyncio.Future[ResultSet]"] = {}
+
+    async def page(
+        self,
+        key: Any,
+        field: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+        cursor: Optional[str],
+        limit: int,
+    ) -> Dict[str, Any]:
+        """One page of `compute()`'s response: `field` cut to `limit` items, plus "next_cursor" and "total".
+
+        `key` identifies the query (everything but the cursor and page size; its
+        repr is hashed).
+        Responses whose `field` is not a list come back whole, with no cursor.
+        """
+        set_id = _set_id(key)
+        if cursor:
+            cursor_set, generation, offset = decode_cursor(cursor)
+            if cursor_set != set_id:
+                raise InvalidCursor("Cursor belongs to a different query")
+            result = self.sets.get(set_id)
+            if result is None or result.generation != generation:
+                raise ExpiredCursor("Cursor expired; request the first page again")
+        else:
+            offset = 0
+            result = self.sets.get(set_id)
+            if result is None:
+                result = await self._build(set_id, compute)
+
+        items = result.response.get(field)
+        if not isinstance(items, (list, tuple)):
+            return {**result.response, "next_cursor": None}
+        offset = max(offset, 0)
+        end = offset + limit
+        next_cursor = encode_cursor(set_id, result.generation, end) if end < len(items) else None
+        return {**result.response, field: items[offset:end], "next_cursor": next_cursor, "total": len(items)}
+
+    async def _build(self, set_id: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> ResultSet:
+        """Compute and cache a missing (or expired) set; callers arriving meanwhile wait for the same one."""
+        pending = self._inflight.get(set_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future: "asyncio.Future[ResultSet]" = asyncio.get_running_loop().create_future()
+        self._inflight[set_id] = future
+        try:
+            response = await compute()
+            result = ResultSet(_generation(response), response)
+            self.sets.put(set_id, result)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            self._inflight.pop(set_id, None)
+            if not future.done():
+                future.cancel()
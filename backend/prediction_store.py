@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ("open", "won", "lost", "void")
+OPEN, WON, LOST, VOID = range(4)
+
+
+def new_prediction_id() -> str:
+    """Time-ordered unique id: millisecond timestamp plus random suffix (safe across workers/restarts)."""
+    return f"pred_{int(time.time() * 1000):011x}{secrets.token_hex(3)}"
+
+
+@dataclass
+class Prediction:
+    prediction_id: str
+    user_id: str
+    prediction_type: str
+    prediction_data: Dict[str, Any]
+    timestamp: datetime
+    status: str = "open"
+    points_awarded: int = 0
+    # Game the prediction is settled against (game_outcome predictions only)
+    game_pk: Optional[int] = None
+    team_id: Optional[int] = None
+    game_date: Optional[str] = None
+    pick: Optional[str] = None
+    settled_points: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "prediction_id": self.prediction_id,
+            "user_id": self.user_id,
+            "prediction_type": self.prediction_type,
+            "prediction_data": self.prediction_data,
+            "timestamp": self.timestamp.isoformat(),
+            "status": self.status,
+            "points_awarded": self.points_awarded + self.settled_points,
+            "game_pk": self.game_pk,
+        }
+
+    def to_record(self) -> Dict[str, Any]:
+        rec: Dict[str, Any] = {
+            "op": "add",
+            "id": self.prediction_id,
+            "user_id": self.user_id,
+            "type": self.prediction_type,
+            "data": self.prediction_data,
+            "ts": self.timestamp.isoformat(),
+            "points": self.points_awarded,
+        }
+        if self.game_pk is not None:
+            rec["game"] = [self.game_pk, self.team_id, self.game_date, self.pick]
+        return rec
+
+    @classmethod
+    def from_record(cls, rec: Dict[str, Any]) -> "Prediction":
+        game_pk, team_id, game_date, pick = rec.get("game") or (None, None, None, None)
+        return cls(
+            prediction_id=rec["id"],
+            user_id=rec["user_id"],
+            prediction_type=rec.get("type") or "game_outcome",
+            prediction_data=rec.get("data") or {},
+            timestamp=datetime.fromisoformat(rec["ts"]),
+            points_awarded=rec.get("points") or 0,
+            game_pk=game_pk,
+            team_id=team_id,
+            game_date=game_date,
+            pick=pick,
+        )
+
+
+class PredictionStore:
+    """Append-only prediction log with a per-user offset index and a bounded hot window.
+
+    Every prediction is one JSON line in `path`. Memory holds only the byte
+    offsets of each user's predictions (8 bytes apiece) plus the `hot_size` most
+    recent Prediction objects; older history is read back from the log by offset,
+    so a user's history never requires scanning other users' predictions.
+
+    Open predictions tied to a game are also indexed by game_pk; settling a game
+    appends one record with every outcome and updates per-user status arrays.
+    """
+
+    def __init__(self, path: str, hot_size: int = 10_000) -> None:
+        self.path = path
+        self.hot_size = hot_size
+        self._by_user: Dict[str, array] = {}
+        # Parallel to _by_user: status code and settlement points per prediction
+        self._status: Dict[str, bytearray] = {}
+        self._settled: Dict[str, array] = {}
+        # game_pk -> [(user_id, index into the user's arrays, pick)] for open predictions
+        self._open_by_game: Dict[int, List[Tuple[str, int, Optional[str]]]] = {}
+        self._game_meta: Dict[int, Tuple[Optional[int], Optional[str]]] = {}
+        # log offset -> Prediction for the most recent `hot_size` predictions
+        self._hot: "OrderedDict[int, Prediction]" = OrderedDict()
+        self._writer: Optional[BinaryIO] = None
+        self._reader: Optional[BinaryIO] = None
+        self._end = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def open(self) -> int:
+        """Rebuild the index from the log and open it for appending; returns predictions found."""
+        with self._lock:
+            if self._writer is not None:
+                return self._count
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            if os.path.exists(self.path):
+                self._replay()
+            self._writer = open(self.path, "ab")
+            self._reader = open(self.path, "rb")
+            return self._count
+
+    def _replay(self) -> None:
+        offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                start, offset = offset, offset + len(line)
+                if not line.endswith(b"\n"):
+                    # torn final write from a crash; drop it and overwrite on next append
+                    logger.warning("Truncating partial record at offset %d in %s", start, self.path)
+                    with open(self.path, "r+b") as w:
+                        w.truncate(start)
+                    offset = start
+                    break
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    logger.warning("Skipping corrupt prediction record at offset %d", start)
+                    continue
+                self._apply(rec, start)
+        self._end = offset
+        logger.info("Loaded %d predictions for %d users from %s", self._count, len(self._by_user), self.path)
+
+    def _apply(self, rec: Dict[str, Any], offset: int) -> None:
+        op = rec.get("op")
+        if op == "add":
+            self._index(Prediction.from_record(rec), offset)
+        elif op == "settle":
+            self._apply_settlement(rec["game_pk"], rec["results"])
+
+    def _index(self, prediction: Prediction, offset: int) -> None:
+        user_id = prediction.user_id
+        offsets = self._by_user.setdefault(user_id, array("q"))
+        offsets.append(offset)
+        self._status.setdefault(user_id, bytearray()).append(OPEN)
+        self._settled.setdefault(user_id, array("i")).append(0)
+        if prediction.game_pk is not None:
+            self._open_by_game.setdefault(prediction.game_pk, []).append((user_id, len(offsets) - 1, prediction.pick))
+            # The latest prediction's schedule lookup wins, so a rescheduled game follows its new date
+            self._game_meta[prediction.game_pk] = (prediction.team_id, prediction.game_date)
+        self._count += 1
+        self._remember(prediction, offset)
+
+    def _apply_settlement(self, game_pk: int, results: List[List[Any]]) -> None:
+        for user_id, idx, status, points in results:
+            statuses = self._status.get(user_id)
+            if statuses is not None and idx < len(statuses):
+                statuses[idx] = status
+                self._settled[user_id][idx] = points
+        self._open_by_game.pop(game_pk, None)
+        self._game_meta.pop(game_pk, None)
+
+    def _remember(self, prediction: Prediction, offset: int) -> None:
+        self._hot[offset] = prediction
+        while len(self._hot) > self.hot_size:
+            self._hot.popitem(last=False)
+
+    def _append(self, rec: Dict[str, Any]) -> int:
+        line = (json.dumps(rec, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+        offset = self._end
+        self._writer.write(line)  # type: ignore[union-attr]
+        self._writer.flush()  # type: ignore[union-attr]
+        self._end += len(line)
+        return offset
+
+    def add(
+        self,
+        user_id: str,
+        prediction_type: str,
+        prediction_data: Dict[str, Any],
+        points_awarded: int = 0,
+        game: Optional[Tuple[int, Optional[int], Optional[str], Optional[str]]] = None,
+    ) -> Prediction:
+        """Append a prediction; `game` is (game_pk, team_id, game date, picked winner) for settlement."""
+        if self._writer is None:
+            self.open()
+        game_pk, team_id, game_date, pick = game or (None, None, None, None)
+        prediction = Prediction(
+            prediction_id=new_prediction_id(),
+            user_id=user_id,
+            prediction_type=prediction_type,
+            prediction_data=prediction_data,
+            timestamp=datetime.now(),
+            points_awarded=points_awarded,
+            game_pk=game_pk,
+            team_id=team_id,
+            game_date=game_date,
+            pick=pick,
+        )
+        with self._lock:
+            offset = self._append(prediction.to_record())
+            self._index(prediction, offset)
+        return prediction
+
+    def open_games(self) -> Dict[int, Tuple[Optional[int], Optional[str]]]:
+        """game_pk -> (team_id, game date) for games with unsettled predictions."""
+        with self._lock:
+            return dict(self._game_meta)
+
+    def open_count(self, game_pk: int) -> int:
+        return len(self._open_by_game.get(game_pk, ()))
+
+    def settle_game(self, game_pk: int, winner: Optional[str], points: int) -> List[Tuple[str, Optional[bool], int]]:
+        """Resolve every open prediction on `game_pk` in one log write.
+
+        `winner` is the winning team name, or None to void the game (tie, cancelled).
+        Returns (user_id, correct or None if void, points) per settled prediction.
+        """
+        with self._lock:
+            entries = self._open_by_game.get(game_pk)
+            if not entries:
+                return []
+            results: List[List[Any]] = []
+            outcomes: List[Tuple[str, Optional[bool], int]] = []
+            for user_id, idx, pick in entries:
+                if winner is None or pick is None:
+                    results.append([user_id, idx, VOID, 0])
+                    outcomes.append((user_id, None, 0))
+                elif pick == winner:
+                    results.append([user_id, idx, WON, points])
+                    outcomes.append((user_id, True, points))
+                else:
+                    results.append([user_id, idx, LOST, 0])
+                    outcomes.append((user_id, False, 0))
+            self._append({"op": "settle", "game_pk": game_pk, "winner": winner, "ts": time.time(), "results": results})
+            self._apply_settlement(game_pk, results)
+            return outcomes
+
+    def _read_at(self, offset: int) -> Optional[Prediction]:
+        prediction = self._hot.get(offset)
+        if prediction is not None:
+            return prediction
+        self._reader.seek(offset)  # type: ignore[union-attr]
+        line = self._reader.readline()  # type: ignore[union-attr]
+        try:
+            return Prediction.from_record(json.loads(line))
+        except (ValueError, KeyError):
+            logger.warning("Unreadable prediction record at offset %d", offset)
+            return None
+
+    def count_for_user(self, user_id: str) -> int:
+        return len(self._by_user.get(user_id, ()))
+
+    def for_user(self, user_id: str, limit: int = 20, offset: int = 0) -> List[Prediction]:
+        """The user's predictions, newest first, skipping the `offset` most recent."""
+        if self._writer is None:
+            self.open()
+        with self._lock:
+            offsets = self._by_user.get(user_id)
+            if not offsets:
+                return []
+            statuses = self._status[user_id]
+            settled = self._settled[user_id]
+            end = len(offsets) - offset
+            out = []
+            for i in range(end - 1, max(end - limit, 0) - 1, -1):
+                prediction = self._read_at(offsets[i])
+                if prediction is not None:
+                    prediction.status = STATUSES[statuses[i]]
+                    prediction.settled_points = settled[i]
+                    out.append(prediction)
+            return out
+
+    def close(self) -> None:
+        with self._lock:
+            for fh in (self._writer, self._reader):
+                if fh is not None:
+                    fh.close()
+            self._writer = self._reader = None
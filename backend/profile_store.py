@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cache import LRUCache
+from write_behind import WriteBehind, connect
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("user_id", "favorite_team", "sport", "preferences", "created_at", "last_updated", "version")
+
+
+class ProfileStore:
+    """User profiles on SQLite (WAL) behind an in-process LRU cache, written behind.
+
+    `model` builds profile objects from the FIELDS keyword arguments (the API's
+    UserProfile). Profiles are treated as immutable: every change produces a new
+    object with `version` bumped, so cached objects handed out are never mutated.
+    The cache `ttl` bounds how long a worker can serve a profile another worker
+    has since changed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        model: Callable[..., Any],
+        cache_size: int = 100_000,
+        ttl: Optional[float] = 30.0,
+        flush_interval: float = 0.5,
+    ) -> None:
+        self.path = path
+        self.model = model
+        self.cache: LRUCache[Any] = LRUCache(cache_size, ttl)
+        self._conn = None
+        self._db_lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._writer = WriteBehind(self._write, "profile-writer", flush_interval)
+
+    def _db(self) -> Any:
+        # Opened lazily so importing the app does not touch disk
+        if self._conn is None:
+            with self._db_lock:
+                if self._conn is None:
+                    conn = connect(self.path)
+                    conn.execute(
+                        """CREATE TABLE IF NOT EXISTS profiles (
+                            user_id TEXT PRIMARY KEY,
+                            favorite_team TEXT NOT NULL,
+                            sport TEXT NOT NULL,
+                            preferences TEXT NOT NULL,
+                            created_at TEXT NOT NULL,
+                            last_updated TEXT NOT NULL,
+                            version INTEGER NOT NULL
+                        )"""
+                    )
+                    self._conn = conn
+        return self._conn
+
+    def _to_row(self, profile: Any) -> Tuple[Any, ...]:
+        return (
+            profile.user_id,
+            profile.favorite_team,
+            profile.sport,
+            json.dumps(profile.preferences, default=str),
+            profile.created_at.isoformat(),
+            profile.last_updated.isoformat(),
+            profile.version,
+        )
+
+    def _from_row(self, row: Tuple[Any, ...]) -> Any:
+        user_id, team, sport, prefs, created, updated, version = row
+        return self.model(
+            user_id=user_id,
+            favorite_team=team,
+            sport=sport,
+            preferences=json.loads(prefs),
+            created_at=datetime.fromisoformat(created),
+            last_updated=datetime.fromisoformat(updated),
+            version=version,
+        )
+
+    def _write(self, rows: List[Tuple[Any, ...]]) -> None:
+        conn = self._db()
+        with self._db_lock:
+            conn.execute("BEGIN")
+            try:
+                # Never let a slower worker overwrite a newer version
+                conn.executemany(
+                    f"INSERT INTO profiles ({', '.join(FIELDS)}) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET favorite_team=excluded.favorite_team, "
+                    "sport=excluded.sport, preferences=excluded.preferences, last_updated=excluded.last_updated, "
+                    "version=excluded.version WHERE excluded.version > profiles.version",
+                    rows,
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _load(self, user_id: str) -> Optional[Any]:
+        pending = self._writer.get(user_id)
+        if pending is not None:
+            return self._from_row(pending)
+        conn = self._db()
+        with self._db_lock:
+            row = conn.execute(
+                f"SELECT {', '.join(FIELDS)} FROM profiles WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return self._from_row(row) if row else None
+
+    def get(self, user_id: str) -> Optional[Any]:
+        profile = self.cache.get(user_id)
+        if profile is None:
+            profile = self._load(user_id)
+            if profile is not None:
+                self.cache.put(user_id, profile)
+        return profile
+
+    def _save(self, profile: Any) -> Any:
+        self.cache.put(profile.user_id, profile)
+        self._writer.put(profile.user_id, self._to_row(profile))
+        return profile
+
+    def upsert(self, user_id: str, favorite_team: str, sport: str, preferences: Dict[str, Any]) -> Any:
+        """Create or replace a profile, keeping created_at; the version only moves on a real change."""
+        with self._update_lock:
+            current = self.get(user_id)
+            if current is not None and (current.favorite_team, current.sport, current.preferences) == (
+                favorite_team, sport, preferences
+            ):
+                return current
+            now = datetime.now()
+            return self._save(self.model(
+                user_id=user_id,
+                favorite_team=favorite_team,
+                sport=sport,
+                preferences=dict(preferences),
+                created_at=current.created_at if current else now,
+                last_updated=now,
+                version=current.version + 1 if current else 1,
+            ))
+
+    def update_preferences(self, user_id: str, preferences: Dict[str, Any]) -> Optional[Any]:
+        """Merge `preferences` into the profile as a new version; None if the user is unknown."""
+        with self._update_lock:
+            current = self.get(user_id)
+            if current is None:
+                return None
+            return self._save(self.model(
+                user_id=user_id,
+                favorite_team=current.favorite_team,
+                sport=current.sport,
+                preferences={**current.preferences, **preferences},
+                created_at=current.created_at,
+                last_updated=datetime.now(),
+                version=current.version + 1,
+            ))
+
+    def start(self) -> "ProfileStore":
+        self._writer.start()
+        return self
+
+    def close(self) -> None:
+        self._writer.close()
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+TOKEN_HEADER = b"x-tool-token"
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+Frame = Tuple[str, str, int]  # (function, file, first line)
+
+
+def _frame_key(frame: Any) -> Frame:
+    code = frame.f_code
+    return (code.co_name, code.co_filename, code.co_firstlineno)
+
+
+def _walk(frame: Any) -> List[Frame]:
+    """Root-first list of frames for a thread's current top frame."""
+    out: List[Frame] = []
+    while frame is not None:
+        out.append(_frame_key(frame))
+        frame = frame.f_back
+    out.reverse()
+    return out
+
+
+def _in_app(stack: List[Frame]) -> bool:
+    return any(f[1].startswith(_APP_DIR) for f in stack)
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler over all threads and pending event-loop tasks.
+
+    A daemon thread snapshots `sys._current_frames()` every `interval` seconds.
+    Suspended asyncio tasks are sampled through `Task.get_stack()` so time spent
+    awaiting upstream calls shows up too. When `task` is given only that task
+    (plus worker threads running app code) is sampled, which is how a single
+    request is profiled.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        task: Optional[asyncio.Task] = None,
+    ) -> None:
+        self.interval = interval
+        self.loop = loop
+        self.task = task
+        self.loop_thread_id = threading.get_ident() if loop is not None else None
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample(own)
+            except Exception:  # pragma: no cover
+                logger.debug("profiler sample failed", exc_info=True)
+
+    def _sample(self, own: int) -> None:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        frames = sys._current_frames()
+        self.sample_count += 1
+        loop_tid = self.loop_thread_id
+        running = None
+        if self.loop is not None:
+            try:
+                running = asyncio.current_task(self.loop)
+            except RuntimeError:
+                running = None
+
+        for tid, frame in frames.items():
+            if tid == own:
+                continue
+            stack = _walk(frame)
+            if tid == loop_tid:
+                if self.task is not None and running is not self.task:
+                    continue
+                label = "event-loop"
+            else:
+                if self.task is not None and not _in_app(stack):
+                    continue
+                label = f"thread:{names.get(tid, tid)}"
+            self.samples[(label, *stack)] += 1
+
+        if self.loop is None:
+            return
+        if self.task is not None:
+            tasks = [self.task] if running is not self.task and not self.task.done() else []
+        else:
+            try:
+                tasks = [t for t in asyncio.all_tasks(self.loop) if t is not running]
+            except RuntimeError:
+                # the task set changed under us; skip this round
+                return
+        for t in tasks:
+            stack = [_frame_key(f) for f in t.get_stack()]
+            if stack:
+                self.samples[(f"task:{t.get_name()}", *stack)] += 1
+
+    def collapsed(self) -> str:
+        """Brendan Gregg collapsed-stack format, suitable for flamegraph.pl / speedscope."""
+        lines = []
+        for stack, count in self.samples.most_common():
+            label, frames = stack[0], stack[1:]
+            parts = [label] + [f"{name} ({os.path.basename(path)}:{line})" for name, path, line in frames]
+            lines.append(f"{';'.join(parts)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str = "profile") -> Dict[str, Any]:
+        """Speedscope file-format document with one sampled profile per thread/task label."""
+        frame_index: Dict[Frame, int] = {}
+        shared: List[Dict[str, Any]] = []
+        by_label: Dict[str, Tuple[List[List[int]], List[float]]] = {}
+        for stack, count in self.samples.items():
+            label, frames = stack[0], stack[1:]
+            idx = []
+            for f in frames:
+                if f not in frame_index:
+                    frame_index[f] = len(shared)
+                    shared.append({"name": f[0], "file": f[1], "line": f[2]})
+                idx.append(frame_index[f])
+            samples, weights = by_label.setdefault(label, ([], []))
+            samples.append(idx)
+            weights.append(count * self.interval)
+        profiles = []
+        for label, (samples, weights) in sorted(by_label.items()):
+            profiles.append({
+                "type": "sampled",
+                "name": label,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "sports-intel-backend",
+            "activeProfileIndex": 0,
+            "shared": {"frames": shared},
+            "profiles": profiles,
+        }
+
+    def render(self, fmt: str, name: str = "profile") -> Tuple[Any, str]:
+        """Return (content, media type) for `fmt` in {"collapsed", "speedscope"}."""
+        if fmt == "speedscope":
+            return self.speedscope(name), "application/json"
+        return self.collapsed(), "text/plain"
+
+
+async def profile_for(seconds: float, interval: float = 0.005) -> SamplingProfiler:
+    """Sample the whole process for `seconds` without blocking the event loop."""
+    profiler = SamplingProfiler(interval=interval, loop=asyncio.get_running_loop()).start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.stop()
+    return profiler
+
+
+class ProfileStore:
+    """Keeps the most recent per-request profiles for later download."""
+
+    def __init__(self, max_items: int = 20) -> None:
+        self.max_items = max_items
+        self._items: "OrderedDict[str, SamplingProfiler]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, profiler: SamplingProfiler) -> str:
+        with self._lock:
+            profile_id = f"prof_{int(time.time())}_{next(self._ids)}"
+            self._items[profile_id] = profiler
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+            return profile_id
+
+    def get(self, profile_id: str) -> Optional[SamplingProfiler]:
+        with self._lock:
+            return self._items.get(profile_id)
+
+
+profile_store = ProfileStore()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling a single `/tools/*` call that sends `X-Profile: 1`.
+
+    `authorize(token)` must return True for the caller's `X-Tool-Token`; otherwise the
+    request is served unprofiled. The response carries `X-Profile-Id`, which the admin
+    route serves as a collapsed-stack or speedscope file.
+    """
+
+    def __init__(self, app: Any, authorize: Callable[[Optional[str]], bool], interval: float = 0.002) -> None:
+        self.app = app
+        self.authorize = authorize
+        self.interval = interval
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not scope.get("path", "").startswith("/tools/"):
+            await self.app(scope, receive, send)
+            return
+        wanted = False
+        token: Optional[str] = None
+        for key, value in scope.get("headers") or ():
+            if key == PROFILE_HEADER:
+                wanted = value not in (b"", b"0", b"false")
+            elif key == TOKEN_HEADER:
+                token = value.decode("latin-1")
+        if not wanted or not self.authorize(token):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = SamplingProfiler(
+            interval=self.interval,
+            loop=asyncio.get_running_loop(),
+            task=asyncio.current_task(),
+        )
+        profile_id = profile_store.add(profiler)
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                profiler.stop()
+                headers = list(message.get("headers") or [])
+                headers.append((b"x-profile-id", profile_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not profiler._stop.is_set():
+                profiler.stop()
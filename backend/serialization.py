@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+from contextvars import ContextVar
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import Response
+
+import fieldsets
+from mlb_service import GameInfo
+from news_service import NewsArticle
+from youtube_service import VideoItem
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# MessagePack backend: msgspec, else the msgpack package; without either, clients get JSON
+try:
+    import msgspec
+
+    _pack: Optional[Callable[[Any], bytes]] = msgspec.msgpack.encode
+    _unpack: Optional[Callable[[bytes], Any]] = msgspec.msgpack.decode
+    _json_loads: Callable[[bytes], Any] = msgspec.json.decode
+except ImportError:  # pragma: no cover - optional dependency
+    try:
+        import msgpack
+
+        _pack = functools.partial(msgpack.packb, use_bin_type=True)
+        _unpack = functools.partial(msgpack.unpackb, raw=False)
+    except ImportError:
+        _pack = _unpack = None
+    _json_loads = orjson.loads if orjson is not None else json.loads
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+# Wire format negotiated for the current request (set by WireFormatRoute)
+_format: ContextVar[str] = ContextVar("response_format", default=JSON)
+
+
+def game_dict(g: GameInfo) -> Dict[str, Any]:
+    """Wire shape of a game in schedule responses."""
+    return {
+        "game_pk": g.game_pk,
+        "game_date": g.game_date.isoformat(),
+        "home_team": g.home_team,
+        "away_team": g.away_team,
+        "is_home": g.is_home,
+        "opponent": g.opponent,
+        "venue": g.venue,
+        "status": g.status,
+    }
+
+
+def article_dict(a: NewsArticle) -> Dict[str, Any]:
+    return {
+        "title": a.title,
+        "description": a.description,
+        "url": a.url,
+        "source": a.source,
+        "published_at": a.published_at.isoformat(),
+        "url_to_image": a.url_to_image,
+    }
+
+
+def video_dict(v: VideoItem) -> Dict[str, Any]:
+    return {
+        "video_id": v.video_id,
+        "title": v.title,
+        "url": v.url,
+        "channel": v.channel,
+        "view_count": v.view_count,
+    }
+
+
+# Trusted internal record types and their encoders; handlers may return these objects as-is
+ENCODERS: Dict[type, Callable[[Any], Any]] = {
+    GameInfo: game_dict,
+    NewsArticle: article_dict,
+    VideoItem: video_dict,
+    datetime: datetime.isoformat,
+    date: date.isoformat,
+    set: list,
+    frozenset: list,
+}
+
+
+def _default(obj: Any) -> Any:
+    encode = ENCODERS.get(type(obj))
+    if encode is not None:
+        return encode(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    # Anything else (enums, decimals, other dataclasses): FastAPI's generic encoder
+    return jsonable_encoder(obj)
+
+
+if orjson is not None:
+    # Dataclasses and datetimes go through _default so both backends emit the same shapes
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+else:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def packb(obj: Any) -> bytes:
+    """MessagePack document equal to the JSON one `dumps` writes.
+
+    Transcoded from the JSON bytes: both steps run in C and the two formats
+    cannot drift apart, which a Python walk over `obj` would be slower at.
+    """
+    if _pack is None:
+        raise RuntimeError("MessagePack needs msgspec or msgpack installed")
+    return _pack(_json_loads(dumps(obj)))
+
+
+def _msgpack_map_header(n: int) -> bytes:
+    if n < 16:
+        return bytes([0x80 | n])
+    if n < 1 << 16:
+        return b"\xde" + n.to_bytes(2, "big")
+    return b"\xdf" + n.to_bytes(4, "big")
+
+
+class Preencoded:
+    """A value encoded at most once per wire format, then spliced into responses as bytes.
+
+    For payloads that are cached and served many times (e.g. generated agent
+    configs): each format's encoding is computed on first use and reused.
+    """
+
+    __slots__ = ("value", "_encoded")
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, media_type: str) -> bytes:
+        data = self._encoded.get(media_type)
+        if data is None:
+            data = self._encoded[media_type] = packb(self.value) if media_type == MSGPACK else dumps(self.value)
+        return data
+
+
+class Spliced:
+    """A response object whose `parts` are Preencoded values spliced in as-is after the `head` fields."""
+
+    __slots__ = ("head", "parts")
+
+    def __init__(self, head: Dict[str, Any], parts: Dict[str, Preencoded]) -> None:
+        self.head = head
+        self.parts = parts
+
+    def render(self, media_type: str) -> bytes:
+        if media_type == MSGPACK:
+            items = [packb(k) + packb(v) for k, v in self.head.items()]
+            items += [packb(k) + p.encoded(MSGPACK) for k, p in self.parts.items()]
+            return _msgpack_map_header(len(items)) + b"".join(items)
+        items = [dumps(k) + b":" + p.encoded(JSON) for k, p in self.parts.items()]
+        head = dumps(self.head)
+        if not items:
+            return head
+        return head[:-1] + (b"," if self.head else b"") + b",".join(items) + b"}"
+
+
+# Nested anywhere else, a Preencoded value is encoded like its plain value
+ENCODERS[Preencoded] = lambda p: p.value
+
+
+class FastJSONResponse(Response):
+    """JSON response encoded in one pass by `dumps` (orjson when installed)."""
+
+    media_type = JSON
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, Spliced):
+            return content.render(JSON)
+        return dumps(content)
+
+
+class MsgpackResponse(Response):
+    """MessagePack response, same document as FastJSONResponse would send."""
+
+    media_type = MSGPACK
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, Spliced):
+            return content.render(MSGPACK)
+        return packb(content)
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """MSGPACK if the Accept header asks for it at least as strongly as JSON (and it is available), else JSON."""
+    if not accept or _pack is None:
+        return JSON
+    msgpack_q = json_q = 0.0
+    for item in accept.lower().split(","):
+        media, _, params = item.strip().partition(";")
+        media = media.strip()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media in MSGPACK_TYPES:
+            msgpack_q = max(msgpack_q, q)
+        elif media in (JSON, "application/*", "*/*"):
+            json_q = max(json_q, q)
+    return MSGPACK if msgpack_q > 0 and msgpack_q >= json_q else JSON
+
+
+def response_format() -> str:
+    """Media type negotiated for the request being handled."""
+    return _format.get()
+
+
+def prune(value: Any, tree: fieldsets.FieldTree) -> Any:
+    """`value` reduced to the fields in `tree`, looking inside records as they would be encoded."""
+    return fieldsets.prune(value, tree, _default)
+
+
+def _select(content: Any, tree: fieldsets.FieldTree) -> Any:
+    if not isinstance(content, Spliced):
+        return fieldsets.prune_response(content, tree, _default)
+    head = fieldsets.prune_response(content.head, tree, _default)
+    parts: Dict[str, Preencoded] = {}
+    for key, part in content.parts.items():
+        if key not in tree:
+            continue
+        if tree[key]:
+            # A nested selection: prune the plain value instead of splicing the cached bytes
+            head[key] = prune(part.value, tree[key])
+        else:
+            parts[key] = part
+    return Spliced(head, parts)
+
+
+def respond(content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """`content` pruned to the requested fields and encoded in the negotiated wire format."""
+    tree = fieldsets.selected()
+    if tree is not None:
+        content = _select(content, tree)
+    cls = MsgpackResponse if _format.get() == MSGPACK else FastJSONResponse
+    response = cls(content, status_code=status_code, headers=headers)
+    if _pack is not None:
+        # The same URL has a JSON and a MessagePack representation
+        response.headers.append("Vary", "Accept")
+    return response
+
+
+def _respond(result: Any) -> Any:
+    return result if isinstance(result, Response) else respond(result)
+
+
+def fast_json(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """Serve an endpoint's return value as FastJSONResponse (MsgpackResponse when negotiated).
+
+    Returning a Response makes FastAPI skip its jsonable_encoder pass over the
+    result; the signature is preserved so request parsing is unchanged.
+    """
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return _respond(await endpoint(*args, **kwargs))
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return _respond(endpoint(*args, **kwargs))
+    return wrapper
+
+
+class _MsgpackRequest(Request):
+    """Request whose MessagePack body FastAPI reads as if it were JSON."""
+
+    def __init__(self, scope: Dict[str, Any], receive: Any) -> None:
+        super().__init__(scope, receive)
+        # FastAPI only hands application/json bodies to .json(); the scope itself is untouched
+        raw = [(k, v) for k, v in scope["headers"] if k != b"content-type"]
+        self._headers = Headers(raw=raw + [(b"content-type", JSON.encode("latin-1"))])
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = _unpack(await self.body())
+        return self._json
+
+
+async def _fields_spec(request: Request, content_type: str) -> Any:
+    """The `fields` selector: the query parameter, else a top-level "fields" key in the request body."""
+    spec = request.query_params.get("fields")
+    if spec is not None or request.method not in ("POST", "PUT", "PATCH"):
+        return spec
+    if content_type and content_type != JSON and content_type not in MSGPACK_TYPES:
+        return None
+    try:
+        # Parsed once: FastAPI reuses the cached body when it validates the request
+        body = await request.json()
+    except Exception:
+        return None  # FastAPI reports the malformed body itself
+    return body.get("fields") if isinstance(body, dict) else None
+
+
+class WireFormatRoute(APIRoute):
+    """Route that accepts MessagePack request bodies and negotiates the response format from Accept.
+
+    It also makes the request's `fields` selector current, so fast_json
+    endpoints return only the selected fields (see fieldsets).
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Any]:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+            if content_type in MSGPACK_TYPES:
+                if _unpack is None:
+                    raise HTTPException(status_code=415, detail="MessagePack bodies are not supported here")
+                request = _MsgpackRequest(request.scope, request.receive)
+            token = _format.set(negotiate_format(request.headers.get("accept")))
+            selection = fieldsets.use(fieldsets.parse_fields(await _fields_spec(request, content_type)))
+            try:
+                return await handler(request)
+            finally:
+                fieldsets.reset(selection)
+                _format.reset(token)
+
+        return route_handler
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from leaderboard import Leaderboard
+from mlb_service import GameInfo, ScheduleBatch, get_league_schedule, get_schedule, next_game_in, resolve_team_id
+from prediction_store import PredictionStore
+
+logger = logging.getLogger(__name__)
+
+# Statuses after which a game will never produce a winner
+VOID_STATES = {"postponed", "cancelled", "canceled", "suspended"}
+
+# How far ahead a game_outcome prediction can be made, and how long a team's schedule is reused
+PREDICTION_DAYS = 14
+_SCHEDULE_TTL = 600.0
+_schedule_cache: Dict[int, Tuple[float, List[GameInfo]]] = {}
+
+
+class InvalidGame(ValueError):
+    """The prediction names a game its picked team does not play in, or one that has already started."""
+
+
+def _upcoming_games(team_id: int) -> List[GameInfo]:
+    """`team_id`'s games from yesterday through PREDICTION_DAYS ahead, cached for a few minutes."""
+    now = time.monotonic()
+    cached = _schedule_cache.get(team_id)
+    if cached is None or now - cached[0] > _SCHEDULE_TTL:
+        today = datetime.now(timezone.utc).date()
+        cached = (now, get_schedule(team_id, today - timedelta(days=1), today + timedelta(days=PREDICTION_DAYS)))
+        _schedule_cache[team_id] = cached
+    return cached[1]
+
+
+def attach_game(prediction_data: Dict[str, Any]) -> Optional[Tuple[int, Optional[int], Optional[str], Optional[str]]]:
+    """Resolve a game_outcome prediction to (game_pk, team_id, game date, picked team name).
+
+    Uses `game_pk` from the prediction when given, else the picked team's next
+    game. Either way the game comes from the picked team's schedule, which also
+    supplies its date; a `game_pk` the team does not play in, or whose game has
+    started or finished, raises InvalidGame.
+    Blocking (statsapi); call from a worker thread.
+    """
+    pick = prediction_data.get("winner") or prediction_data.get("team")
+    if not pick:
+        return None
+    resolved = resolve_team_id(str(pick))
+    if not resolved:
+        return None
+    team_id, team_name = resolved
+    games = _upcoming_games(team_id)
+    now = datetime.now(timezone.utc)
+    game_pk = prediction_data.get("game_pk")
+    if game_pk is None:
+        game = next_game_in(games, now)
+        if game is None:
+            return None
+    else:
+        try:
+            game_pk = int(game_pk)
+        except (TypeError, ValueError):
+            raise InvalidGame(f"Invalid game_pk: {game_pk!r}") from None
+        game = next((g for g in games if g.game_pk == game_pk), None)
+        if game is None:
+            raise InvalidGame(f"{team_name} do not play game {game_pk} in the next {PREDICTION_DAYS} days")
+        if game.is_final or game.game_date <= now:
+            raise InvalidGame(f"Game {game_pk} has already started")
+    return game.game_pk, team_id, game.game_date.date().isoformat(), team_name
+
+
+class SettlementEngine:
+    """Settles open game_outcome predictions once their games go final.
+
+    Each pass groups open games by the date the schedule gave them, fetches
+    that day's league schedule (shared with other callers through its cache),
+    and resolves every prediction on a finished game in one batch through the
+    store's per-game index, crediting points and accuracy on the leaderboard.
+    Games still open `max_age_days` after their date, or dated further ahead
+    than a prediction can look, are voided without a fetch.
+    """
+
+    def __init__(
+        self,
+        store: PredictionStore,
+        board: Leaderboard,
+        points: int = 10,
+        interval: float = 60.0,
+        schedule_fn: Callable[[date, date], ScheduleBatch] = get_league_schedule,
+        max_age_days: int = 7,
+    ) -> None:
+        self.store = store
+        self.board = board
+        self.points = points
+        self.interval = interval
+        self.schedule_fn = schedule_fn
+        self.max_age_days = max_age_days
+        self.settled_total = 0
+
+    def settle(self, game: GameInfo) -> int:
+        """Settle all open predictions on a finished (or void) game; returns how many."""
+        void = game.status.lower() in VOID_STATES
+        return self._resolve(game.game_pk, None if void else game.winner)
+
+    def _resolve(self, game_pk: int, winner: Optional[str]) -> int:
+        outcomes = self.store.settle_game(game_pk, winner, self.points)
+        for user_id, correct, points in outcomes:
+            if correct is None:
+                continue
+            self.board.add_points(user_id, prediction=points, correct=correct, played=False)
+        self.settled_total += len(outcomes)
+        return len(outcomes)
+
+    def _days(self) -> Tuple[Dict[date, Set[int]], List[int]]:
+        """(game date -> game_pks) for open games played by today, and the game_pks to void."""
+        today = datetime.now(timezone.utc).date()
+        oldest = today - timedelta(days=self.max_age_days)
+        latest = today + timedelta(days=PREDICTION_DAYS + 1)
+        days: Dict[date, Set[int]] = {}
+        stale: List[int] = []
+        for game_pk, (_, game_date) in self.store.open_games().items():
+            try:
+                day = date.fromisoformat(game_date) if game_date else today
+            except ValueError:
+                day = today
+            if day < oldest or day > latest:
+                stale.append(game_pk)
+            elif day <= today:
+                days.setdefault(day, set()).add(game_pk)
+        return days, stale
+
+    def run_once(self) -> int:
+        """One blocking settlement pass; returns the number of predictions settled."""
+        days, stale = self._days()
+        voided = sum(self._resolve(game_pk, None) for game_pk in stale)
+        if voided:
+            logger.warning("Voided %d predictions on %d games outside the settlement window", voided, len(stale))
+        settled = 0
+        for day, pks in sorted(days.items()):
+            try:
+                # Start a day early: statsapi buckets by local date, we store the UTC date
+                batch = self.schedule_fn(day - timedelta(days=1), day)
+            except Exception as e:
+                logger.warning("Settlement schedule fetch failed for %s: %s", day, e)
+                continue
+            for game in batch.for_games(pks):
+                if game.is_final or game.status.lower() in VOID_STATES:
+                    settled += self.settle(game)
+        if settled:
+            logger.info("Settled %d predictions", settled)
+        return settled + voided
+
+    async def run(self) -> None:
+        """Background loop: a settlement pass every `interval` seconds, off the event loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.run_once)
+            except Exception as e:  # pragma: no cover
+                logger.error("Settlement pass failed: %s", e)
+            await asyncio.sleep(self.interval)
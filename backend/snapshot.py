@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import pickle
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# File layout: MAGIC, then the offset and length of the index (little-endian u64s), the
+# pickled values back to back, and last the pickled index:
+#   {section: {key: (value offset, value length, wall-clock expiry or None)}}
+MAGIC = b"SIACACHE1\n"
+_HEADER = struct.Struct("<QQ")
+_DATA_START = len(MAGIC) + _HEADER.size
+
+# (key, value, wall-clock expiry as time.time(), or None for entries that never expire)
+Entry = Tuple[Hashable, Any, Optional[float]]
+IndexEntry = Tuple[int, int, Optional[float]]
+
+# Most entries a section keeps in a snapshot, counting ones carried over from the previous file
+DEFAULT_SECTION_LIMIT = 10_000
+
+_sources: Dict[str, Callable[[], Iterable[Entry]]] = {}
+_limits: Dict[str, int] = {}
+_current: Optional["Snapshot"] = None
+_lock = threading.Lock()
+
+
+class Snapshot:
+    """A cache snapshot file, memory-mapped; only the index is read up front.
+
+    Values are unpickled one at a time by `get`, on first access, and entries
+    past their expiry read as missing. Snapshots are written by this process
+    (or its siblings) into DATA_DIR and trusted like the SQLite stores there.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if self._mm[: len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a cache snapshot")
+            offset, length = _HEADER.unpack_from(self._mm, len(MAGIC))
+            self.index: Dict[str, Dict[Hashable, IndexEntry]] = pickle.loads(self._mm[offset : offset + length])
+        except Exception:
+            self._mm.close()
+            raise
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self.index.values())
+
+    def get(self, section: str, key: Hashable) -> Optional[Tuple[Any, Optional[float]]]:
+        """(value, expiry) of a live entry, or None."""
+        entry = self.index.get(section, {}).get(key)
+        if entry is None:
+            return None
+        offset, length, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            return None
+        return pickle.loads(self._mm[offset : offset + length]), expires_at
+
+    def raw(self, section: str) -> Iterable[Tuple[Hashable, bytes, Optional[float]]]:
+        """Live entries of `section` as still-pickled bytes."""
+        now = time.time()
+        for key, (offset, length, expires_at) in self.index.get(section, {}).items():
+            if expires_at is None or expires_at > now:
+                yield key, self._mm[offset : offset + length], expires_at
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+def register(section: str, entries: Callable[[], Iterable[Entry]], limit: int = DEFAULT_SECTION_LIMIT) -> None:
+    """Include a cache in snapshots: `entries()` lists what it holds when a snapshot is saved.
+
+    `entries()` lists the most recently used last; a snapshot keeps at most `limit` of
+    the section's entries, the cache's own ahead of any carried over.
+    """
+    _sources[section] = entries
+    _limits[section] = limit
+
+
+def lookup(section: str, key: Hashable) -> Optional[Tuple[Any, Optional[float]]]:
+    """(value, expiry) of `key` in the loaded snapshot, for a cache to adopt on a miss; None if absent or expired."""
+    snap = _current
+    if snap is None:
+        return None
+    try:
+        return snap.get(section, key)
+    except Exception as e:
+        logger.warning("Unreadable %s entry in cache snapshot: %s", section, e)
+        return None
+
+
+def stored_at(expires_at: float, ttl: float) -> float:
+    """time.monotonic() stamp at which an entry kept for `ttl` seconds would expire at wall-clock `expires_at`."""
+    return time.monotonic() - (ttl - (expires_at - time.time()))
+
+
+def expires_at(stored: float, ttl: float) -> float:
+    """Wall-clock expiry of an entry stamped with time.monotonic() `stored` and kept for `ttl` seconds."""
+    return time.time() + ttl - (time.monotonic() - stored)
+
+
+def load(path: str) -> int:
+    """Map the snapshot at `path` for lookups; returns its entry count (0 if there is none)."""
+    global _current
+    if not path or not os.path.exists(path):
+        return 0
+    try:
+        snap = Snapshot(path)
+    except Exception as e:
+        logger.warning("Ignoring cache snapshot %s: %s", path, e)
+        return 0
+    with _lock:
+        previous, _current = _current, snap
+    if previous is not None:
+        previous.close()
+    return len(snap)
+
+
+def save(path: str) -> int:
+    """Write every registered cache to `path`; returns the entry count.
+
+    Live snapshot entries this process never touched are carried over as-is,
+    so a short-lived worker does not drop what its predecessor had cached,
+    up to each section's limit; sections nobody registers any more are
+    dropped. The file is replaced atomically.
+    """
+    if not path:
+        return 0
+    index: Dict[str, Dict[Hashable, IndexEntry]] = {}
+    tmp = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + _HEADER.pack(0, 0))
+        offset = _DATA_START
+
+        def write(section: str, key: Hashable, blob: bytes, expiry: Optional[float]) -> None:
+            nonlocal offset
+            f.write(blob)
+            index.setdefault(section, {})[key] = (offset, len(blob), expiry)
+            offset += len(blob)
+
+        for section, entries in _sources.items():
+            try:
+                listed = list(entries())
+                for key, value, expiry in listed[max(len(listed) - _limits[section], 0) :]:
+                    write(section, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), expiry)
+            except Exception as e:
+                logger.warning("Skipping %s in cache snapshot: %s", section, e)
+        snap = _current
+        if snap is not None:
+            for section in snap.index:
+                if section not in _sources:
+                    continue
+                seen = index.setdefault(section, {})
+                for key, blob, expiry in snap.raw(section):
+                    if len(seen) >= _limits[section]:
+                        break
+                    if key not in seen:
+                        write(section, key, blob, expiry)
+        raw_index = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+        f.write(raw_index)
+        f.seek(len(MAGIC))
+        f.write(_HEADER.pack(offset, len(raw_index)))
+    os.replace(tmp, path)
+    return sum(len(entries) for entries in index.values())
@@ -11,7 +11,7 @@ from youtube_service import search_videos, VideoItem
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TeamIntelligence:
     """Aggregated intelligence data for an MLB team."""
     team_name: str
@@ -36,21 +36,25 @@ class SportsDataService:
     ) -> TeamIntelligence:
         logger.info("Gathering intelligence for %s", team_name)
 
-        search_terms = get_team_search_terms(team_name)
-        primary_term = search_terms[0]
-
-        news_articles = self.news_service.search_team_news(primary_term, days_back, max_news)
-
-        youtube_query = f"{primary_term} MLB baseball highlights analysis"
-        youtube_videos = search_videos(youtube_query, max_videos)
-
+        primary_term = self.primary_term(team_name)
         return TeamIntelligence(
             team_name=primary_term,
-            news_articles=news_articles,
-            youtube_videos=youtube_videos,
+            news_articles=self.team_news(primary_term, days_back, max_news),
+            youtube_videos=self.team_videos(primary_term, max_videos),
             generated_at=datetime.now(),
         )
 
+    @staticmethod
+    def primary_term(team_name: str) -> str:
+        return get_team_search_terms(team_name)[0]
+
+    def team_news(self, primary_term: str, days_back: int = 7, max_news: int = 10) -> List[NewsArticle]:
+        return self.news_service.search_team_news(primary_term, days_back, max_news)
+
+    @staticmethod
+    def team_videos(primary_term: str, max_videos: int = 10) -> List[VideoItem]:
+        return search_videos(f"{primary_term} MLB baseball highlights analysis", max_videos)
+
     def get_opponent_analysis(
         self,
         team1: str,
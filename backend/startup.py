@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    """Wall-clock durations of a worker's startup phases, in the order they ran.
+
+    `import` is the time to import the app module; the lifespan adds one entry
+    per `phase` (warmup tasks as `warmup.<name>`), and `ready_s` is the time
+    from the start of the import until the worker could take requests.
+    """
+
+    def __init__(self, started: Optional[float] = None) -> None:
+        self.started = time.perf_counter() if started is None else started
+        self.phases: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.ready_s: Optional[float] = None
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0)
+
+    def ready(self) -> None:
+        self.ready_s = time.perf_counter() - self.started
+        logger.info("Ready in %.0f ms (%s)", self.ready_s * 1000, ", ".join(
+            f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases.items()
+        ))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "ready_ms": None if self.ready_s is None else round(self.ready_s * 1000, 1),
+            "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+            "errors": dict(self.errors),
+        }
+
+
+class Warmup:
+    """Blocking warmup `tasks`, started on their own threads as soon as this is created.
+
+    `wait` covers `tasks` only; `background` tasks (say, importing a library
+    the first requests may not need) run alongside without holding up
+    readiness. Warmup only saves the first requests some work, so a task that
+    fails is logged and recorded in `report.errors` rather than raised. Each
+    task's duration is recorded as `warmup.<name>`.
+    """
+
+    def __init__(
+        self,
+        tasks: Dict[str, Callable[[], Any]],
+        report: StartupReport,
+        background: Optional[Dict[str, Callable[[], Any]]] = None,
+    ) -> None:
+        self.report = report
+        background = background or {}
+        executor = ThreadPoolExecutor(max_workers=max(len(tasks) + len(background), 1), thread_name_prefix="warmup")
+        self._futures = {name: executor.submit(self._run, name, fn) for name, fn in tasks.items()}
+        for name, fn in background.items():
+            executor.submit(self._run, name, fn)
+        executor.shutdown(wait=False)
+
+    def _run(self, name: str, fn: Callable[[], Any]) -> None:
+        t0 = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            self.report.errors[f"warmup.{name}"] = str(e)
+            logger.warning("Warmup task %s failed: %s", name, e)
+        finally:
+            self.report.record(f"warmup.{name}", time.perf_counter() - t0)
+
+    async def wait(self, timeout: float) -> None:
+        """Wait up to `timeout` seconds; tasks still running after that finish in the background."""
+        if not self._futures:
+            return
+        waiting = {asyncio.wrap_future(f): name for name, f in self._futures.items()}
+        _, late = await asyncio.wait(waiting, timeout=timeout)
+        for future in late:
+            name = waiting[future]
+            self.report.errors[f"warmup.{name}"] = f"still running after {timeout:g}s"
+            logger.warning("Warmup task %s still running after %gs; continuing in the background", name, timeout)
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+try:
+    from orjson import loads as _loads
+except ImportError:  # pragma: no cover - optional dependency
+    _loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+# Stat fields compare_teams reads; the rest of each split's stat object is dropped
+STAT_FIELDS = ("avg", "obp", "slg", "runs", "homeRuns", "era", "whip", "strikeOuts")
+
+
+class ScheduleRow(NamedTuple):
+    game_pk: Optional[int]
+    game_date: Optional[str]  # ISO 8601 as sent, e.g. "2025-04-01T23:05:00Z"
+    status: Optional[str]  # detailedState, else abstractGameState
+    home_id: Optional[int]
+    home_name: Optional[str]
+    away_id: Optional[int]
+    away_name: Optional[str]
+    venue: Optional[str]
+    home_score: Optional[int]
+    away_score: Optional[int]
+
+
+StatSplit = Tuple[Optional[int], Dict[str, Any]]  # (team id, STAT_FIELDS present in the split)
+StatGroup = Tuple[Optional[str], List[StatSplit]]  # (group displayName, splits)
+
+
+def schedule_rows(data: Dict[str, Any]) -> List[ScheduleRow]:
+    """Rows of an already-parsed /schedule payload."""
+    rows: List[ScheduleRow] = []
+    for d in (data.get("dates") or []):
+        for g in (d.get("games") or []):
+            status = g.get("status") or {}
+            teams = g.get("teams") or {}
+            home = teams.get("home") or {}
+            away = teams.get("away") or {}
+            home_team = home.get("team") or {}
+            away_team = away.get("team") or {}
+            rows.append(ScheduleRow(
+                g.get("gamePk"),
+                g.get("gameDate"),
+                status.get("detailedState") or status.get("abstractGameState"),
+                home_team.get("id"),
+                home_team.get("name"),
+                away_team.get("id"),
+                away_team.get("name"),
+                (g.get("venue") or {}).get("name"),
+                home.get("score"),
+                away.get("score"),
+            ))
+    return rows
+
+
+def stat_groups(data: Dict[str, Any]) -> List[StatGroup]:
+    """Groups of an already-parsed /teams/stats (or /teams/{id}/stats) payload."""
+    groups: List[StatGroup] = []
+    for r in (data.get("stats") or []):
+        splits: List[StatSplit] = []
+        for sp in (r.get("splits") or []):
+            sp = sp or {}
+            stat = sp.get("stat") or {}
+            splits.append(((sp.get("team") or {}).get("id"), {k: stat[k] for k in STAT_FIELDS if stat.get(k) is not None}))
+        groups.append(((r.get("group") or {}).get("displayName"), splits))
+    return groups
+
+
+# With msgspec the raw bytes are decoded against the schemas below: only these fields are
+# materialized and the rest of each payload is skipped by the parser, so no intermediate
+# dict tree is built. Without it (or for off-schema payloads) the body is parsed to dicts
+# and walked, which yields the same rows.
+if msgspec is not None:
+    class _Named(msgspec.Struct):
+        id: Optional[int] = None
+        name: Optional[str] = None
+
+    class _Side(msgspec.Struct):
+        team: Optional[_Named] = None
+        score: Optional[int] = None
+
+    class _Teams(msgspec.Struct):
+        home: Optional[_Side] = None
+        away: Optional[_Side] = None
+
+    class _Status(msgspec.Struct):
+        detailedState: Optional[str] = None
+        abstractGameState: Optional[str] = None
+
+    class _Game(msgspec.Struct):
+        gamePk: Optional[int] = None
+        gameDate: Optional[str] = None
+        status: Optional[_Status] = None
+        teams: Optional[_Teams] = None
+        venue: Optional[_Named] = None
+
+    class _Date(msgspec.Struct):
+        games: Optional[List[_Game]] = None
+
+    class _Schedule(msgspec.Struct):
+        dates: Optional[List[_Date]] = None
+
+    class _Stat(msgspec.Struct):
+        # Values are kept as sent (statsapi mixes strings like ".251" with numbers)
+        avg: Any = None
+        obp: Any = None
+        slg: Any = None
+        runs: Any = None
+        homeRuns: Any = None
+        era: Any = None
+        whip: Any = None
+        strikeOuts: Any = None
+
+    class _Split(msgspec.Struct):
+        team: Optional[_Named] = None
+        stat: Optional[_Stat] = None
+
+    class _Group(msgspec.Struct):
+        displayName: Optional[str] = None
+
+    class _StatBlock(msgspec.Struct):
+        group: Optional[_Group] = None
+        splits: Optional[List[Optional[_Split]]] = None
+
+    class _TeamStats(msgspec.Struct):
+        stats: Optional[List[_StatBlock]] = None
+
+    _NO_SIDE = _Side()
+    _NO_TEAM = _Named()
+    _NO_STATUS = _Status()
+    _schedule_decoder = msgspec.json.Decoder(_Schedule)
+    _team_stats_decoder = msgspec.json.Decoder(_TeamStats)
+
+    def _typed_schedule(raw: bytes) -> List[ScheduleRow]:
+        rows: List[ScheduleRow] = []
+        for d in (_schedule_decoder.decode(raw).dates or ()):
+            for g in (d.games or ()):
+                status = g.status or _NO_STATUS
+                teams = g.teams
+                home = (teams.home if teams else None) or _NO_SIDE
+                away = (teams.away if teams else None) or _NO_SIDE
+                home_team = home.team or _NO_TEAM
+                away_team = away.team or _NO_TEAM
+                rows.append(ScheduleRow(
+                    g.gamePk,
+                    g.gameDate,
+                    status.detailedState or status.abstractGameState,
+                    home_team.id,
+                    home_team.name,
+                    away_team.id,
+                    away_team.name,
+                    g.venue.name if g.venue else None,
+                    home.score,
+                    away.score,
+                ))
+        return rows
+
+    def _typed_stat_groups(raw: bytes) -> List[StatGroup]:
+        groups: List[StatGroup] = []
+        for r in (_team_stats_decoder.decode(raw).stats or ()):
+            splits: List[StatSplit] = []
+            for sp in (r.splits or ()):
+                if sp is None:
+                    splits.append((None, {}))
+                    continue
+                stat = sp.stat
+                values = {} if stat is None else {
+                    k: v for k in STAT_FIELDS if (v := getattr(stat, k)) is not None
+                }
+                splits.append((sp.team.id if sp.team else None, values))
+            groups.append((r.group.displayName if r.group else None, splits))
+        return groups
+
+    def decode_schedule(raw: bytes) -> List[ScheduleRow]:
+        """Rows of a raw /schedule response body."""
+        try:
+            return _typed_schedule(raw)
+        except msgspec.DecodeError as e:
+            # Off-schema payload (or bad JSON, which the dict path reports as ValueError)
+            logger.debug("Typed /schedule decode failed, walking dicts instead: %s", e)
+            return schedule_rows(_loads(raw) or {})
+
+    def decode_team_stats(raw: bytes) -> List[StatGroup]:
+        """Stat groups of a raw /teams/stats response body."""
+        try:
+            return _typed_stat_groups(raw)
+        except msgspec.DecodeError as e:
+            logger.debug("Typed /teams/stats decode failed, walking dicts instead: %s", e)
+            return stat_groups(_loads(raw) or {})
+else:
+    def decode_schedule(raw: bytes) -> List[ScheduleRow]:
+        """Rows of a raw /schedule response body."""
+        return schedule_rows(_loads(raw) or {})
+
+    def decode_team_stats(raw: bytes) -> List[StatGroup]:
+        """Stat groups of a raw /teams/stats response body."""
+        return stat_groups(_loads(raw) or {})
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+
+import fieldsets
+from serialization import dumps, prune
+
+logger = logging.getLogger(__name__)
+
+NDJSON = "application/x-ndjson"
+SSE = "text/event-stream"
+STREAM_TYPES = {"ndjson": NDJSON, "sse": SSE}
+
+Section = Callable[[], Any]
+
+
+def stream_format(request: Request) -> Optional[str]:
+    """NDJSON or SSE if the request asks to stream (?stream=ndjson|sse, or that Accept type), else None."""
+    mode = request.query_params.get("stream")
+    if mode:
+        return STREAM_TYPES.get(mode.lower())
+    accept = request.headers.get("accept", "")
+    if NDJSON in accept:
+        return NDJSON
+    if SSE in accept:
+        return SSE
+    return None
+
+
+def _frame(media_type: str, event: str, message: Dict[str, Any]) -> bytes:
+    if media_type == SSE:
+        return b"event: " + event.encode("utf-8") + b"\ndata: " + dumps(message) + b"\n\n"
+    return dumps(message) + b"\n"
+
+
+async def _sections(
+    sections: Dict[str, Section],
+    finish: Callable[[Dict[str, Any]], Dict[str, Any]],
+    media_type: str,
+    selection: Optional[fieldsets.FieldTree],
+    prefix: str,
+) -> AsyncIterator[bytes]:
+    # Every section runs at once in the threadpool (they are blocking upstream calls)
+    tasks = {asyncio.ensure_future(asyncio.to_thread(fn)): name for name, fn in sections.items()}
+    results: Dict[str, Any] = {}
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = tasks[task]
+                try:
+                    value = task.result()
+                except Exception as e:
+                    logger.warning("Streamed section %s failed: %s", name, e)
+                    yield _frame(media_type, name, {"section": name, "error": str(e)})
+                    continue
+                if value is None:
+                    continue
+                results[name] = value
+                if selection is not None:
+                    node = fieldsets.node(selection, f"{prefix}{name}")
+                    if node is None:
+                        continue  # fetched for the summary only
+                    value = prune(value, node)
+                yield _frame(media_type, name, {"section": name, "data": value})
+        yield _frame(media_type, "summary", {"section": "summary", **finish(results)})
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def stream_sections(
+    sections: Dict[str, Section],
+    finish: Callable[[Dict[str, Any]], Dict[str, Any]],
+    media_type: str,
+    prefix: str = "",
+) -> StreamingResponse:
+    """Run `sections` concurrently and stream each result the moment it is ready.
+
+    Every section is one NDJSON line (or SSE event named after it):
+    {"section": name, "data": value}, or {"section": name, "error": message}
+    if it raised; sections returning None are left out. The last line is
+    {"section": "summary", **finish(results)}, with `results` holding every
+    section that produced a value. The current `fields` selection (with
+    section names under `prefix`) prunes each section's data.
+    """
+    return StreamingResponse(
+        _sections(sections, finish, media_type, fieldsets.selected(), prefix),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
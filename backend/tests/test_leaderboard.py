@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+from leaderboard import Leaderboard, decode_cursor, encode_cursor
+
+
+def _board(n: int, seed: int = 7) -> Leaderboard:
+    rng = random.Random(seed)
+    board = Leaderboard(seed=seed)
+    for i in range(n):
+        # Narrow score range so many users tie and ordering falls back to user id
+        board.add_points(f"u{i:04d}", trivia=rng.randint(0, 20), prediction=rng.choice((0, 10)))
+    # Re-rank a few users after the fact, as later answers would
+    for i in rng.sample(range(n), n // 5):
+        board.add_points(f"u{i:04d}", trivia=rng.randint(1, 15))
+    return board
+
+
+def _naive(board: Leaderboard):
+    """(rank, user_id) in rank order, by a plain sort of every standing."""
+    ordered = sorted((board.get(uid) for uid in board._standings), key=lambda s: s.key)
+    return [(rank, s.user_id) for rank, s in enumerate(ordered, start=1)]
+
+
+def _ids(rows):
+    return [(rank, s.user_id) for rank, s in rows]
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 17, 300])
+def test_rank_matches_naive_sort(n):
+    board = _board(n)
+    expected = _naive(board)
+    assert len(board) == n
+    assert [(board.rank(uid), uid) for _, uid in expected] == expected
+    assert _ids(board.top(n + 5)) == expected
+
+
+def test_rank_of_unknown_user_is_none():
+    assert _board(10).rank("nobody") is None
+
+
+@pytest.mark.parametrize("limit", [1, 7, 50])
+def test_offset_pages_cover_the_ranking(limit):
+    board = _board(123)
+    walked = []
+    for offset in range(0, len(board) + limit, limit):
+        walked += _ids(board.page(offset, limit))
+    assert walked == _naive(board)
+    assert board.page(len(board), limit) == []
+
+
+@pytest.mark.parametrize("limit", [1, 10, 64])
+def test_cursor_walk_covers_the_ranking(limit):
+    board = _board(123)
+    walked = []
+    rows = board.top(limit)
+    while rows:
+        walked += _ids(rows)
+        rows = board.page_after(decode_cursor(encode_cursor(rows[-1][1])), limit)
+    assert walked == _naive(board)
+
+
+def test_cursor_stays_put_when_users_above_it_move():
+    board = _board(60)
+    first = board.top(20)
+    cursor = decode_cursor(encode_cursor(first[-1][1]))
+    # Someone already above the cursor gains points: the next page should not repeat anyone
+    board.add_points(first[5][1].user_id, trivia=500)
+    after = board.page_after(cursor, 20)
+    assert {s.user_id for _, s in after}.isdisjoint(s.user_id for _, s in first)
+    expected = _naive(board)
+    start = [uid for _, uid in expected].index(after[0][1].user_id)
+    assert _ids(after) == expected[start : start + 20]
+
+
+@pytest.mark.parametrize("radius", [0, 2, 5])
+def test_around_matches_naive_window(radius):
+    board = _board(40)
+    expected = _naive(board)
+    for rank, uid in expected:
+        lo = max(0, rank - 1 - radius)
+        assert _ids(board.around(uid, radius)) == expected[lo : rank + radius]
+    assert board.around("nobody", radius) == []
+
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor!")
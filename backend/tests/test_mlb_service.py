@@ -0,0 +1,91 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pytest
+
+import mlb_service
+from benchmarks.stubs import schedule_payload
+
+
+class FakeSession:
+    """Serves stub /schedule payloads, slowly, and records the query of every call."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False) -> None:
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        with self._lock:
+            self.calls.append(dict(params))
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("statsapi down")
+        team_id = params.get("teamId")
+        body = schedule_payload(team_id, date.fromisoformat(params["startDate"]), date.fromisoformat(params["endDate"]))
+        return FakeResponse(json.dumps(body).encode("utf-8"))
+
+
+class FakeResponse:
+    def __init__(self, content: bytes) -> None:
+        self.content = content
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+@pytest.fixture
+def session(monkeypatch):
+    def install(**kwargs):
+        fake = FakeSession(**kwargs)
+        monkeypatch.setattr(mlb_service, "_session", fake)
+        return fake
+
+    mlb_service._league_cache.clear()
+    yield install
+    mlb_service._league_cache.clear()
+
+
+START = date(2025, 6, 1)
+
+
+def test_team_schedule_is_a_per_team_query(session):
+    fake = session()
+    games = mlb_service.get_schedule(147, START, START + timedelta(days=13))
+    assert [c.get("teamId") for c in fake.calls] == [147]
+    team = games[0].home_team if games[0].is_home else games[0].away_team
+    assert all(team == (g.home_team if g.is_home else g.away_team) for g in games)
+    assert mlb_service._league_cache.items() == []
+
+
+def test_concurrent_misses_share_one_league_fetch(session):
+    fake = session(delay=0.05)
+    with ThreadPoolExecutor(8) as pool:
+        batches = list(pool.map(lambda _: mlb_service.get_league_schedule(START, START), range(8)))
+    assert len(fake.calls) == 1
+    assert all(b is batches[0] for b in batches)
+    assert mlb_service.get_league_schedule(START, START) is batches[0]
+    assert len(fake.calls) == 1
+
+
+def test_a_failed_league_fetch_reaches_every_waiter_and_is_retried(session):
+    fake = session(delay=0.05, fail=True)
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(mlb_service.get_league_schedule, START, START) for _ in range(4)]
+    assert all(isinstance(f.exception(), RuntimeError) for f in futures)
+    assert len(fake.calls) == 1
+    fake.fail = False
+    assert len(mlb_service.get_league_schedule(START, START)) > 0
+    assert len(fake.calls) == 2
+
+
+def test_league_cache_is_bounded(session):
+    session()
+    for day in range(mlb_service._league_cache.maxsize + 10):
+        d = START + timedelta(days=day)
+        mlb_service.get_league_schedule(d, d)
+    assert len(mlb_service._league_cache) == mlb_service._league_cache.maxsize
@@ -0,0 +1,140 @@
+import asyncio
+import time
+from typing import Optional
+
+import pytest
+
+from pagination import ExpiredCursor, InvalidCursor, ResultPages, encode_cursor
+
+ITEMS = [{"n": i} for i in range(23)]
+
+
+class Compute:
+    """Counts calls; returns `items` (ITEMS unless changed) under "games"."""
+
+    def __init__(self, delay: float = 0.0, error: Optional[Exception] = None) -> None:
+        self.calls = 0
+        self.items = ITEMS
+        self.delay = delay
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {"team": "Yankees", "games": list(self.items)}
+
+
+def _page(pages, key, compute, cursor=None, limit=10, field="games"):
+    return asyncio.run(pages.page(key, field, compute, cursor, limit))
+
+
+def _expire_all(pages: ResultPages) -> None:
+    for key, value, _ in pages.sets.items():
+        pages.sets.put(key, value, stored_at=time.monotonic() - pages.sets.ttl - 1)
+
+
+def test_cursor_walk_returns_every_item_once_from_one_compute():
+    pages, compute = ResultPages(ttl=60), Compute()
+    walked, cursor = [], None
+    while True:
+        page = _page(pages, ("schedule", 147), compute, cursor, limit=10)
+        assert page["team"] == "Yankees" and page["total"] == len(ITEMS)
+        walked += page["games"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert walked == ITEMS
+    assert compute.calls == 1
+
+
+def test_non_list_field_comes_back_whole():
+    page = _page(ResultPages(), "key", Compute(), field="team")
+    assert page["team"] == "Yankees" and page["next_cursor"] is None and "total" not in page
+
+
+def test_cursor_from_another_query_is_rejected():
+    pages, compute = ResultPages(), Compute()
+    cursor = _page(pages, ("news", "Yankees"), compute)["next_cursor"]
+    with pytest.raises(InvalidCursor) as exc:
+        _page(pages, ("news", "Mets"), compute, cursor)
+    assert not isinstance(exc.value, ExpiredCursor)
+
+
+@pytest.mark.parametrize("cursor", ["???", "bm90LWEtY3Vyc29y", encode_cursor("abc", 1, 0)[:-2]])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        _page(ResultPages(), "key", Compute(), cursor)
+
+
+def test_cursor_expires_with_its_set():
+    pages, compute = ResultPages(ttl=60), Compute()
+    cursor = _page(pages, "key", compute)["next_cursor"]
+    _expire_all(pages)
+    with pytest.raises(ExpiredCursor):
+        _page(pages, "key", compute, cursor)
+
+    # The first page rebuilds the set; with different content the old cursor stays dead
+    compute.items = ITEMS[::-1]
+    fresh = _page(pages, "key", compute)
+    assert compute.calls == 2
+    assert fresh["next_cursor"] != cursor
+    with pytest.raises(ExpiredCursor):
+        _page(pages, "key", compute, cursor)
+    assert _page(pages, "key", compute, fresh["next_cursor"])["games"] == ITEMS[::-1][10:20]
+
+
+def test_cursor_survives_a_rebuild_with_the_same_content():
+    pages, compute = ResultPages(ttl=60), Compute()
+    cursor = _page(pages, "key", compute)["next_cursor"]
+    _expire_all(pages)
+    assert _page(pages, "key", compute)["next_cursor"] == cursor
+    assert _page(pages, "key", compute, cursor)["games"] == ITEMS[10:20]
+
+
+def test_cursor_from_another_worker_only_works_on_the_same_content():
+    worker_a, worker_b, worker_c = ResultPages(), ResultPages(), ResultPages()
+    cursor = _page(worker_a, "key", Compute())["next_cursor"]
+    assert _page(worker_b, "key", Compute())["next_cursor"] == cursor
+    assert _page(worker_b, "key", Compute(), cursor)["games"] == ITEMS[10:20]
+
+    changed = Compute()
+    changed.items = ITEMS[1:]
+    _page(worker_c, "key", changed)
+    with pytest.raises(ExpiredCursor):
+        _page(worker_c, "key", changed, cursor)
+
+
+def test_cursor_expires_when_its_set_is_evicted():
+    pages, compute = ResultPages(maxsize=1), Compute()
+    cursor = _page(pages, "a", compute)["next_cursor"]
+    _page(pages, "b", compute)
+    with pytest.raises(ExpiredCursor):
+        _page(pages, "a", compute, cursor)
+
+
+def test_concurrent_first_pages_share_one_compute():
+    pages, compute = ResultPages(), Compute(delay=0.01)
+
+    async def run():
+        return await asyncio.gather(*(pages.page("key", "games", compute, None, 5) for _ in range(8)))
+
+    results = asyncio.run(run())
+    assert compute.calls == 1
+    assert all(r == results[0] for r in results)
+
+
+def test_failed_compute_reaches_every_waiter_and_is_not_cached():
+    pages, compute = ResultPages(), Compute(delay=0.01, error=RuntimeError("upstream down"))
+
+    async def run():
+        return await asyncio.gather(*(pages.page("key", "games", compute, None, 5) for _ in range(4)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert compute.calls == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+    compute.error = None
+    assert _page(pages, "key", compute)["games"] == ITEMS[:10]
+    assert compute.calls == 2
@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from prediction_store import PredictionStore
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / "predictions.log")
+
+
+def _open(path: str, hot_size: int = 10_000) -> PredictionStore:
+    store = PredictionStore(path, hot_size=hot_size)
+    store.open()
+    return store
+
+
+def _game(game_pk: int, pick: str):
+    return (game_pk, 147, "2024-06-01", pick)
+
+
+def test_replay_restores_per_user_history(log_path):
+    store = _open(log_path)
+    for i in range(5):
+        store.add("alice", "game_outcome", {"winner": f"Team {i}"}, points_awarded=i)
+    store.add("bob", "season_wins", {"wins": 90})
+    store.close()
+
+    # hot_size=1: history has to be read back from the log by offset
+    reopened = _open(log_path, hot_size=1)
+    assert len(reopened) == 6
+    assert [p.prediction_data["winner"] for p in reopened.for_user("alice")] == [f"Team {i}" for i in range(4, -1, -1)]
+    assert [p.prediction_data["winner"] for p in reopened.for_user("alice", limit=2, offset=1)] == ["Team 3", "Team 2"]
+    assert [p.prediction_type for p in reopened.for_user("bob")] == ["season_wins"]
+    reopened.close()
+
+
+def test_replay_drops_a_torn_last_line(log_path):
+    store = _open(log_path)
+    store.add("alice", "game_outcome", {"winner": "Yankees"})
+    store.add("alice", "game_outcome", {"winner": "Red Sox"})
+    store.close()
+    intact = os.path.getsize(log_path)
+    with open(log_path, "ab") as f:
+        f.write(b'{"op":"add","id":"pred_torn","user_id":"ali')
+
+    reopened = _open(log_path)
+    assert len(reopened) == 2
+    assert os.path.getsize(log_path) == intact
+    # The next append lands where the torn record was, and survives another restart
+    reopened.add("alice", "game_outcome", {"winner": "Mets"})
+    reopened.close()
+
+    again = _open(log_path)
+    assert [p.prediction_data["winner"] for p in again.for_user("alice")] == ["Mets", "Red Sox", "Yankees"]
+    again.close()
+
+
+def test_replay_skips_a_corrupt_line(log_path):
+    store = _open(log_path)
+    store.add("alice", "game_outcome", {"winner": "Yankees"})
+    store.close()
+    with open(log_path, "ab") as f:
+        f.write(b"not json\n")
+    store = _open(log_path)
+    store.add("alice", "game_outcome", {"winner": "Mets"})
+    store.close()
+
+    reopened = _open(log_path, hot_size=1)
+    assert [p.prediction_data["winner"] for p in reopened.for_user("alice")] == ["Mets", "Yankees"]
+    reopened.close()
+
+
+def test_settle_then_reopen(log_path):
+    store = _open(log_path)
+    store.add("alice", "game_outcome", {"winner": "Yankees"}, game=_game(1, "Yankees"))
+    store.add("bob", "game_outcome", {"winner": "Red Sox"}, game=_game(1, "Red Sox"))
+    store.add("carol", "game_outcome", {"winner": "Yankees"}, game=_game(2, "Yankees"))
+    store.add("dave", "game_outcome", {"winner": "Mets"}, game=_game(3, "Mets"))
+    assert set(store.open_games()) == {1, 2, 3}
+
+    assert sorted(store.settle_game(1, "Yankees", 10)) == [("alice", True, 10), ("bob", False, 0)]
+    assert store.settle_game(2, None, 10) == [("carol", None, 0)]
+    assert store.settle_game(1, "Yankees", 10) == []  # already settled
+    store.close()
+
+    reopened = _open(log_path)
+    assert reopened.open_games() == {3: (147, "2024-06-01")}
+    assert reopened.open_count(1) == 0
+    alice, = reopened.for_user("alice")
+    assert (alice.status, alice.to_dict()["points_awarded"]) == ("won", 10)
+    assert reopened.for_user("bob")[0].status == "lost"
+    assert reopened.for_user("carol")[0].status == "void"
+    assert reopened.for_user("dave")[0].status == "open"
+    # Settlement after a restart still finds the open game's predictions
+    assert reopened.settle_game(3, "Mets", 10) == [("dave", True, 10)]
+    reopened.close()
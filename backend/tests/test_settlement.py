@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from leaderboard import Leaderboard
+from mlb_service import ScheduleBatch
+from prediction_store import PredictionStore
+from settlement import SettlementEngine
+from statsapi_decode import ScheduleRow
+
+YANKEES, RED_SOX = (147, "New York Yankees"), (111, "Boston Red Sox")
+TODAY = datetime.now(timezone.utc).date()
+
+
+class Schedule:
+    """Stands in for get_league_schedule: serves `games` by UTC date and records each window asked for."""
+
+    def __init__(self, games, failing=()):
+        self.games = games  # (game_pk, date, status, home score, away score)
+        self.failing = set(failing)
+        self.calls = []
+
+    def __call__(self, start, end):
+        self.calls.append((start, end))
+        if end in self.failing:
+            raise RuntimeError("statsapi down")
+        rows = [
+            ScheduleRow(pk, f"{day.isoformat()}T23:05:00Z", status, YANKEES[0], YANKEES[1], RED_SOX[0], RED_SOX[1],
+                        "Yankee Stadium", home, away)
+            for pk, day, status, home, away in self.games
+            if start <= day <= end
+        ]
+        return ScheduleBatch.from_rows(rows)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PredictionStore(str(tmp_path / "predictions.log"))
+    store.open()
+    yield store
+    store.close()
+
+
+def _predict(store, user_id, game_pk, day, pick, team_id=YANKEES[0]):
+    store.add(user_id, "game_outcome", {"winner": pick}, game=(game_pk, team_id, day.isoformat(), pick))
+
+
+def test_settles_finished_games_with_one_fetch_per_day(store):
+    yesterday = TODAY - timedelta(days=1)
+    _predict(store, "alice", 1, yesterday, YANKEES[1])
+    _predict(store, "bob", 1, yesterday, RED_SOX[1], team_id=RED_SOX[0])
+    _predict(store, "carol", 2, TODAY, RED_SOX[1], team_id=RED_SOX[0])
+    _predict(store, "dave", 3, TODAY, YANKEES[1])
+    schedule = Schedule([(1, yesterday, "Final", 5, 3), (2, TODAY, "Final", 2, 4), (3, TODAY, "In Progress", 1, 0)])
+    board = Leaderboard(seed=1)
+    engine = SettlementEngine(store, board, points=10, schedule_fn=schedule)
+
+    assert engine.run_once() == 3
+    assert sorted(schedule.calls) == [(yesterday - timedelta(days=1), yesterday), (TODAY - timedelta(days=1), TODAY)]
+    assert [board.get(u).prediction_points for u in ("alice", "bob", "carol")] == [10, 0, 10]
+    assert set(store.open_games()) == {3}
+
+
+def test_latest_prediction_decides_a_games_date(store):
+    # An earlier record dated in the future (say, before a reschedule) must not hide the game
+    _predict(store, "alice", 1, TODAY + timedelta(days=3), YANKEES[1])
+    _predict(store, "bob", 1, TODAY, YANKEES[1])
+    engine = SettlementEngine(store, Leaderboard(seed=1), schedule_fn=Schedule([(1, TODAY, "Final", 3, 1)]))
+    assert engine.run_once() == 2
+
+
+def test_games_outside_the_window_are_voided_without_fetching(store):
+    _predict(store, "alice", 1, TODAY.replace(year=2000), YANKEES[1])
+    _predict(store, "bob", 2, TODAY + timedelta(days=400), YANKEES[1])
+    _predict(store, "carol", 3, TODAY + timedelta(days=2), YANKEES[1])  # not played yet
+    schedule = Schedule([])
+    engine = SettlementEngine(store, Leaderboard(seed=1), schedule_fn=schedule, max_age_days=7)
+
+    assert engine.run_once() == 2
+    assert schedule.calls == []
+    assert store.for_user("alice")[0].status == "void"
+    assert store.for_user("bob")[0].status == "void"
+    assert set(store.open_games()) == {3}
+
+
+def test_a_failed_day_does_not_hold_up_the_others(store):
+    yesterday = TODAY - timedelta(days=1)
+    _predict(store, "alice", 1, yesterday, YANKEES[1])
+    _predict(store, "bob", 2, TODAY, YANKEES[1])
+    schedule = Schedule([(1, yesterday, "Final", 5, 3), (2, TODAY, "Final", 5, 3)], failing={yesterday})
+    engine = SettlementEngine(store, Leaderboard(seed=1), schedule_fn=schedule)
+
+    assert engine.run_once() == 1
+    assert set(store.open_games()) == {1}
@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+import snapshot
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    """Fresh registry and no loaded snapshot, so the app's own sections stay out of the way."""
+    monkeypatch.setattr(snapshot, "_sources", {})
+    monkeypatch.setattr(snapshot, "_limits", {})
+    monkeypatch.setattr(snapshot, "_current", None)
+    yield
+    if snapshot._current is not None:
+        snapshot._current.close()
+
+
+def _restart(path: str) -> int:
+    """What the next worker does at startup."""
+    return snapshot.load(path)
+
+
+def test_entries_round_trip_with_their_expiry(tmp_path):
+    path = str(tmp_path / "cache.snapshot")
+    expiry = time.time() + 60
+    snapshot.register("teams", lambda: [("mlb", {"id": 147}, expiry), ("gone", 1, time.time() - 1)])
+    assert snapshot.save(path) == 2
+
+    assert _restart(path) == 2
+    assert snapshot.lookup("teams", "mlb") == ({"id": 147}, expiry)
+    assert snapshot.lookup("teams", "gone") is None
+    assert snapshot.lookup("teams", "missing") is None
+
+
+def test_untouched_entries_are_carried_over_but_capped(tmp_path):
+    path = str(tmp_path / "cache.snapshot")
+    later = time.time() + 60
+    held = [(f"old{i}", i, later) for i in range(10)]
+    snapshot.register("memo", lambda: held, limit=8)
+    assert snapshot.save(path) == 8  # most recently used last: the first two are dropped
+    _restart(path)
+    assert snapshot.lookup("memo", "old1") is None and snapshot.lookup("memo", "old2") is not None
+
+    # Each new worker caches different keys; the file stays at the cap, its own entries first
+    for generation in range(5):
+        held = [(f"new{generation}.{i}", i, later) for i in range(3)]
+        assert snapshot.save(path) == 8
+        _restart(path)
+        assert all(snapshot.lookup("memo", key) is not None for key, _, _ in held)
+
+
+def test_sections_nobody_registers_are_dropped(tmp_path):
+    path = str(tmp_path / "cache.snapshot")
+    snapshot.register("retired", lambda: [("k", "v", None)])
+    snapshot.register("teams", lambda: [("mlb", [], None)])
+    snapshot.save(path)
+    _restart(path)
+
+    del snapshot._sources["retired"]
+    assert snapshot.save(path) == 1
+    _restart(path)
+    assert snapshot.lookup("retired", "k") is None
+    assert snapshot.lookup("teams", "mlb") == ([], None)
+
+
+def test_expired_carried_entries_are_not_rewritten(tmp_path):
+    path = str(tmp_path / "cache.snapshot")
+    entries = [("soon", 1, time.time() + 0.05), ("later", 2, time.time() + 60)]
+    snapshot.register("memo", lambda: entries)
+    snapshot.save(path)
+    _restart(path)
+    entries = []
+    time.sleep(0.1)
+    assert snapshot.save(path) == 1
@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import pytest
+
+from tracing import TracingMiddleware
+
+DEBUG = [(b"x-debug-trace", b"1")]
+
+
+def _run(app, headers=DEBUG, enabled=False, sent=None):
+    sent = [] if sent is None else sent
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/tools/aggregate", "headers": headers}
+    asyncio.run(TracingMiddleware(app, enabled=enabled)(scope, receive, send))
+    return sent
+
+
+def _headers(message):
+    return dict(message["headers"])
+
+
+@pytest.mark.parametrize("media_type", [b"application/x-ndjson", b"text/event-stream"])
+@pytest.mark.parametrize("headers,enabled", [(DEBUG, False), ([], True)])
+def test_streams_pass_through_chunk_by_chunk(media_type, headers, enabled):
+    sent, seen_by_client = [], []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", media_type)]})
+        for line in (b'{"section":"news"}\n', b'{"section":"summary"}\n'):
+            await send({"type": "http.response.body", "body": line, "more_body": True})
+            # Each chunk has reached the client before the next one is produced
+            seen_by_client.append(len(sent))
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    _run(app, headers, enabled, sent)
+    assert seen_by_client == [2, 3]
+    assert [m["type"] for m in sent] == ["http.response.start"] + ["http.response.body"] * 3
+    assert b"server-timing" in _headers(sent[0])
+    assert b"content-length" not in _headers(sent[0])
+    assert [m["body"] for m in sent[1:]] == [b'{"section":"news"}\n', b'{"section":"summary"}\n', b""]
+
+
+def test_debug_json_body_gets_the_trace():
+    async def app(scope, receive, send):
+        body = json.dumps({"status": "ok"}).encode()
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body[:5], "more_body": True})
+        await send({"type": "http.response.body", "body": body[5:], "more_body": False})
+
+    sent = _run(app)
+    assert len(sent) == 2
+    payload = json.loads(sent[1]["body"])
+    assert payload["status"] == "ok" and "debug_trace" in payload
+    assert _headers(sent[0])[b"content-length"] == str(len(sent[1]["body"])).encode()
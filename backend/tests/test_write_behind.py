@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+
+from write_behind import WriteBehind
+
+
+class BlockingWrite:
+    """A `write` that holds each batch until released, recording what it committed."""
+
+    def __init__(self) -> None:
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.committed = []
+        self.fail = False
+
+    def __call__(self, rows) -> None:
+        self.started.set()
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("disk full")
+        self.committed.extend(rows)
+
+
+def _flush_in_background(writer: WriteBehind, write: BlockingWrite) -> threading.Thread:
+    def flush() -> None:
+        try:
+            writer.flush()
+        except RuntimeError:
+            pass
+
+    thread = threading.Thread(target=flush)
+    thread.start()
+    assert write.started.wait(5)
+    return thread
+
+
+def test_rows_stay_readable_while_their_batch_is_written():
+    write = BlockingWrite()
+    writer = WriteBehind(write, "test-writer")
+    writer.put("alice", ("alice", 1))
+    thread = _flush_in_background(writer, write)
+
+    assert writer.get("alice") == ("alice", 1)
+    # A newer row queued mid-write shadows the one being written
+    writer.put("alice", ("alice", 2))
+    assert writer.get("alice") == ("alice", 2)
+
+    write.release.set()
+    thread.join()
+    assert write.committed == [("alice", 1)]
+    assert writer.get("alice") == ("alice", 2)
+    assert writer.flush() == 1
+    assert writer.get("alice") is None
+
+
+@pytest.mark.parametrize("newer", [False, True])
+def test_failed_batch_is_requeued_unless_superseded(newer):
+    write = BlockingWrite()
+    write.fail = True
+    writer = WriteBehind(write, "test-writer")
+    writer.put("alice", ("alice", 1))
+    thread = _flush_in_background(writer, write)
+    if newer:
+        writer.put("alice", ("alice", 2))
+    write.release.set()
+    thread.join()
+
+    assert writer.get("alice") == (("alice", 2) if newer else ("alice", 1))
+    write.fail = False
+    assert writer.flush() == 1
+    assert write.committed == [("alice", 2) if newer else ("alice", 1)]
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import json
+import logging
+import re
+from contextvars import ContextVar
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from http_cache import STREAMING_TYPES
+
+logger = logging.getLogger(__name__)
+
+DEBUG_HEADER = b"x-debug-trace"
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("request_trace", default=None)
+_TOKEN_RE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+@dataclass
+class Span:
+    name: str
+    start_ms: float
+    duration_ms: float
+    cache: Optional[str] = None
+    detail: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "name": self.name,
+            "start_ms": round(self.start_ms, 3),
+            "duration_ms": round(self.duration_ms, 3),
+        }
+        if self.cache is not None:
+            out["cache"] = self.cache
+        if self.detail is not None:
+            out["detail"] = self.detail
+        return out
+
+
+class Trace:
+    """Spans collected while serving a single request."""
+
+    def __init__(self) -> None:
+        self.started = perf_counter()
+        self.spans: List[Span] = []
+
+    def add(self, name: str, start: float, duration_ms: float, cache: Optional[str] = None, detail: Optional[str] = None) -> None:
+        # list.append is atomic, so spans from threadpool workers need no lock
+        self.spans.append(Span(name, (start - self.started) * 1000.0, duration_ms, cache, detail))
+
+    def total_ms(self) -> float:
+        return (perf_counter() - self.started) * 1000.0
+
+    def server_timing(self) -> str:
+        """Render spans as a `Server-Timing` header, one metric per span name."""
+        totals: Dict[str, List[Any]] = {}
+        for s in self.spans:
+            agg = totals.setdefault(s.name, [0.0, 0, set()])
+            agg[0] += s.duration_ms
+            agg[1] += 1
+            if s.cache:
+                agg[2].add(s.cache)
+        parts = []
+        for name, (dur, count, cache) in totals.items():
+            desc = f"{count} calls" if count > 1 else ""
+            if cache:
+                desc = " ".join(filter(None, [desc, "/".join(sorted(cache))]))
+            metric = f"{_TOKEN_RE.sub('_', name)};dur={dur:.1f}"
+            if desc:
+                metric += f';desc="{desc}"'
+            parts.append(metric)
+        parts.append(f"total;dur={self.total_ms():.1f}")
+        return ", ".join(parts)
+
+    def export(self) -> Dict[str, Any]:
+        return {
+            "total_ms": round(self.total_ms(), 3),
+            "spans": [s.to_dict() for s in self.spans],
+        }
+
+
+class _NoopSpan:
+    """Returned by `span()` when no trace is active; attribute writes are dropped."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        return None
+
+
+_NOOP = _NoopSpan()
+
+
+class _ActiveSpan:
+    __slots__ = ("trace", "name", "cache", "detail", "start")
+
+    def __init__(self, trace: Trace, name: str, detail: Optional[str]) -> None:
+        self.trace = trace
+        self.name = name
+        self.cache: Optional[str] = None
+        self.detail = detail
+
+    def __enter__(self) -> "_ActiveSpan":
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.trace.add(self.name, self.start, (perf_counter() - self.start) * 1000.0, self.cache, self.detail)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+def span(name: str, detail: Optional[str] = None) -> Any:
+    """Time a block as a span of the current request; a shared no-op when tracing is off.
+
+    Set `.cache = "hit"`/`"miss"` on the yielded span to report cache status.
+    """
+    trace = _current.get()
+    if trace is None:
+        return _NOOP
+    return _ActiveSpan(trace, name, detail)
+
+
+def record(name: str, duration_ms: float, cache: Optional[str] = None, detail: Optional[str] = None) -> None:
+    """Record an already-measured span ending now."""
+    trace = _current.get()
+    if trace is None:
+        return
+    now = perf_counter()
+    trace.add(name, now - duration_ms / 1000.0, duration_ms, cache, detail)
+
+
+def requests_hook(name: str):
+    """Build a `requests` response hook recording each call on a session as a span.
+
+    Duration is `Response.elapsed` (request sent until headers received).
+    """
+
+    def _hook(resp: Any, *args: Any, **kwargs: Any) -> Any:
+        if _current.get() is not None:
+            path = urlsplit(resp.url).path
+            record(name, resp.elapsed.total_seconds() * 1000.0, detail=f"{resp.request.method} {path} {resp.status_code}")
+        return resp
+
+    return _hook
+
+
+def aiohttp_trace_config() -> Any:
+    """Build an `aiohttp.TraceConfig` recording each client request as a span named after the host."""
+    import aiohttp
+
+    async def on_request_start(session: Any, ctx: Any, params: Any) -> None:
+        ctx.start = perf_counter()
+
+    async def on_request_end(session: Any, ctx: Any, params: Any) -> None:
+        if _current.get() is None:
+            return
+        start = getattr(ctx, "start", None)
+        if start is None:
+            return
+        host = params.url.host or "upstream"
+        record(_upstream_name(host), (perf_counter() - start) * 1000.0,
+               detail=f"{params.method} {params.url.path} {params.response.status}")
+
+    tc = aiohttp.TraceConfig()
+    tc.on_request_start.append(on_request_start)
+    tc.on_request_end.append(on_request_end)
+    return tc
+
+
+def _upstream_name(host: str) -> str:
+    if "mistral" in host:
+        return "mistral"
+    if "openai" in host:
+        return "openai"
+    return host
+
+
+class TracingMiddleware:
+    """ASGI middleware that opens a trace per request.
+
+    Tracing is active for every request when `enabled` is set, or for a single
+    request carrying `X-Debug-Trace: 1`. Active requests get a `Server-Timing`
+    header; debug requests with a JSON object body also get a `debug_trace` field.
+    Streamed responses (NDJSON, SSE) are never buffered and only get the header,
+    timed up to their first bytes. Otherwise the request passes straight through.
+    """
+
+    def __init__(self, app: Any, enabled: bool = False) -> None:
+        self.app = app
+        self.enabled = enabled
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        debug = False
+        for key, value in scope.get("headers") or ():
+            if key == DEBUG_HEADER:
+                debug = value not in (b"", b"0", b"false")
+                break
+        if not self.enabled and not debug:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+        token = _current.set(trace)
+        try:
+            if debug:
+                await self._call_debug(trace, scope, receive, send)
+            else:
+                await self._call_timed(trace, scope, receive, send)
+        finally:
+            _current.reset(token)
+
+    async def _call_timed(self, trace: Trace, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers") or [])
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _call_debug(self, trace: Trace, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        start_message: Dict[str, Any] = {}
+        chunks: List[bytes] = []
+        streaming = False
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal start_message, streaming
+            if message["type"] == "http.response.start":
+                content_type = next((v for k, v in message.get("headers") or [] if k == b"content-type"), b"")
+                if content_type.startswith(STREAMING_TYPES):
+                    streaming = True
+                    headers = list(message.get("headers") or [])
+                    headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                    await send({**message, "headers": headers})
+                    return
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or streaming:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body"):
+                return
+            await self._send_with_trace(trace, start_message, b"".join(chunks), send)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _send_with_trace(self, trace: Trace, start_message: Dict[str, Any], body: bytes, send: Any) -> None:
+        headers = [(k, v) for k, v in start_message.get("headers") or [] if k != b"content-length"]
+        content_type = next((v for k, v in headers if k == b"content-type"), b"")
+        if content_type.startswith(b"application/json"):
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                payload = None
+            if isinstance(payload, dict):
+                payload["debug_trace"] = trace.export()
+                body = json.dumps(payload, default=str, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+        await send({**start_message, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
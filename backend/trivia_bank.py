@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Random probes before falling back to a scan for an unseen question
+_PROBES = 8
+
+
+@dataclass
+class Question:
+    question_id: str
+    question: str
+    options: List[str]
+    correct_answer: int
+    sport: str
+    difficulty: str
+    points: int
+    ordinal: int = field(default=-1, compare=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "question_id": self.question_id,
+            "question": self.question,
+            "options": self.options,
+            "correct_answer": self.correct_answer,
+            "sport": self.sport,
+            "difficulty": self.difficulty,
+            "points": self.points,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Question":
+        options = d["options"]
+        if isinstance(options, str):
+            options = json.loads(options)
+        return cls(
+            question_id=str(d["question_id"]),
+            question=d["question"],
+            options=list(options),
+            correct_answer=int(d["correct_answer"]),
+            sport=str(d.get("sport") or "general").lower(),
+            difficulty=str(d.get("difficulty") or "medium").lower(),
+            points=int(d.get("points") or 10),
+        )
+
+
+class SeenSet:
+    """Bitmap over question ordinals (one bit per question in the bank)."""
+
+    __slots__ = ("bits",)
+
+    def __init__(self) -> None:
+        self.bits = bytearray()
+
+    def __contains__(self, ordinal: int) -> bool:
+        byte = ordinal >> 3
+        return byte < len(self.bits) and bool(self.bits[byte] & (1 << (ordinal & 7)))
+
+    def add(self, ordinal: int) -> None:
+        byte = ordinal >> 3
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(byte + 1 - len(self.bits)))
+        self.bits[byte] |= 1 << (ordinal & 7)
+
+    def discard_all(self, ordinals: Iterable[int]) -> None:
+        for ordinal in ordinals:
+            byte = ordinal >> 3
+            if byte < len(self.bits):
+                self.bits[byte] &= ~(1 << (ordinal & 7)) & 0xFF
+
+
+class TriviaBank:
+    """Trivia questions indexed by id, sport and difficulty, with per-user no-repeat sampling.
+
+    Questions get dense ordinals in load order; each (sport, difficulty) filter,
+    including wildcards, maps to a list of ordinals, so lookups and draws are O(1).
+    Seen-sets are bitmaps over ordinals, kept for the `max_users` most recent users.
+    """
+
+    def __init__(self, max_users: int = 10_000, seed: Optional[int] = None) -> None:
+        self.max_users = max_users
+        self._questions: List[Question] = []
+        self._by_id: Dict[str, int] = {}
+        self._pools: Dict[Tuple[Optional[str], Optional[str]], List[int]] = {}
+        self._seen: "OrderedDict[str, SeenSet]" = OrderedDict()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    def __contains__(self, question_id: str) -> bool:
+        return question_id in self._by_id
+
+    def add(self, questions: Iterable[Question]) -> int:
+        """Index `questions`, skipping ids already in the bank; returns the number added."""
+        added = 0
+        with self._lock:
+            for q in questions:
+                if q.question_id in self._by_id:
+                    continue
+                q.ordinal = len(self._questions)
+                self._questions.append(q)
+                self._by_id[q.question_id] = q.ordinal
+                for key in ((None, None), (q.sport, None), (None, q.difficulty), (q.sport, q.difficulty)):
+                    self._pools.setdefault(key, []).append(q.ordinal)
+                added += 1
+        return added
+
+    def get(self, question_id: str) -> Optional[Question]:
+        ordinal = self._by_id.get(question_id)
+        return self._questions[ordinal] if ordinal is not None else None
+
+    def count(self, sport: Optional[str] = None, difficulty: Optional[str] = None) -> int:
+        return len(self._pools.get(self._key(sport, difficulty), ()))
+
+    @staticmethod
+    def _key(sport: Optional[str], difficulty: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        return (sport.lower() if sport else None, difficulty.lower() if difficulty else None)
+
+    def _seen_for(self, user_id: str) -> SeenSet:
+        seen = self._seen.get(user_id)
+        if seen is None:
+            seen = self._seen[user_id] = SeenSet()
+            while len(self._seen) > self.max_users:
+                self._seen.popitem(last=False)
+        else:
+            self._seen.move_to_end(user_id)
+        return seen
+
+    def sample(self, user_id: str, sport: Optional[str] = None, difficulty: Optional[str] = None) -> Optional[Question]:
+        """Random question matching the filters that `user_id` has not been served yet.
+
+        Once every matching question has been seen, that pool starts over.
+        """
+        with self._lock:
+            pool = self._pools.get(self._key(sport, difficulty))
+            if not pool:
+                return None
+            seen = self._seen_for(user_id)
+            ordinal = self._pick_unseen(pool, seen)
+            if ordinal is None:
+                seen.discard_all(pool)
+                ordinal = pool[self._rng.randrange(len(pool))]
+            seen.add(ordinal)
+            return self._questions[ordinal]
+
+    def _pick_unseen(self, pool: List[int], seen: SeenSet) -> Optional[int]:
+        n = len(pool)
+        for _ in range(_PROBES):
+            ordinal = pool[self._rng.randrange(n)]
+            if ordinal not in seen:
+                return ordinal
+        # Mostly seen: scan once from a random offset
+        start = self._rng.randrange(n)
+        for i in range(n):
+            ordinal = pool[(start + i) % n]
+            if ordinal not in seen:
+                return ordinal
+        return None
+
+    # --- loading ------------------------------------------------------------------
+
+    def load(self, path: str) -> int:
+        """Load questions from SQLite (.db/.sqlite/.sqlite3), JSON (list) or JSON lines."""
+        if path.endswith((".db", ".sqlite", ".sqlite3")):
+            return self.load_sqlite(path)
+        return self.load_file(path)
+
+    def load_file(self, path: str) -> int:
+        with open(path, encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                rows = [json.loads(line) for line in f if line.strip()]
+            else:
+                rows = json.load(f)
+        added = self.add(Question.from_dict(r) for r in rows)
+        logger.info("Loaded %d trivia questions from %s", added, path)
+        return added
+
+    def load_sqlite(self, path: str) -> int:
+        conn = sqlite3.connect(path)
+        try:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.execute(
+                "SELECT question_id, question, options, correct_answer, sport, difficulty, points "
+                "FROM trivia_questions ORDER BY rowid"
+            )
+            added = self.add(Question.from_dict(dict(r)) for r in cursor)
+        finally:
+            conn.close()
+        logger.info("Loaded %d trivia questions from %s", added, path)
+        return added
+
+
+def save_sqlite(path: str, questions: Iterable[Question]) -> int:
+    """Insert `questions` into the `trivia_questions` table at `path`, ignoring known ids."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS trivia_questions (
+                question_id TEXT PRIMARY KEY,
+                question TEXT NOT NULL,
+                options TEXT NOT NULL,
+                correct_answer INTEGER NOT NULL,
+                sport TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                points INTEGER NOT NULL
+            )"""
+        )
+        before = conn.total_changes
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO trivia_questions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(q.question_id, q.question, json.dumps(q.options), q.correct_answer, q.sport, q.difficulty, q.points)
+                 for q in questions],
+            )
+        return conn.total_changes - before
+    finally:
+        conn.close()
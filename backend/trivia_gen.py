@@ -0,0 +1,299 @@
+"""Offline trivia generation: fill the trivia bank with LLM-written questions.
+
+Usage (from backend/):
+    python -m trivia_gen --sports mlb,nba,nfl --count 1000
+    python -m trivia_gen --sports mlb --difficulties hard --count 200 --provider openai --rpm 30
+
+Questions are requested in batches from Mistral (MISTRAL_API_KEY) or OpenAI
+(OPENAI_API_KEY) with the same chat-completions call the API uses, many calls at
+a time under a requests-per-minute budget. Every question is validated and
+deduplicated by normalized text, against this run and the existing bank, then
+written to TRIVIA_BANK (SQLite) as it arrives. The API loads the bank at
+startup, so `get_trivia` never waits on an LLM.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, List, Optional, Set
+
+import aiohttp
+
+from config import settings
+from trivia_bank import Question, save_sqlite
+
+logger = logging.getLogger(__name__)
+
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+MISTRAL_BASE_URL = os.getenv("MISTRAL_BASE_URL", "https://api.mistral.ai/v1").rstrip("/")
+
+PROVIDERS = {
+    "mistral": (MISTRAL_BASE_URL, "mistral-large-latest", "MISTRAL_API_KEY"),
+    "openai": (OPENAI_BASE_URL, "gpt-4o", "OPENAI_API_KEY"),
+}
+SPORT_NAMES = {"mlb": "Major League Baseball", "nba": "NBA basketball", "nfl": "NFL football", "nhl": "NHL hockey"}
+DIFFICULTY_POINTS = {"easy": 5, "medium": 10, "hard": 15}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_PUNCT = re.compile(r"[^a-z0-9 ]+")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Dedup key for a question: lower case, no punctuation, single spaces."""
+    return _SPACE.sub(" ", _PUNCT.sub(" ", text.lower())).strip()
+
+
+def question_id(text: str) -> str:
+    # Derived from the normalized text, so re-runs can never insert the same question twice
+    return "gen_" + hashlib.sha1(normalize(text).encode("utf-8")).hexdigest()[:16]
+
+
+def parse_questions(content: str) -> List[Dict[str, Any]]:
+    """JSON question objects from a model reply, tolerating code fences and surrounding prose."""
+    start, end = content.find("["), content.rfind("]")
+    if start == -1 or end <= start:
+        return []
+    try:
+        items = json.loads(content[start:end + 1])
+    except ValueError:
+        return []
+    return [item for item in items if isinstance(item, dict)]
+
+
+def validate(item: Dict[str, Any], sport: str, difficulty: str) -> Optional[Question]:
+    """A Question if `item` is well formed (4 distinct options, answer in range), else None."""
+    text = item.get("question")
+    options = item.get("options")
+    answer = item.get("correct_answer", item.get("answer"))
+    if not isinstance(text, str) or not 10 <= len(text.strip()) <= 300:
+        return None
+    if not isinstance(options, list) or len(options) != 4:
+        return None
+    options = [str(o).strip() for o in options]
+    if not all(options) or len({o.lower() for o in options}) != 4:
+        return None
+    if isinstance(answer, str):
+        # Models sometimes return the answer text or a letter instead of an index
+        if answer.strip() in options:
+            answer = options.index(answer.strip())
+        elif len(answer.strip()) == 1 and answer.strip().upper() in "ABCD":
+            answer = "ABCD".index(answer.strip().upper())
+    if isinstance(answer, bool) or not isinstance(answer, int) or not 0 <= answer < 4:
+        return None
+    return Question(
+        question_id=question_id(text),
+        question=text.strip(),
+        options=options,
+        correct_answer=answer,
+        sport=sport,
+        difficulty=difficulty,
+        points=DIFFICULTY_POINTS.get(difficulty, 10),
+    )
+
+
+def existing_keys(path: str) -> Set[str]:
+    """Normalized text of every question already in the SQLite bank at `path`."""
+    if not os.path.exists(path):
+        return set()
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("SELECT question FROM trivia_questions").fetchall()
+    except sqlite3.OperationalError:
+        return set()
+    finally:
+        conn.close()
+    return {normalize(q) for (q,) in rows}
+
+
+class RateLimiter:
+    """Spaces request starts evenly to stay under `per_minute` (shared by all workers)."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class TriviaGenerator:
+    """Runs batched generation calls concurrently and collects unique, valid questions."""
+
+    def __init__(
+        self,
+        api_key: str,
+        provider: str = "mistral",
+        concurrency: int = 8,
+        per_minute: float = 60.0,
+        batch_size: int = 10,
+        retries: int = 4,
+        timeout: float = 60.0,
+        seen: Optional[Set[str]] = None,
+    ) -> None:
+        self.base_url, self.model, _ = PROVIDERS[provider]
+        self.api_key = api_key
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.retries = retries
+        self.timeout = timeout
+        self.limiter = RateLimiter(per_minute)
+        self.seen: Set[str] = seen if seen is not None else set()
+        self.calls = 0
+        self.failed_calls = 0
+        self.rejected = 0
+        self.duplicates = 0
+
+    def _prompt(self, sport: str, difficulty: str) -> str:
+        return (
+            f"Write {self.batch_size} {difficulty} multiple-choice trivia questions about "
+            f"{SPORT_NAMES.get(sport, sport.upper())}. Cover varied eras, teams, players, records and rules; "
+            "only use facts that are settled and will not change. Reply with only a JSON array of objects with "
+            'keys "question" (string), "options" (exactly 4 distinct strings) and "correct_answer" '
+            "(0-based index of the right option)."
+        )
+
+    async def _call(self, session: aiohttp.ClientSession, sport: str, difficulty: str) -> Optional[str]:
+        body = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": f"You are a {sport.upper()} trivia writer. Be accurate and concise."},
+                {"role": "user", "content": self._prompt(sport, difficulty)},
+            ],
+            "max_tokens": 200 * self.batch_size,
+            "temperature": 0.9,
+        }
+        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+        for attempt in range(self.retries + 1):
+            await self.limiter.wait()
+            self.calls += 1
+            try:
+                async with session.post(
+                    f"{self.base_url}/chat/completions",
+                    headers=headers,
+                    json=body,
+                    timeout=aiohttp.ClientTimeout(total=self.timeout),
+                ) as response:
+                    if response.status == 200:
+                        data = await response.json()
+                        return data["choices"][0]["message"]["content"]
+                    if response.status not in RETRY_STATUSES:
+                        logger.warning("Generation call failed with HTTP %s", response.status)
+                        break
+                    retry_after = response.headers.get("Retry-After")
+            except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError) as e:
+                logger.warning("Generation call error: %s", e)
+                retry_after = None
+            if attempt < self.retries:
+                try:
+                    delay = float(retry_after) if retry_after else 2.0 ** attempt
+                except ValueError:
+                    delay = 2.0 ** attempt
+                await asyncio.sleep(delay)
+        self.failed_calls += 1
+        return None
+
+    def _accept(self, items: List[Dict[str, Any]], sport: str, difficulty: str) -> List[Question]:
+        accepted = []
+        for item in items:
+            question = validate(item, sport, difficulty)
+            if question is None:
+                self.rejected += 1
+                continue
+            key = normalize(question.question)
+            if key in self.seen:
+                self.duplicates += 1
+                continue
+            self.seen.add(key)
+            accepted.append(question)
+        return accepted
+
+    async def generate(self, sport: str, difficulty: str, count: int, sink=None) -> List[Question]:
+        """Up to `count` new questions for one pool; each accepted batch is also passed to `sink`.
+
+        Gives up after roughly three times the calls `count` should need, since
+        late batches are mostly duplicates once a topic is exhausted.
+        """
+        questions: List[Question] = []
+        budget = [max(1, -(-count // self.batch_size)) * 3]
+
+        async def worker(session: aiohttp.ClientSession) -> None:
+            while len(questions) < count and budget[0] > 0:
+                budget[0] -= 1
+                content = await self._call(session, sport, difficulty)
+                if content is None:
+                    continue
+                batch = self._accept(parse_questions(content), sport, difficulty)[: count - len(questions)]
+                if batch:
+                    questions.extend(batch)
+                    if sink is not None:
+                        sink(batch)
+
+        async with aiohttp.ClientSession() as session:
+            await asyncio.gather(*(worker(session) for _ in range(self.concurrency)))
+        return questions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--sports", default="mlb,nba,nfl", help="comma-separated sports")
+    p.add_argument("--difficulties", default="easy,medium,hard", help="comma-separated difficulties")
+    p.add_argument("--count", type=int, default=500, help="new questions per sport and difficulty")
+    p.add_argument("--provider", choices=sorted(PROVIDERS), default="mistral")
+    p.add_argument("--concurrency", type=int, default=8, help="calls in flight")
+    p.add_argument("--rpm", type=float, default=60.0, help="max calls started per minute (0 = unlimited)")
+    p.add_argument("--batch-size", type=int, default=10, help="questions requested per call")
+    p.add_argument("--output", default=settings.TRIVIA_BANK, help="SQLite trivia bank to add to")
+    args = p.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    api_key = os.getenv(PROVIDERS[args.provider][2])
+    if not api_key:
+        print(f"{PROVIDERS[args.provider][2]} is not set", file=sys.stderr)
+        return 2
+    if not args.output.endswith(".db"):
+        print("--output must be a SQLite .db trivia bank", file=sys.stderr)
+        return 2
+
+    generator = TriviaGenerator(
+        api_key,
+        provider=args.provider,
+        concurrency=args.concurrency,
+        per_minute=args.rpm,
+        batch_size=args.batch_size,
+        seen=existing_keys(args.output),
+    )
+    written = [0]
+
+    def sink(batch: List[Question]) -> None:
+        written[0] += save_sqlite(args.output, batch)
+
+    started = time.perf_counter()
+    for sport in [s.strip().lower() for s in args.sports.split(",") if s.strip()]:
+        for difficulty in [d.strip().lower() for d in args.difficulties.split(",") if d.strip()]:
+            got = asyncio.run(generator.generate(sport, difficulty, args.count, sink))
+            print(f"{sport}/{difficulty}: {len(got)} new questions")
+    print(
+        f"wrote {written[0]} questions to {args.output} in {time.perf_counter() - started:.1f}s "
+        f"({generator.calls} calls, {generator.failed_calls} failed, "
+        f"{generator.rejected} invalid, {generator.duplicates} duplicates)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """SQLite connection in WAL mode, shareable across threads (callers serialise access)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class WriteBehind:
+    """Coalesces pending rows per key and hands them to `write` in batches.
+
+    A background thread flushes every `interval` seconds, or as soon as
+    `batch_size` keys are pending. A failed batch is re-queued unless a newer
+    row for the same key arrived in the meantime. Rows being written stay
+    visible to `get` until `write` returns, so a reader never falls back to
+    the store while it still holds an older row.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[List[Tuple[Any, ...]]], None],
+        name: str,
+        interval: float = 1.0,
+        batch_size: int = 1000,
+    ) -> None:
+        self.write = write
+        self.name = name
+        self.interval = interval
+        self.batch_size = batch_size
+        self._pending: Dict[Hashable, Tuple[Any, ...]] = {}
+        # The batch `write` is working on; one flush runs at a time
+        self._inflight: Dict[Hashable, Tuple[Any, ...]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, key: Hashable, row: Tuple[Any, ...]) -> None:
+        with self._lock:
+            self._pending[key] = row
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any, ...]]:
+        """Row still waiting to be written (or being written) for `key`, if any."""
+        with self._lock:
+            row = self._pending.get(key)
+            return row if row is not None else self._inflight.get(key)
+
+    def flush(self) -> int:
+        """Write everything pending now; returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            if not batch:
+                return 0
+            try:
+                self.write(list(batch.values()))
+            except Exception:
+                with self._lock:
+                    for key, row in batch.items():
+                        self._pending.setdefault(key, row)
+                    self._inflight = {}
+                raise
+            with self._lock:
+                self._inflight = {}
+            return len(batch)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("%s flush failed: %s", self.name, e)
+
+    def start(self) -> "WriteBehind":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self) -> None:
+        """Stop the flusher thread and write whatever is still pending."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
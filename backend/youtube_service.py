@@ -1,35 +1,49 @@
 from __future__ import annotations
 
 import logging
+import os
 import re
+import sys
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from functools import lru_cache
+from typing import Any, List, Optional
 
 import requests
 
-try:
-    from youtube_transcript_api import (
-        YouTubeTranscriptApi,
-        TranscriptsDisabled,
-        NoTranscriptFound,
-        VideoUnavailable,
-    )
-except Exception:  # pragma: no cover
-    YouTubeTranscriptApi = None  # type: ignore
-    TranscriptsDisabled = NoTranscriptFound = VideoUnavailable = Exception  # type: ignore
-
-try:
-    from youtubesearchpython import VideosSearch  # fallback search without API key
-except Exception:  # pragma: no cover
-    VideosSearch = None
-
 from config import settings
+from tracing import requests_hook, span
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+# The scraper and transcript libraries are optional and slow to import, so they load on first use
+@lru_cache(maxsize=1)
+def _videos_search() -> Any:
+    """youtubesearchpython's VideosSearch (fallback search without API key), or None if not installed."""
+    try:
+        from youtubesearchpython import VideosSearch
+    except Exception:  # pragma: no cover
+        return None
+    return VideosSearch
+
+
+@lru_cache(maxsize=1)
+def _transcript_api() -> Any:
+    """(YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound, VideoUnavailable), or None if not installed."""
+    try:
+        from youtube_transcript_api import (
+            YouTubeTranscriptApi,
+            TranscriptsDisabled,
+            NoTranscriptFound,
+            VideoUnavailable,
+        )
+    except Exception:  # pragma: no cover
+        return None
+    return YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound, VideoUnavailable
+
+
+@dataclass(frozen=True, slots=True)
 class VideoItem:
     video_id: str
     title: str
@@ -38,8 +52,8 @@ class VideoItem:
     view_count: Optional[int]
 
 
-YOUTUBE_SEARCH_URL = "https://www.googleapis.com/youtube/v3/search"
-YOUTUBE_VIDEOS_URL = "https://www.googleapis.com/youtube/v3/videos"
+YOUTUBE_SEARCH_URL = os.getenv("YOUTUBE_SEARCH_URL", "https://www.googleapis.com/youtube/v3/search")
+YOUTUBE_VIDEOS_URL = os.getenv("YOUTUBE_VIDEOS_URL", "https://www.googleapis.com/youtube/v3/videos")
 
 
 def _parse_view_count(text: str | None) -> Optional[int]:
@@ -63,6 +77,7 @@ def _parse_view_count(text: str | None) -> Optional[int]:
 
 
 session = requests.Session()
+session.hooks["response"].append(requests_hook("youtube"))
 
 
 def search_videos(query: str, max_results: int = 10, use_official_api: Optional[bool] = None) -> List[VideoItem]:
@@ -120,7 +135,7 @@ def search_videos(query: str, max_results: int = 10, use_official_api: Optional[
                         video_id=vid,
                         title=snippet.get("title", "(untitled)"),
                         url=f"https://www.youtube.com/watch?v={vid}",
-                        channel=snippet.get("channelTitle"),
+                        channel=sys.intern(snippet["channelTitle"]) if snippet.get("channelTitle") else None,
                         view_count=view_count,
                     )
                 )
@@ -128,6 +143,7 @@ def search_videos(query: str, max_results: int = 10, use_official_api: Optional[
         return stats_items[:max_results]
 
     # Fallback scraper
+    VideosSearch = _videos_search()
     if VideosSearch is None:
         logger.warning("youtubesearchpython not installed; cannot fallback search")
         return []
@@ -165,8 +181,9 @@ def search_videos(query: str, max_results: int = 10, use_official_api: Optional[
             return None
 
     try:
-        vs = VideosSearch(query, limit=max(20, max_results))
-        res = vs.result() or {}
+        with span("youtube.scrape"):
+            vs = VideosSearch(query, limit=max(20, max_results))
+            res = vs.result() or {}
     except Exception as e:  # pragma: no cover
         logger.error("YouTube fallback search failed: %s", e)
         return []
@@ -175,6 +192,7 @@ def search_videos(query: str, max_results: int = 10, use_official_api: Optional[
         vid = r.get("id")
         title = r.get("title") or "(untitled)"
         channel = (r.get("channel") or {}).get("name")
+        channel = sys.intern(channel) if channel else None
         url = r.get("link") or (f"https://www.youtube.com/watch?v={vid}" if vid else None)
         views_text = (r.get("viewCount") or {}).get("text") or r.get("views")
         views = _parse_view_count(views_text) if views_text else None
@@ -192,8 +210,10 @@ def search_videos(query: str, max_results: int = 10, use_official_api: Optional[
 
 
 def fetch_transcript_text(video_id: str, prefer_langs: Optional[List[str]] = None) -> Optional[str]:
-    if YouTubeTranscriptApi is None:
+    api = _transcript_api()
+    if api is None:
         return None
+    YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound, VideoUnavailable = api
     prefer_langs = prefer_langs or ["en"]
     try:
         transcripts = YouTubeTranscriptApi.list_transcripts(video_id)